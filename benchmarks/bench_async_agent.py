@@ -0,0 +1,51 @@
+# benchmarks/bench_async_agent.py
+"""
+Throughput of `AsyncReasoningAgent.get_instructions_many` against a local
+stub OpenAI server with injected latency, for several concurrency limits.
+
+Run from the project root (no network or real API key needed):
+    python -m benchmarks.bench_async_agent --pairs 500 --latency 0.05 --limits 1 8 32
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from tests.unit.fake_openai_server import FakeOpenAIServer
+
+
+async def run_batch(pairs, limit):
+    from src.ai.reasoning_agent import AsyncReasoningAgent
+
+    async with AsyncReasoningAgent(max_concurrency=limit) as agent:
+        return await agent.get_instructions_many(pairs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark AsyncReasoningAgent concurrency.")
+    parser.add_argument("--pairs", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds the stub server waits per request.")
+    parser.add_argument("--limits", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    pairs = [(f"x = {i}", f"x = {i + 1}") for i in range(args.pairs)]
+    print(f"{'limit':>6} {'time (s)':>10} {'pairs/s':>10} {'max in flight':>14}")
+    for limit in args.limits:
+        with FakeOpenAIServer(content="DELETE 1", latency=args.latency) as server:
+            os.environ.update(
+                OPENAI_API_KEY="stub-key",
+                OPENAI_BASE_URL=server.base_url,
+                RESPONSE_CACHE_ENABLED="false",
+            )
+            from src.config.settings import get_settings
+            get_settings.cache_clear()
+
+            start = time.perf_counter()
+            results = asyncio.run(run_batch(pairs, limit))
+            elapsed = time.perf_counter() - start
+            assert all(r == "DELETE 1" for r in results), results[:3]
+            print(f"{limit:>6} {elapsed:>10.2f} {len(pairs) / elapsed:>10.1f} {server.max_in_flight:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/bench_injector.py
+"""
+Compares the interval-based delete handling in `apply_instructions` against the
+previous one-int-per-deleted-line set on generated files.
+
+Run from the project root:
+    python -m benchmarks.bench_injector --sizes 100000 1000000 10000000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from typing import List
+
+from src.core.injector import apply_instructions
+from src.core.parser import DeleteInstruction, InsertInstruction, ParsedInstruction
+
+
+def legacy_apply_instructions(original_code: str, instructions: List[ParsedInstruction]) -> str:
+    """The set-based implementation `apply_instructions` used before interval deletes."""
+    original_lines = original_code.splitlines()
+    num_original_lines = len(original_lines)
+    lines_to_delete = set()
+    for instruction in instructions:
+        if isinstance(instruction, DeleteInstruction):
+            end_line = instruction.line_end if instruction.line_end is not None else instruction.line_start
+            for i in range(instruction.line_start, end_line + 1):
+                if 1 <= i <= num_original_lines:
+                    lines_to_delete.add(i)
+    insertions_before_line = {}
+    for instruction in instructions:
+        if isinstance(instruction, InsertInstruction):
+            if 1 <= instruction.line_before <= num_original_lines + 1:
+                insertions_before_line.setdefault(instruction.line_before, []).append(instruction.content)
+    new_code_lines = []
+    for i in range(1, num_original_lines + 1):
+        if i in insertions_before_line:
+            new_code_lines.extend(insertions_before_line[i])
+        if i not in lines_to_delete:
+            new_code_lines.append(original_lines[i - 1])
+    new_code_lines.extend(insertions_before_line.get(num_original_lines + 1, []))
+    return "\n".join(new_code_lines)
+
+
+def make_case(num_lines: int):
+    """A file of `num_lines` lines with one huge ranged delete plus a few small edits."""
+    code = "\n".join(f"    value_{i} = compute({i})" for i in range(num_lines))
+    instructions = [
+        DeleteInstruction(line_start=num_lines // 10, line_end=num_lines // 10 * 9),
+        InsertInstruction(line_before=num_lines // 10, content="    # replaced block"),
+        DeleteInstruction(line_start=3),
+        InsertInstruction(line_before=num_lines + 1, content="# end"),
+    ]
+    return code, instructions
+
+
+def measure(func, code, instructions, trace_memory: bool):
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    func(code, instructions)
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark interval-based deletes in apply_instructions.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument(
+        "--max-traced-lines", type=int, default=1_000_000,
+        help="tracemalloc is slow; only measure peak memory up to this many lines.",
+    )
+    args = parser.parse_args()
+
+    print(f"{'lines':>10} {'impl':>8} {'time (s)':>10} {'peak (MiB)':>11}")
+    for size in args.sizes:
+        code, instructions = make_case(size)
+        for name, func in (("legacy", legacy_apply_instructions), ("interval", apply_instructions)):
+            elapsed, _ = measure(func, code, instructions, trace_memory=False)
+            peak_text = "-"
+            if size <= args.max_traced_lines:
+                _, peak = measure(func, code, instructions, trace_memory=True)
+                peak_text = f"{peak / 2**20:.1f}"
+            print(f"{size:>10} {name:>8} {elapsed:>10.3f} {peak_text:>11}")
+        result = apply_instructions(code, instructions)
+        expected = legacy_apply_instructions(code, instructions)
+        assert result == expected, "interval and legacy implementations disagree"
+
+
+if __name__ == "__main__":
+    main()
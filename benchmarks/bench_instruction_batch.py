@@ -0,0 +1,97 @@
+# benchmarks/bench_instruction_batch.py
+"""
+Memory and speed of the instruction representations on generated scripts:
+
+    dict     -- the previous plain dataclasses (per-instance __dict__ and a `type` field)
+    slotted  -- today's frozen, slotted `InsertInstruction` / `DeleteInstruction` list
+    batch    -- `InstructionBatch` columns
+
+"retained" is what the parsed script keeps alive, "peak" the tracemalloc
+peak while parsing; apply is `apply_instructions` on a matching file.
+
+Run from the project root:
+    python -m benchmarks.bench_instruction_batch --sizes 20000 200000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import List, Literal, Optional
+
+from benchmarks.bench_parser import make_script
+from src.core.injector import apply_instructions
+from src.core.parser import INSTRUCTION_PATTERN, parse_instructions
+from src.models.instruction_batch import InstructionBatch
+
+
+@dataclass
+class LegacyInsert:
+    line_before: int
+    content: str
+    type: Literal["insert"] = field(default="insert", init=False)
+
+
+@dataclass
+class LegacyDelete:
+    line_start: int
+    line_end: Optional[int] = None
+    type: Literal["delete"] = field(default="delete", init=False)
+
+
+def legacy_parse(instruction_string: str) -> List:
+    """`parse_instructions` producing the pre-slots dataclasses."""
+    parsed = []
+    for line in instruction_string.splitlines():
+        m = INSTRUCTION_PATTERN.match(line)
+        if m is None:
+            continue
+        if m.group("insert") is not None:
+            parsed.append(LegacyInsert(int(m.group("insert")), m.group("content")))
+        elif m.group("end") is None:
+            parsed.append(LegacyDelete(int(m.group("delete"))))
+        elif int(m.group("delete")) <= int(m.group("end")):
+            parsed.append(LegacyDelete(int(m.group("delete")), int(m.group("end"))))
+    return parsed
+
+
+def measure_parse(func, script: str):
+    """(seconds, retained bytes, peak bytes) of parsing `script`; the result is returned too."""
+    gc.collect()
+    start = time.perf_counter()
+    func(script)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    result = func(script)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, retained, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark instruction objects against InstructionBatch.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20_000, 200_000])
+    args = parser.parse_args()
+
+    print(f"{'instr':>8} {'impl':>8} {'parse (s)':>10} {'retained (MiB)':>15} {'peak (MiB)':>11} {'apply (s)':>10}")
+    for size in args.sizes:
+        script = make_script(size)
+        code = "\n".join(f"line_{i} = {i}" for i in range(size + 50))
+        expected = apply_instructions(code, parse_instructions(script))
+        for name, func in (("dict", legacy_parse), ("slotted", parse_instructions), ("batch", InstructionBatch.parse)):
+            elapsed, retained, peak, parsed = measure_parse(func, script)
+            apply_text = "-"
+            if name != "dict":  # the injector dispatches on the current classes
+                start = time.perf_counter()
+                result = apply_instructions(code, parsed)
+                apply_text = f"{time.perf_counter() - start:.3f}"
+                assert result == expected, f"{name} disagrees with parse_instructions"
+            print(
+                f"{size:>8} {name:>8} {elapsed:>10.3f} {retained / 2**20:>15.1f} "
+                f"{peak / 2**20:>11.1f} {apply_text:>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
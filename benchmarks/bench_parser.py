@@ -0,0 +1,92 @@
+# benchmarks/bench_parser.py
+"""
+Throughput of `parse_instructions` (single combined scanner) against the
+previous three-regex cascade on generated instruction scripts.
+
+Run from the project root:
+    python -m benchmarks.bench_parser --sizes 10000 100000
+"""
+import argparse
+import random
+import time
+from typing import List
+
+from src.core.parser import (
+    DELETE_RANGE_PATTERN,
+    DELETE_SINGLE_PATTERN,
+    INSERT_PATTERN,
+    NO_CHANGES_PATTERN,
+    DeleteInstruction,
+    InsertInstruction,
+    ParsedInstruction,
+    parse_instructions,
+)
+
+
+def legacy_parse_instructions(instruction_string: str) -> List[ParsedInstruction]:
+    """The regex cascade `parse_instructions` used before the combined scanner."""
+    if not instruction_string or instruction_string.strip().upper().startswith("ERROR:"):
+        return []
+    if NO_CHANGES_PATTERN.fullmatch(instruction_string.strip()):
+        return []
+    parsed_ops: List[ParsedInstruction] = []
+    for line in instruction_string.splitlines():
+        if not line.strip():
+            continue
+        m = DELETE_RANGE_PATTERN.match(line)
+        if m:
+            start, end = int(m.group(1)), int(m.group(2))
+            if start <= end:
+                parsed_ops.append(DeleteInstruction(line_start=start, line_end=end))
+            continue
+        m = DELETE_SINGLE_PATTERN.match(line)
+        if m:
+            parsed_ops.append(DeleteInstruction(line_start=int(m.group(1))))
+            continue
+        m = INSERT_PATTERN.match(line)
+        if m:
+            parsed_ops.append(InsertInstruction(line_before=int(m.group(1)), content=m.group(2)))
+    return parsed_ops
+
+
+def make_script(num_lines: int, insert_ratio: float = 0.9, seed: int = 0) -> str:
+    """An instruction script dominated by INSERT lines, like a large rewrite."""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(1, num_lines + 1):
+        if rng.random() < insert_ratio:
+            indent = " " * (4 * rng.randint(0, 3))
+            lines.append(f"INSERT {i}: {indent}result_{i} = transform(item_{i}, flag={rng.random() < 0.5})")
+        elif rng.random() < 0.5:
+            lines.append(f"DELETE {i}")
+        else:
+            lines.append(f"DELETE {i}-{i + rng.randint(0, 20)}")
+    return "\n".join(lines)
+
+
+def best_of(func, script: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(script)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parse_instructions throughput.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'lines':>10} {'impl':>8} {'time (s)':>10} {'lines/s':>12}")
+    for size in args.sizes:
+        script = make_script(size)
+        assert legacy_parse_instructions(script) == parse_instructions(script)
+        for name, func in (("cascade", legacy_parse_instructions), ("scanner", parse_instructions)):
+            elapsed = best_of(func, script, args.repeat)
+            print(f"{size:>10} {name:>8} {elapsed:>10.4f} {size / elapsed:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_piece_table.py
+"""
+Several successive injections into one large file, with undo history:
+
+    rebuild  -- `apply_instructions` per step, keeping every result for undo
+    pieces   -- `PieceTable.apply` per step; undo history is piece splices
+
+Reports the time per step, the time to undo every step and the memory
+retained by the history (tracemalloc). Text is only materialised by the
+piece table when the final result is checked.
+
+Run from the project root:
+    python -m benchmarks.bench_piece_table --lines 1000000 --steps 20
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from benchmarks.corpus import generate_instructions, generate_python_file
+from src.core.injector import apply_instructions
+from src.models.piece_table import PieceTable
+
+
+def run_rebuild(code, steps):
+    history = [code]
+    for instructions in steps:
+        history.append(apply_instructions(history[-1], instructions))
+    return history
+
+
+def run_pieces(code, steps):
+    table = PieceTable(code)
+    for instructions in steps:
+        table.apply(instructions)
+    return table
+
+
+def measure(func, *args, trace_memory: bool):
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    retained = 0
+    if trace_memory:
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, elapsed, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PieceTable against rebuilding the text per step.")
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--profile", default="sparse", help="Edit profile from benchmarks.corpus.")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the (slow) tracemalloc runs.")
+    args = parser.parse_args()
+
+    code = generate_python_file(args.lines)
+    # Every step keeps the line count within a few lines of the original, so
+    # generating each step against the original size keeps it in bounds.
+    steps = [generate_instructions(args.lines - 100, args.profile, seed=step) for step in range(args.steps)]
+
+    history, rebuild_time, _ = measure(run_rebuild, code, steps, trace_memory=False)
+    table, pieces_time, _ = measure(run_pieces, code, steps, trace_memory=False)
+    assert table.text == history[-1], "piece table and apply_instructions disagree"
+
+    start = time.perf_counter()
+    while table.undo():
+        pass
+    undo_time = time.perf_counter() - start
+
+    print(f"{args.lines} lines, {args.steps} steps ({args.profile}), {table.piece_count} pieces after undo")
+    print(f"{'impl':>8} {'per step (ms)':>14} {'undo all (ms)':>14} {'history (MiB)':>14}")
+    memory = {"rebuild": "-", "pieces": "-"}
+    if not args.no_memory:
+        del history, table
+        for name, func in (("rebuild", run_rebuild), ("pieces", run_pieces)):
+            result, _, retained = measure(func, code, steps, trace_memory=True)
+            memory[name] = f"{retained / 2**20:.1f}"
+            del result
+    print(f"{'rebuild':>8} {rebuild_time / args.steps * 1000:>14.2f} {'0 (kept)':>14} {memory['rebuild']:>14}")
+    print(f"{'pieces':>8} {pieces_time / args.steps * 1000:>14.2f} {undo_time * 1000:>14.2f} {memory['pieces']:>14}")
+
+
+if __name__ == "__main__":
+    main()
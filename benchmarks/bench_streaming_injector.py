@@ -0,0 +1,56 @@
+# benchmarks/bench_streaming_injector.py
+"""
+Peak Python heap of `apply_instructions_to_file` versus the in-memory
+read -> `apply_instructions` -> write path, as the input file grows.
+
+Run from the project root:
+    python -m benchmarks.bench_streaming_injector --sizes 10000 100000 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.bench_injector import make_case
+from src.core.injector import apply_instructions, apply_instructions_to_file
+from src.utils.file_operations import read_file, write_file
+
+
+def in_memory(original_path, instructions, output_path):
+    write_file(output_path, apply_instructions(read_file(original_path), instructions))
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming injector.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'lines':>10} {'impl':>10} {'time (s)':>10} {'peak (MiB)':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        original_path = os.path.join(tmp, "original.py")
+        for size in args.sizes:
+            code, instructions = make_case(size)
+            write_file(original_path, code)
+            del code
+            outputs = {}
+            for name, func in (("in-memory", in_memory), ("streaming", apply_instructions_to_file)):
+                outputs[name] = os.path.join(tmp, f"{name}.py")
+                elapsed, peak = measure(func, original_path, instructions, outputs[name])
+                print(f"{size:>10} {name:>10} {elapsed:>10.3f} {peak / 2**20:>11.2f}")
+            with open(outputs["in-memory"], "rb") as a, open(outputs["streaming"], "rb") as b:
+                assert a.read() == b.read(), "streaming output differs from apply_instructions"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/corpus.py
+"""
+Seeded generators for benchmark inputs: Python-looking source files and
+INSERT / DELETE scripts against them. The same (size, seed) always yields the
+same text, so timings from different runs are comparable.
+
+Edit profiles:
+    dense   -- a small edit every few lines
+    sparse  -- roughly one edit per thousand lines
+    ranged  -- a handful of large ranged deletes (half the file) plus inserts
+"""
+import random
+from typing import List, Tuple
+
+from src.core.differ import format_instructions
+from src.core.parser import DeleteInstruction, InsertInstruction, ParsedInstruction
+
+PROFILES = ("dense", "sparse", "ranged")
+
+_NAMES = ("value", "result", "items", "config", "buffer", "index", "total", "handler", "payload", "cache")
+_CALLS = ("compute", "load", "transform", "validate", "merge", "render", "fetch", "update")
+
+
+def _statement(rng: random.Random, indent: str, allow_comment: bool = True) -> str:
+    """One simple (non-block) statement, or a comment line."""
+    name, call = rng.choice(_NAMES), rng.choice(_CALLS)
+    kind = rng.random()
+    if kind < 0.55 or (not allow_comment and kind < 0.75):
+        return f"{indent}{name}_{rng.randrange(100)} = {call}({rng.choice(_NAMES)}, {rng.randrange(1000)})"
+    if kind < 0.75:
+        return f"{indent}# {call} the {name} before returning"
+    if kind < 0.9:
+        return f'{indent}logger.debug("{call} %s", {name})'
+    return f"{indent}{name} = {call}({name})"
+
+
+def _function(rng: random.Random, indent: str, method: bool, number: int) -> List[str]:
+    args = ("self, " if method else "") + rng.choice(_NAMES)
+    lines = [f"{indent}def {rng.choice(_CALLS)}_{number}({args}):"]
+    body = indent + "    "
+    if rng.random() < 0.4:
+        lines.append(f'{body}"""{rng.choice(_CALLS).title()} step {number}."""')
+    for _ in range(rng.randrange(2, 10)):
+        if rng.random() < 0.25:
+            header = f"if {rng.choice(_NAMES)} is None:" if rng.random() < 0.5 else f"for item in {rng.choice(_NAMES)}:"
+            lines.append(body + header)
+            lines.append(_statement(rng, body + "    ", allow_comment=False))
+            lines.extend(_statement(rng, body + "    ") for _ in range(rng.randrange(0, 3)))
+        else:
+            lines.append(_statement(rng, body))
+    lines.append(f"{body}return {rng.choice(_NAMES)}")
+    return lines
+
+
+def generate_python_file(num_lines: int, seed: int = 0) -> str:
+    """A module of exactly `num_lines` lines; valid Python unless the last block is cut short."""
+    rng = random.Random(seed)
+    lines: List[str] = ["import logging", "", "logger = logging.getLogger(__name__)"]
+    while len(lines) < num_lines:
+        lines += ["", ""]
+        if rng.random() < 0.3:
+            lines.append(f"class {rng.choice(_NAMES).title()}{len(lines)}:")
+            lines.append(f'    """Generated class {len(lines)}."""')
+            for _ in range(rng.randrange(1, 5)):
+                lines.append("")
+                lines += _function(rng, "    ", True, len(lines))
+        else:
+            lines += _function(rng, "", False, len(lines))
+    return "\n".join(lines[:num_lines])
+
+
+def generate_instructions(num_lines: int, profile: str, seed: int = 0) -> List[ParsedInstruction]:
+    """An edit script against a `num_lines`-line file, in the order a model would emit it."""
+    rng = random.Random(seed * 7919 + num_lines)
+    instructions: List[ParsedInstruction] = []
+    if profile == "ranged":
+        # Four deletes of ~1/8 of the file each, spread out, with a replacement line before each.
+        block = max(1, num_lines // 8)
+        for k in range(4):
+            start = 1 + k * num_lines // 4
+            end = min(num_lines, start + block - 1)
+            instructions.append(InsertInstruction(line_before=start, content=f"    # block {k} replaced"))
+            instructions.append(DeleteInstruction(line_start=start, line_end=end if end > start else None))
+        instructions.append(InsertInstruction(line_before=num_lines + 1, content="# end of generated module"))
+        return instructions
+
+    step = {"dense": 5, "sparse": 1000}[profile]
+    line = rng.randrange(1, step + 1)
+    while line <= num_lines:
+        op = rng.random()
+        content = _statement(rng, "        ")
+        if op < 0.4:
+            instructions.append(InsertInstruction(line_before=line, content=content))
+        elif op < 0.7:
+            instructions.append(DeleteInstruction(line_start=line))
+        else:
+            end = min(num_lines, line + rng.randrange(1, 4))
+            instructions.append(InsertInstruction(line_before=line, content=content))
+            instructions.append(DeleteInstruction(line_start=line, line_end=end if end > line else None))
+        line += rng.randrange(max(1, step // 2), step * 3 // 2 + 1)
+    return instructions
+
+
+def make_case(num_lines: int, profile: str, seed: int = 0) -> Tuple[str, List[ParsedInstruction], str]:
+    """(source, parsed instructions, instruction text) for one benchmark case."""
+    instructions = generate_instructions(num_lines, profile, seed)
+    return generate_python_file(num_lines, seed), instructions, format_instructions(instructions)
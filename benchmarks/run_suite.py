@@ -0,0 +1,193 @@
+# benchmarks/run_suite.py
+"""
+Regression benchmarks for the core text pipeline: `add_line_numbers`,
+`parse_instructions` and `apply_instructions` over seeded corpora
+(`benchmarks.corpus`) from 100 to 1M lines, for dense, sparse and ranged
+edit profiles. Runs offline; no API key needed.
+
+Each case reports the median of several timed repeats. With a baseline file
+present, a case is flagged (and the exit code is 1) only if it is slower than
+its baseline by more than --threshold percent *and* by more than --min-delta
+milliseconds, even after a re-run; the absolute floor keeps scheduler noise on
+sub-millisecond cases from failing the gate. Parse cases are only generated
+for scripts of at least MIN_PARSE_INSTRUCTIONS instructions: smaller ones
+(a ``NO CHANGES`` reply, the fixed-size ranged scripts) time little but call
+overhead.
+
+Timings also shift between processes (heap layout, CPU frequency), so one
+run is a poor baseline. Each --save adds the run's timings to the last
+BASELINE_SAMPLES per case and the baseline is their median: run --save a few
+times, in separate processes, to record one. Baselines are machine-specific;
+delete the file and re-record them on the machine that runs the comparison.
+
+Run from the project root:
+    python -m benchmarks.run_suite                      # compare against baselines.json
+    python -m benchmarks.run_suite --save               # add a baseline sample (run it a few times)
+    python -m benchmarks.run_suite --sizes 100 10000 --filter parse
+"""
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from benchmarks.corpus import PROFILES, generate_python_file, make_case
+from src.core.injector import apply_instructions
+from src.core.parser import parse_instructions
+from src.utils.code_utils import add_line_numbers
+
+BASELINE_PATH = Path(__file__).with_name("baselines.json")
+DEFAULT_SIZES = [100, 10_000, 100_000, 1_000_000]
+MIN_PARSE_INSTRUCTIONS = 20
+DEFAULT_THRESHOLD = 20.0  # percent
+DEFAULT_MIN_DELTA = 0.5e-3  # seconds
+BASELINE_SAMPLES = 5  # runs per case kept in the baseline file
+
+
+def iter_cases(sizes: List[int]) -> Iterator[Tuple[str, Callable[[], object]]]:
+    """(case name, zero-argument callable) for every benchmark case."""
+    for size in sizes:
+        code = generate_python_file(size)
+        yield f"add_line_numbers/{size}", lambda code=code: add_line_numbers(code)
+        for profile in PROFILES:
+            code, instructions, text = make_case(size, profile)
+            if len(instructions) >= MIN_PARSE_INSTRUCTIONS:
+                yield f"parse_instructions/{size}/{profile}", lambda text=text: parse_instructions(text)
+            yield (
+                f"apply_instructions/{size}/{profile}",
+                lambda code=code, instructions=instructions: apply_instructions(code, instructions),
+            )
+
+
+def time_case(func: Callable[[], object], min_time: float = 0.3, repeats: int = 7, batch_time: float = 0.005) -> float:
+    """
+    Median per-call wall time over at least `repeats` batches, repeated until
+    `min_time` has been spent. Fast cases are timed in batches of calls
+    lasting at least `batch_time`, like `timeit.Timer.autorange`; as in
+    `timeit`, the garbage collector is off while timing.
+    """
+    gc.collect()
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _time_batches(func, min_time, repeats, batch_time)
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _time_batches(func: Callable[[], object], min_time: float, repeats: int, batch_time: float) -> float:
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= batch_time:
+            break
+        loops *= 10 if elapsed < batch_time / 10 else 2
+    # The calibration batch is a warm-up; it is not one of the timed repeats.
+    timings: List[float] = []
+    spent = 0.0
+    while len(timings) < repeats or spent < min_time:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed / loops)
+        spent += elapsed
+    return statistics.median(timings)
+
+
+def compare(
+    results: Dict[str, float],
+    baseline: Dict[str, float],
+    threshold: float = DEFAULT_THRESHOLD,
+    min_delta: float = DEFAULT_MIN_DELTA,
+) -> List[str]:
+    """Names of cases more than `threshold` percent and more than `min_delta` seconds slower than their baseline."""
+    limit = 1 + threshold / 100
+    return [
+        name for name, seconds in results.items()
+        if name in baseline and seconds > baseline[name] * limit and seconds - baseline[name] > min_delta
+    ]
+
+
+def load_baseline(path: Path) -> Dict[str, float]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))["results"]
+
+
+def load_samples(path: Path) -> Dict[str, List[float]]:
+    if not path.exists():
+        return {}
+    data = json.loads(path.read_text(encoding="utf-8"))
+    # Files written before samples were kept hold one timing per case.
+    return data.get("samples") or {name: [seconds] for name, seconds in data["results"].items()}
+
+
+def save_baseline(path: Path, results: Dict[str, float]) -> None:
+    """Add `results` to the stored samples; each case's baseline is the median of its last BASELINE_SAMPLES."""
+    samples = load_samples(path)
+    for name, seconds in results.items():
+        samples[name] = (samples.get(name, []) + [seconds])[-BASELINE_SAMPLES:]
+    data = {
+        "machine": {"python": platform.python_version(), "platform": platform.platform()},
+        "results": {name: statistics.median(samples[name]) for name in sorted(samples)},
+        "samples": dict(sorted(samples.items())),
+    }
+    path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Core pipeline regression benchmarks.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this text.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown in percent.")
+    parser.add_argument(
+        "--min-delta", type=float, default=DEFAULT_MIN_DELTA * 1e3,
+        help="Slowdowns smaller than this many milliseconds are never flagged.",
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="Record the results as the new baseline.")
+    args = parser.parse_args(argv)
+
+    baseline = load_baseline(args.baseline)
+    min_delta = args.min_delta / 1e3
+    results: Dict[str, float] = {}
+    print(f"{'case':<40} {'time (ms)':>10} {'baseline':>10} {'change':>8}")
+    for name, func in iter_cases(args.sizes):
+        if args.filter not in name:
+            continue
+        seconds = time_case(func)
+        if compare({name: seconds}, baseline, args.threshold, min_delta):
+            # Re-time for longer before flagging, so one noisy measurement is not reported as a regression.
+            seconds = min(seconds, time_case(func, min_time=1.0))
+        results[name] = seconds
+        if name in baseline:
+            change = seconds / baseline[name] - 1
+            flag = "  SLOWER" if name in compare({name: seconds}, baseline, args.threshold, min_delta) else ""
+            print(f"{name:<40} {seconds * 1e3:>10.3f} {baseline[name] * 1e3:>10.3f} {change:>+8.1%}{flag}")
+        else:
+            print(f"{name:<40} {seconds * 1e3:>10.3f} {'-':>10} {'-':>8}")
+
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    regressions = compare(results, baseline, args.threshold, min_delta)
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than baseline by more than {args.threshold:g}% "
+              f"and {args.min_delta:g} ms: "
+              + ", ".join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
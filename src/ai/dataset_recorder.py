@@ -0,0 +1,198 @@
+"""
+DatasetRecorder
+===============
+
+Background recorder of (original, suggestion, raw instructions, final code)
+tuples, the raw material for fine-tuning datasets.
+
+`record` only puts a tuple on a queue, so callers on the processing path pay
+microseconds. A daemon thread hashes each record (SHA-256 of its content),
+drops duplicates, including ones written by earlier sessions, and appends the
+rest as JSON lines to gzip shards under ``<data_dir>/dataset``. It starts a
+new shard once the current one reaches the size budget. The shard is
+sync-flushed whenever the queue runs dry, so a crash loses at most the
+records still queued. `close`, also registered with `atexit`, writes the
+remaining records and the gzip trailer.
+"""
+from __future__ import annotations
+
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Set
+
+_STOP = object()
+
+# Fields hashed for deduplication, in order
+_CONTENT_FIELDS = ("original", "suggestion", "raw_instructions", "final_code", "label")
+
+
+def content_hash(record: Dict[str, Any]) -> str:
+    """SHA-256 of a record's content fields; parts are length-prefixed so they cannot run together."""
+    digest = hashlib.sha256()
+    for name in _CONTENT_FIELDS:
+        data = (record.get(name) or "").encode("utf-8")
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def iter_records(directory: Path | str) -> Iterator[Dict[str, Any]]:
+    """Every record in the shards under `directory`, oldest shard first; truncated tails are skipped."""
+    for path in sorted(Path(directory).glob("*.jsonl.gz")):
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as shard:
+                for line in shard:
+                    if line.endswith("\n"):
+                        yield json.loads(line)
+        except (EOFError, OSError, zlib.error):  # a shard whose writer did not close it
+            continue
+
+
+class DatasetRecorder:
+    """Queue + writer thread producing deduplicated, size-rotated gzip JSONL shards."""
+
+    DIRNAME = "dataset"
+
+    def __init__(self, directory: Path | str, max_shard_bytes: int = 16 * 1024 * 1024) -> None:
+        self.directory = Path(directory)
+        self.max_shard_bytes = max_shard_bytes
+        self.written = 0
+        self.duplicates = 0
+        self.errors = 0
+
+        self._queue: queue.Queue = queue.Queue()
+        self._seen: Set[str] = set()
+        self._raw = None  # the current shard's file, for its compressed size
+        self._shard: Optional[gzip.GzipFile] = None
+        self._unflushed = 0  # bytes written to the shard since its last sync flush
+        self._shard_index = 0
+        self._session = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="dataset-recorder", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @classmethod
+    def from_settings(cls, settings) -> "DatasetRecorder":
+        return cls(
+            Path(settings.data_dir) / cls.DIRNAME,
+            max_shard_bytes=settings.dataset_shard_max_bytes,
+        )
+
+    # ------------------------------------------------------------------ #
+    def record(
+        self,
+        original: str,
+        suggestion: str,
+        raw_instructions: str,
+        final_code: str,
+        label: Optional[str] = None,
+        source: Optional[str] = None,
+    ) -> None:
+        """Queue one record; never blocks on disk. Ignored after `close`."""
+        if self._closed:
+            return
+        self._queue.put((original, suggestion, raw_instructions, final_code, label, source, time.time()))
+
+    def flush(self) -> None:
+        """Block until everything recorded so far has been written (and sync-flushed)."""
+        if not self._closed:
+            self._queue.join()
+
+    def close(self) -> None:
+        """Write what is queued, finish the current shard and stop the thread. Idempotent."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        atexit.unregister(self.close)
+
+    # ------------------------------------------------------------------ #
+    # Writer thread
+    # ------------------------------------------------------------------ #
+    def _run(self) -> None:
+        self._load_seen()
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    self._close_shard()
+                    return
+                self._write(item)
+                if self._queue.empty():
+                    self._sync()  # readable up to here even if we crash
+            except Exception:  # noqa: BLE001 - a bad disk must not take the app down with it
+                self.errors += 1
+            finally:
+                self._queue.task_done()
+
+    def _load_seen(self) -> None:
+        try:
+            for record in iter_records(self.directory):
+                self._seen.add(record.get("id") or content_hash(record))
+        except Exception:  # noqa: BLE001 - e.g. a corrupt shard; dedup then only covers this session
+            self.errors += 1
+
+    def _write(self, item: tuple) -> None:
+        original, suggestion, raw_instructions, final_code, label, source, created = item
+        record = {
+            "original": original,
+            "suggestion": suggestion,
+            "raw_instructions": raw_instructions,
+            "final_code": final_code,
+            "label": label,
+        }
+        key = content_hash(record)
+        if key in self._seen:
+            self.duplicates += 1
+            return
+        record.update(id=key, source=source, created=created)
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        # zlib holds back output, so the file size is only accurate after a sync flush;
+        # flushing every 1/8 of the budget keeps shards within ~1/8 of it.
+        if self._unflushed >= self.max_shard_bytes // 8:
+            self._sync()
+        if self._shard is not None and self._raw.tell() >= self.max_shard_bytes:
+            self._close_shard()
+        if self._shard is None:
+            self._open_shard()
+        self._shard.write(line)
+        self._unflushed += len(line)
+        self._seen.add(key)
+        self.written += 1
+
+    def _sync(self) -> None:
+        if self._shard is not None and self._unflushed:
+            self._shard.flush(zlib.Z_SYNC_FLUSH)
+            self._unflushed = 0
+
+    def _open_shard(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        while True:  # another recorder may have started in the same second
+            self._shard_index += 1
+            path = self.directory / f"records-{self._session}-{self._shard_index:04d}.jsonl.gz"
+            try:
+                self._raw = open(path, "xb")
+                break
+            except FileExistsError:
+                continue
+        self._shard = gzip.GzipFile(filename="", mode="wb", fileobj=self._raw)
+        self._unflushed = 0
+
+    def _close_shard(self) -> None:
+        if self._shard is not None:
+            self._shard.close()
+            self._raw.close()
+            self._shard = self._raw = None
+            self._unflushed = 0
@@ -0,0 +1,391 @@
+# src/ai/indentation_model.py
+"""
+Indentation repair after injection.
+
+Inserted lines keep whatever indentation the model gave them, which is often
+relative to the snippet rather than to the file. `fix_indentation` re-indents
+each run of inserted lines from the block structure around it (found with
+`tokenize`) and the file's indent unit, then checks the result with
+`compile`. Only when that fails is the optional model fallback
+(`ModelIndentationFixer`, configured by ``indentation_model_name``) asked to
+fix the file, so the common case costs no network round-trip.
+"""
+from __future__ import annotations
+
+import io
+import re
+import tokenize
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Literal, Optional, Sequence, Set, Tuple
+
+from src.core.injector import map_line_changes
+from src.core.parser import ParsedInstruction
+
+DEFAULT_INDENT = "    "
+_LEADING_WS = re.compile(r"[ \t]*")
+
+_SYSTEM_PROMPT = (
+    "You fix the indentation of Python code. Reply ONLY with the complete corrected file, "
+    "changing nothing but leading whitespace."
+)
+
+
+@dataclass
+class IndentationResult:
+    code: str
+    source: Literal["unchanged", "rules", "model"] = "unchanged"
+    valid: bool = True  # `code` compiles
+    changed_lines: List[int] = field(default_factory=list)  # 1-indexed lines re-indented by the rules
+    error: Optional[str] = None  # an ``ERROR: …`` string when no valid code could be produced
+
+
+@dataclass
+class _Logical:
+    """A logical line of the unchanged context: its indentation and whether it ends with ':'."""
+
+    lead: str
+    opens_block: bool
+    levels: List[str]  # indentation of the enclosing blocks and of this line, outermost first
+
+
+# --------------------------------------------------------------------------- #
+# Helpers
+# --------------------------------------------------------------------------- #
+def _lead(line: str) -> str:
+    return _LEADING_WS.match(line).group()
+
+
+def _width(lead: str) -> int:
+    return len(lead.expandtabs(8))
+
+
+def _is_code(line: str) -> bool:
+    stripped = line.strip()
+    return bool(stripped) and not stripped.startswith("#")
+
+
+def compiles(code: str) -> bool:
+    """Whether `code` is syntactically valid Python."""
+    try:
+        compile(code, "<indentation>", "exec", dont_inherit=True)
+    except (SyntaxError, ValueError):
+        return False
+    return True
+
+
+def _indent_step(widths: Iterable[int], previous: int = 0) -> Optional[int]:
+    """The most common increase between consecutive indentation widths, if any."""
+    steps: Counter = Counter()
+    for width in widths:
+        if width > previous:
+            steps[width - previous] += 1
+        previous = width
+    return steps.most_common(1)[0][0] if steps else None
+
+
+def detect_indent_unit(lines: Sequence[str]) -> str:
+    """The file's indent step: a tab, or the most common increase in leading spaces."""
+    leads = [_lead(line) for line in lines if _is_code(line)]
+    tab_lines = sum(1 for lead in leads if lead.startswith("\t"))
+    if tab_lines > sum(1 for lead in leads if lead.startswith(" ")):
+        return "\t"
+    step = _indent_step(len(lead) for lead in leads if not lead.startswith("\t"))
+    return " " * step if step else DEFAULT_INDENT
+
+
+@dataclass
+class _Scan:
+    """Line structure of a block of code; rows are 0-indexed."""
+
+    starts: List[Tuple[int, bool]]  # (row, ends with ':') of each logical line
+    comments: List[int] = field(default_factory=list)  # rows holding only a comment
+    in_string: Set[int] = field(default_factory=set)  # rows inside a multi-line string
+
+
+def _scan(lines: Sequence[str]) -> Optional[_Scan]:
+    """
+    Find the logical lines and comment-only lines with `tokenize`; None if
+    the lines don't tokenize (e.g. an unclosed bracket). Leading whitespace
+    is stripped first: only bracket / string / backslash structure matters
+    here, and it keeps `tokenize` from rejecting inconsistent indentation.
+    """
+    text = "".join(line.lstrip(" \t") + "\n" for line in lines)
+    scan = _Scan([])
+    start: Optional[int] = None
+    last_op = ""
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(text).readline):
+            if token.type == tokenize.COMMENT and token.start[1] == 0:
+                scan.comments.append(token.start[0] - 1)
+                continue
+            if token.type == tokenize.STRING and token.end[0] > token.start[0]:
+                scan.in_string.update(range(token.start[0], token.end[0]))
+            if token.type in (tokenize.NL, tokenize.COMMENT, tokenize.INDENT, tokenize.DEDENT):
+                continue
+            if token.type in (tokenize.NEWLINE, tokenize.ENDMARKER):
+                if start is not None:
+                    scan.starts.append((start, last_op == ":"))
+                    start = None
+                continue
+            if start is None:
+                start = token.start[0] - 1
+            last_op = token.string if token.type == tokenize.OP else ""
+    except (tokenize.TokenError, SyntaxError):
+        return None
+    return scan
+
+
+def _heuristic_scan(lines: Sequence[str]) -> _Scan:
+    """Every code line is a logical line; good enough when `tokenize` gives up."""
+    starts = [
+        (row, line.split("#", 1)[0].rstrip().endswith(":"))
+        for row, line in enumerate(lines)
+        if _is_code(line)
+    ]
+    return _Scan(starts, [row for row, line in enumerate(lines) if line.lstrip().startswith("#")])
+
+
+def _context_structure(lines: Sequence[str]) -> List[Optional[_Logical]]:
+    """For each row, the `_Logical` starting there (None for blank, comment and continuation rows)."""
+    starts = (_scan(lines) or _heuristic_scan(lines)).starts
+    structure: List[Optional[_Logical]] = [None] * len(lines)
+    stack: List[str] = []
+    for row, opens_block in starts:
+        lead = _lead(lines[row])
+        width = _width(lead)
+        while stack and _width(stack[-1]) > width:
+            stack.pop()
+        if not stack or _width(stack[-1]) != width:
+            stack.append(lead)
+        structure[row] = _Logical(lead, opens_block, list(stack))
+    return structure
+
+
+def _shift(line: str, delta: int) -> str:
+    """Move `line` right (or left, as far as its indentation allows) by `delta` columns."""
+    lead = _lead(line)
+    if delta >= 0:
+        return " " * delta + line
+    return " " * max(0, _width(lead) + delta) + line[len(lead):]
+
+
+# --------------------------------------------------------------------------- #
+# Rule-based repair
+# --------------------------------------------------------------------------- #
+def _reindent_run(
+    run: List[str],
+    previous: Optional[_Logical],
+    following: Optional[_Logical],
+    unit: str,
+) -> List[str]:
+    """Re-indent one run of inserted lines to fit between its context lines."""
+    scan = _scan(run) or _heuristic_scan(run)
+    if not scan.starts:
+        return run
+    opens = dict(scan.starts)
+    first_row, last_row = scan.starts[0][0], scan.starts[-1][0]
+    own = _width(_lead(run[first_row]))
+    run_unit = _indent_step([_width(_lead(run[row])) for row in opens], own) or _width(unit)
+    depths = {row: round((_width(_lead(run[row])) - own) / run_unit) for row in opens}
+    # A comment line is indented like the code line after it (or before it, at the end).
+    start_rows = [row for row, _ in scan.starts]
+    for row in scan.comments:
+        index = bisect_left(start_rows, row)
+        depths[row] = depths[start_rows[index] if index < len(start_rows) else last_row]
+
+    levels = list(previous.levels) if previous else [""]
+    if previous and previous.opens_block:
+        levels.append(previous.lead + unit)
+        candidates = [len(levels) - 1]  # the run is (the start of) the new block's body
+    else:
+        candidates = list(range(len(levels)))
+
+    def lead_at(base: int, depth: int) -> str:
+        if depth <= 0:
+            return levels[max(0, base + depth)]
+        return levels[base] + unit * depth
+
+    def fits(base: int) -> bool:
+        if following is None:
+            return True
+        if opens[last_row]:  # the run ends by opening a block; `following` must be its body
+            return _width(following.lead) > _width(lead_at(base, depths[last_row]))
+        # Otherwise the run must not capture `following` in a block of its own.
+        return _width(levels[base]) >= _width(following.lead)
+
+    base = min(
+        candidates,
+        key=lambda index: (not fits(index), abs(_width(levels[index]) - own), -index),
+    )
+
+    fixed: List[str] = []
+    delta = 0  # columns the current logical line moved by; its continuation rows move the same
+    for row, line in enumerate(run):
+        old_lead = _lead(line)
+        if row in depths:
+            new_lead = lead_at(base, depths[row])
+            delta = _width(new_lead) - _width(old_lead)
+            fixed.append(new_lead + line[len(old_lead):])
+        elif row > first_row and line.strip() and row not in scan.in_string:
+            fixed.append(_shift(line, delta))
+        else:
+            fixed.append(line)
+    return fixed
+
+
+def reindent_inserted(lines: List[str], inserted: Iterable[Tuple[int, int]]) -> Tuple[List[str], List[int]]:
+    """
+    Re-indent the inserted line ranges (1-indexed, inclusive, as in
+    `LineChanges.inserted`) of `lines`. Returns the new lines and the
+    1-indexed rows whose text changed.
+    """
+    ranges = sorted((start, end) for start, end in inserted if start <= end)
+    inserted_rows = {row for start, end in ranges for row in range(start - 1, min(end, len(lines)))}
+    context_rows = [row for row in range(len(lines)) if row not in inserted_rows]
+    context = [lines[row] for row in context_rows]
+    structure = _context_structure(context)
+    unit = detect_indent_unit(context) if any(_is_code(line) for line in context) \
+        else detect_indent_unit(lines)
+
+    # Context indices of the logical lines, to find the ones around each inserted run.
+    logical_rows = [index for index, item in enumerate(structure) if item is not None]
+
+    result = list(lines)
+    changed: List[int] = []
+    row = 0
+    while row < len(lines):
+        if row not in inserted_rows:
+            row += 1
+            continue
+        end = row
+        while end < len(lines) and end in inserted_rows:
+            end += 1
+        # Context rows before the run, i.e. the context index of the first row after it.
+        after = bisect_left(context_rows, end)
+        split = bisect_left(logical_rows, after)
+        previous = structure[logical_rows[split - 1]] if split else None
+        following = structure[logical_rows[split]] if split < len(logical_rows) else None
+        fixed = _reindent_run(lines[row:end], previous, following, unit)
+        for offset, text in enumerate(fixed):
+            if text != lines[row + offset]:
+                result[row + offset] = text
+                changed.append(row + offset + 1)
+        row = end
+    return result, changed
+
+
+def fix_indentation(
+    code: str,
+    inserted: Iterable[Tuple[int, int]],
+    fallback: Optional[Callable[[str], str]] = None,
+) -> IndentationResult:
+    """
+    Re-indent the `inserted` line ranges of `code` (1-indexed, inclusive) and
+    check that the result compiles. `fallback` (code -> code) is called only
+    when the rules don't produce valid code; code that already compiled is
+    never made invalid.
+    """
+    lines = code.splitlines()
+    fixed, changed = reindent_inserted(lines, inserted)
+    if changed:
+        candidate = "\n".join(fixed) + ("\n" if code.endswith(("\n", "\r")) else "")
+        if compiles(candidate):
+            return IndentationResult(candidate, source="rules", changed_lines=changed)
+    if compiles(code):
+        return IndentationResult(code)
+    if fallback is not None:
+        repaired = _ask_fallback(code, fallback)
+        if repaired is not None:
+            return repaired
+    return IndentationResult(
+        code, valid=False, error="ERROR: could not repair the indentation of the inserted lines."
+    )
+
+
+def repair_injected(
+    original_code: str,
+    modified_code: str,
+    instructions: List[ParsedInstruction],
+    fallback: Optional[Callable[[str], str]] = None,
+) -> IndentationResult:
+    """
+    `fix_indentation` for the lines `instructions` inserted into
+    `original_code`. The fallback is only asked about files that were valid
+    Python before the injection.
+    """
+    changes = map_line_changes(len(original_code.splitlines()), instructions)
+    if not changes.inserted:
+        return IndentationResult(modified_code, valid=compiles(modified_code))
+    result = fix_indentation(modified_code, changes.inserted)
+    if not result.valid and fallback is not None and compiles(original_code):
+        result = _ask_fallback(modified_code, fallback) or result
+    return result
+
+
+def _ask_fallback(code: str, fallback: Callable[[str], str]) -> Optional[IndentationResult]:
+    repaired = fallback(code)
+    if not repaired or repaired.startswith("ERROR:"):
+        return None
+    # Only indentation may change: a reply that adds, drops or rewrites lines is
+    # not a repair of this code, however well it compiles.
+    lines, repaired_lines = code.splitlines(), repaired.splitlines()
+    if len(lines) != len(repaired_lines) or any(
+        line.lstrip() != repaired_line.lstrip() for line, repaired_line in zip(lines, repaired_lines)
+    ):
+        return None
+    if compiles(repaired):
+        return IndentationResult(repaired, source="model")
+    return None
+
+
+# --------------------------------------------------------------------------- #
+# Model fallback
+# --------------------------------------------------------------------------- #
+class ModelIndentationFixer:
+    """
+    Asks ``indentation_model_name`` (through the OpenAI-compatible client) to
+    fix a file's indentation. Settings and the client are loaded on the first
+    call; without a configured model the code is returned unchanged.
+    """
+
+    def __init__(self) -> None:
+        self._client = None
+        self._model_name: Optional[str] = None
+
+    def __call__(self, code: str) -> str:
+        try:
+            if self._client is None:
+                import openai
+                from src.config.settings import get_settings
+
+                settings = get_settings()
+                self._model_name = settings.indentation_model_name
+                if not self._model_name:
+                    return code
+                self._client = openai.OpenAI(
+                    api_key=settings.openai_api_key,
+                    timeout=settings.timeout_seconds,
+                    base_url=settings.openai_base_url,
+                )
+            completion = self._client.chat.completions.create(
+                model=self._model_name,
+                temperature=0.0,
+                messages=[
+                    {"role": "system", "content": _SYSTEM_PROMPT},
+                    {"role": "user", "content": code},
+                ],
+            )
+            content = completion.choices[0].message.content or ""
+            return _strip_fence(content)
+        except Exception as exc:  # noqa: BLE001
+            return f"ERROR: indentation model failed – {exc}"
+
+
+def _strip_fence(content: str) -> str:
+    """Drop a surrounding ```python fence, which models add despite instructions."""
+    stripped = content.strip("\n")
+    if stripped.startswith("```") and stripped.endswith("```"):
+        return stripped.split("\n", 1)[1].rsplit("\n", 1)[0] if "\n" in stripped else ""
+    return content
@@ -1,4 +1,3 @@
-# src/ai/reasoning_agent.py
 """
 ReasoningAgent
 ==============
@@ -8,15 +7,24 @@ into an *AI-generated suggestion* using an OpenAI chat model.
 """
 from __future__ import annotations
 
+import asyncio
+import sqlite3
 import textwrap          # ← NEW: required for _build_prompt
+import time
+from dataclasses import dataclass, field
 from functools import lru_cache
-from typing import Final
+from typing import AsyncIterator, Final, Iterable, Iterator, Optional
 
 import openai
 from openai import APIError, APIConnectionError, APITimeoutError
 
+from src.ai.response_cache import ResponseCache
 from src.config.settings import get_settings
-from src.utils.code_utils import add_line_numbers
+from src.core.differ import changed_hunks, match_lines
+from src.core.parser import InstructionStreamParser, ParsedInstruction
+from src.models.document import split_lines
+from src.utils.code_utils import add_line_numbers, add_line_numbers_to_list
+from src.utils.tracing import span
 
 _SYSTEM_PROMPT: Final[str] = (
     "You are a precise code-transformation instruction generator. "
@@ -24,10 +32,48 @@ _SYSTEM_PROMPT: Final[str] = (
 )
 
 
+@dataclass
+class CompletionMetrics:
+    """Timings for one streamed completion, in seconds from the start of the request."""
+
+    started_at: float = field(default_factory=time.perf_counter)
+    time_to_first_token: Optional[float] = None
+    time_to_first_instruction: Optional[float] = None
+    total_duration: Optional[float] = None
+    chunks: int = 0
+    characters: int = 0
+    error: Optional[str] = None
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+
+@dataclass
+class PromptStats:
+    """Size of the prompt actually sent versus the full two-file prompt."""
+
+    mode: str
+    full_chars: int
+    sent_chars: int
+    hunks: int = 0
+
+    @property
+    def reduction(self) -> float:
+        """Fraction of the full prompt saved, 0.0 for a full prompt."""
+        return 1 - self.sent_chars / self.full_chars if self.full_chars else 0.0
+
+
+@dataclass
+class _PreparedRequest:
+    messages: list[dict[str, str]]
+    cache_key: str
+    stats: PromptStats
+
+
 class ReasoningAgent:
     """Wrapper around an OpenAI chat model that returns merge instructions."""
 
-    def __init__(self) -> None:
+    def __init__(self, cache: ResponseCache | None = None) -> None:
         settings = get_settings()
         if not settings.openai_api_key:
             raise ValueError("OpenAI API key not configured in settings.")
@@ -35,38 +81,380 @@ class ReasoningAgent:
         self._client = openai.OpenAI(
             api_key=settings.openai_api_key,
             timeout=settings.timeout_seconds,
+            base_url=settings.openai_base_url,
         )
         self._model_name: str = settings.openai_model
+        self._prompt_mode: str = settings.prompt_mode
+        self._hunk_context_lines: int = settings.hunk_context_lines
+        self.last_metrics: Optional[CompletionMetrics] = None
+        self.last_prompt_stats: Optional[PromptStats] = None
+
+        if cache is None and settings.response_cache_enabled:
+            cache = _open_cache(settings)
+        self.cache: ResponseCache | None = cache
 
     # ------------------------------------------------------------------ #
     def get_instructions(self, original_code: str, ai_suggestion: str) -> str:
         """Return the LLM’s merge instructions—or an ``ERROR: …`` string."""
-        numbered_orig = add_line_numbers(original_code)
-        numbered_sugg = add_line_numbers(ai_suggestion)
-        prompt = _build_prompt(numbered_orig, numbered_sugg)
+        try:
+            request = self._prepare(original_code, ai_suggestion)
+            messages, cache_key = request.messages, request.cache_key
+            cached = _cache_lookup(self.cache, cache_key)
+            if cached is not None:
+                return cached
+            with span("api_call", model=self._model_name, prompt_chars=_prompt_chars(messages)) as s:
+                completion = self._client.chat.completions.create(
+                    model=self._model_name,
+                    temperature=0.0,
+                    messages=messages,
+                )
+                content = (completion.choices[0].message.content or "").strip()
+                s.set(response_chars=len(content))
+            if not content:
+                return "ERROR: AI returned empty content."
+            _cache_store(self.cache, cache_key, content)
+            return content
+        except Exception as exc:  # noqa: BLE001
+            return _describe_error(exc)
 
+    # ------------------------------------------------------------------ #
+    def stream_instructions(self, original_code: str, ai_suggestion: str) -> Iterator[str]:
+        """
+        Stream the LLM’s merge instructions as raw text chunks.
+
+        Failures are yielded as an ``ERROR: …`` chunk (on its own line if
+        text was already streamed). Timings are recorded in `last_metrics`.
+        """
+        metrics = self.last_metrics = CompletionMetrics()
+        stream = None
+        received: list[str] = []
         try:
-            completion = self._client.chat.completions.create(
+            request = self._prepare(original_code, ai_suggestion)
+            messages, cache_key = request.messages, request.cache_key
+            cached = _cache_lookup(self.cache, cache_key)
+            if cached is not None:
+                metrics.time_to_first_token = metrics.elapsed()
+                metrics.chunks, metrics.characters = 1, len(cached)
+                yield cached
+                return
+            stream = self._client.chat.completions.create(
                 model=self._model_name,
                 temperature=0.0,
-                messages=[
-                    {"role": "system", "content": _SYSTEM_PROMPT},
-                    {"role": "user", "content": prompt},
-                ],
+                messages=messages,
+                stream=True,
             )
-            content = completion.choices[0].message.content or ""
-            return content.strip() or "ERROR: AI returned empty content."
-        except APITimeoutError:
-            return "ERROR: request to OpenAI timed out."
-        except APIConnectionError as exc:
-            return f"ERROR: failed to connect to OpenAI – {exc}"
-        except APIError as exc:
-            return f"ERROR: OpenAI API error – {exc}"
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if not text:
+                    continue
+                if metrics.time_to_first_token is None:
+                    metrics.time_to_first_token = metrics.elapsed()
+                metrics.chunks += 1
+                metrics.characters += len(text)
+                received.append(text)
+                yield text
+            content = "".join(received).strip()
+            if content:
+                _cache_store(self.cache, cache_key, content)
+            else:
+                metrics.error = "ERROR: AI returned empty content."
+                yield metrics.error
         except Exception as exc:  # noqa: BLE001
-            return f"ERROR: unexpected exception – {exc}"
+            metrics.error = _describe_error(exc)
+            yield ("\n" if metrics.characters else "") + metrics.error
+        finally:
+            # Also runs when the caller abandons the generator early, which
+            # closes the underlying HTTP response.
+            if stream is not None and hasattr(stream, "close"):
+                stream.close()
+            metrics.total_duration = metrics.elapsed()
+
+    def stream_parsed_instructions(self, original_code: str, ai_suggestion: str) -> Iterator[ParsedInstruction]:
+        """
+        Stream parsed instructions, each yielded as soon as its line arrives.
+
+        Yields nothing for ``NO CHANGES`` or an error reply; in the latter case
+        `last_metrics.error` holds the reason.
+        """
+        parser = InstructionStreamParser()
+        chunks = self.stream_instructions(original_code, ai_suggestion)
+        try:
+            for text in chunks:
+                yield from self._record_first_instruction(parser.feed(text))
+            yield from self._record_first_instruction(parser.close())
+            if parser.is_error and self.last_metrics.error is None:
+                self.last_metrics.error = "ERROR: AI reported an error."
+        finally:
+            chunks.close()
+
+    def _prepare(self, original_code: str, ai_suggestion: str) -> _PreparedRequest:
+        request = _prepare_request(
+            self._model_name, original_code, ai_suggestion, self._prompt_mode, self._hunk_context_lines
+        )
+        self.last_prompt_stats = request.stats
+        return request
+
+    def _record_first_instruction(self, instructions: list[ParsedInstruction]) -> Iterator[ParsedInstruction]:
+        if instructions and self.last_metrics.time_to_first_instruction is None:
+            self.last_metrics.time_to_first_instruction = self.last_metrics.elapsed()
+        yield from instructions
+
+
+class AsyncReasoningAgent:
+    """
+    asyncio counterpart of `ReasoningAgent` for batch jobs.
+
+    All requests go through one `openai.AsyncOpenAI` client, i.e. one pooled
+    HTTP connection pool, and at most `max_concurrency` are in flight at once
+    (``AppSettings.max_concurrent_requests`` by default).
+    """
+
+    def __init__(self, cache: ResponseCache | None = None, max_concurrency: int | None = None) -> None:
+        settings = get_settings()
+        if not settings.openai_api_key:
+            raise ValueError("OpenAI API key not configured in settings.")
+
+        self._client = openai.AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            timeout=settings.timeout_seconds,
+            base_url=settings.openai_base_url,
+        )
+        self._model_name: str = settings.openai_model
+        self._prompt_mode: str = settings.prompt_mode
+        self._hunk_context_lines: int = settings.hunk_context_lines
+        self.last_prompt_stats: Optional[PromptStats] = None
+        self.last_metrics: Optional[CompletionMetrics] = None
+        self.max_concurrency: int = max_concurrency or settings.max_concurrent_requests
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        if cache is None and settings.response_cache_enabled:
+            cache = _open_cache(settings)
+        self.cache: ResponseCache | None = cache
+
+    async def __aenter__(self) -> "AsyncReasoningAgent":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP connection pool."""
+        await self._client.close()
+
+    # ------------------------------------------------------------------ #
+    async def get_instructions(self, original_code: str, ai_suggestion: str) -> str:
+        """Return the LLM’s merge instructions—or an ``ERROR: …`` string."""
+        try:
+            request = self._prepare(original_code, ai_suggestion)
+            messages, cache_key = request.messages, request.cache_key
+            cached = _cache_lookup(self.cache, cache_key)
+            if cached is not None:
+                return cached
+            async with self._semaphore:
+                with span("api_call", model=self._model_name, prompt_chars=_prompt_chars(messages)) as s:
+                    completion = await self._client.chat.completions.create(
+                        model=self._model_name,
+                        temperature=0.0,
+                        messages=messages,
+                    )
+                    content = (completion.choices[0].message.content or "").strip()
+                    s.set(response_chars=len(content))
+            if not content:
+                return "ERROR: AI returned empty content."
+            _cache_store(self.cache, cache_key, content)
+            return content
+        except Exception as exc:  # noqa: BLE001
+            return _describe_error(exc)
+
+    async def stream_instructions(self, original_code: str, ai_suggestion: str) -> AsyncIterator[str]:
+        """
+        Async counterpart of `ReasoningAgent.stream_instructions`.
+
+        Cancelling the consuming task aborts the HTTP request immediately,
+        even before the first token, which the blocking client cannot do.
+        """
+        metrics = self.last_metrics = CompletionMetrics()
+        stream = None
+        received: list[str] = []
+        try:
+            request = self._prepare(original_code, ai_suggestion)
+            cached = _cache_lookup(self.cache, request.cache_key)
+            if cached is not None:
+                metrics.time_to_first_token = metrics.elapsed()
+                metrics.chunks, metrics.characters = 1, len(cached)
+                yield cached
+                return
+            async with self._semaphore:
+                stream = await self._client.chat.completions.create(
+                    model=self._model_name,
+                    temperature=0.0,
+                    messages=request.messages,
+                    stream=True,
+                )
+                async for chunk in stream:
+                    if not chunk.choices or not chunk.choices[0].delta.content:
+                        continue
+                    text = chunk.choices[0].delta.content
+                    if metrics.time_to_first_token is None:
+                        metrics.time_to_first_token = metrics.elapsed()
+                    metrics.chunks += 1
+                    metrics.characters += len(text)
+                    received.append(text)
+                    yield text
+            content = "".join(received).strip()
+            if content:
+                _cache_store(self.cache, request.cache_key, content)
+            else:
+                metrics.error = "ERROR: AI returned empty content."
+                yield metrics.error
+        except Exception as exc:  # noqa: BLE001
+            metrics.error = _describe_error(exc)
+            yield ("\n" if metrics.characters else "") + metrics.error
+        finally:
+            if stream is not None:
+                await stream.close()
+            metrics.total_duration = metrics.elapsed()
+
+    def _prepare(self, original_code: str, ai_suggestion: str) -> _PreparedRequest:
+        request = _prepare_request(
+            self._model_name, original_code, ai_suggestion, self._prompt_mode, self._hunk_context_lines
+        )
+        self.last_prompt_stats = request.stats
+        return request
+
+    async def get_instructions_many(self, pairs: Iterable[tuple[str, str]]) -> list[str]:
+        """Run `get_instructions` for every (original, suggestion) pair; results keep input order."""
+        return list(await asyncio.gather(*(self.get_instructions(o, s) for o, s in pairs)))
 
 
 # ---------------------------------------------------------------------- #
+def _prepare_request(
+    model: str,
+    original_code: str,
+    ai_suggestion: str,
+    prompt_mode: str = "full",
+    context_lines: int = 3,
+) -> _PreparedRequest:
+    """Build the chat messages, response-cache key and prompt-size stats for one request."""
+    # `Document`s (from the CLI, server and UI) reuse their cached lines and numbered
+    # views; plain strings are split where needed rather than copied into a document.
+    with span("add_line_numbers", input_chars=len(original_code) + len(ai_suggestion)) as s:
+        numbered_orig = add_line_numbers(original_code)
+        numbered_sugg = add_line_numbers(ai_suggestion)
+        s.set(output_chars=len(numbered_orig) + len(numbered_sugg))
+    full_chars = _full_prompt_chars(numbered_orig, numbered_sugg)
+    stats = PromptStats(mode="full", full_chars=full_chars, sent_chars=full_chars)
+    prompt: Optional[str] = None
+    variant = ""
+
+    if prompt_mode == "hunks":
+        with span("build_hunk_prompt") as s:
+            original_lines, suggestion_lines = split_lines(original_code), split_lines(ai_suggestion)
+            hunks = changed_hunks(
+                original_lines, suggestion_lines, match_lines(original_lines, suggestion_lines), context_lines
+            )
+            if hunks:
+                hunk_prompt = _build_hunk_prompt(original_lines, suggestion_lines, hunks)
+                # Only worth it if the hunks are actually smaller than the whole files.
+                if len(hunk_prompt) < full_chars:
+                    prompt = hunk_prompt
+                    stats = PromptStats(mode="hunks", full_chars=full_chars, sent_chars=len(prompt), hunks=len(hunks))
+                    variant = f"hunks:{context_lines}"
+            s.set(hunks=len(hunks), output_chars=stats.sent_chars)
+
+    if prompt is None:
+        with span("build_prompt") as s:
+            prompt = _build_prompt(numbered_orig, numbered_sugg)
+            s.set(output_chars=len(prompt))
+    messages = [
+        {"role": "system", "content": _SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+    cache_key = ResponseCache.make_key(model, _SYSTEM_PROMPT, numbered_orig, numbered_sugg, variant)
+    return _PreparedRequest(messages=messages, cache_key=cache_key, stats=stats)
+
+
+# The cache is an optimisation: if SQLite or the file system fails (locked
+# database, full disk, read-only data_dir) the request behaves as uncached.
+_CACHE_ERRORS = (sqlite3.Error, OSError)
+
+
+def _open_cache(settings) -> ResponseCache | None:
+    """The response cache configured in `settings`, or None if it cannot be opened."""
+    try:
+        return ResponseCache.from_settings(settings)
+    except _CACHE_ERRORS:
+        return None
+
+
+def _cache_lookup(cache: ResponseCache | None, cache_key: str) -> Optional[str]:
+    """The cached reply for `cache_key`; None on a miss or a cache failure."""
+    if cache is None:
+        return None
+    with span("cache_lookup") as s:
+        try:
+            cached = cache.get(cache_key)
+        except _CACHE_ERRORS as exc:
+            cached = None
+            s.set(error=str(exc))
+        s.set(hit=cached is not None)
+    return cached
+
+
+def _cache_store(cache: ResponseCache | None, cache_key: str, content: str) -> None:
+    """Cache a successful reply; ``ERROR:`` replies are never cached and a failed write is skipped."""
+    if cache is None or content.upper().startswith("ERROR:"):
+        return
+    try:
+        cache.put(cache_key, content)
+    except _CACHE_ERRORS:
+        pass
+
+
+def _prompt_chars(messages: list[dict[str, str]]) -> int:
+    return sum(len(message["content"]) for message in messages)
+
+
+def _describe_error(exc: Exception) -> str:
+    """Map a client exception to the agent’s ``ERROR: …`` string."""
+    if isinstance(exc, APITimeoutError):
+        return "ERROR: request to OpenAI timed out."
+    if isinstance(exc, APIConnectionError):
+        return f"ERROR: failed to connect to OpenAI – {exc}"
+    if isinstance(exc, APIError):
+        return f"ERROR: OpenAI API error – {exc}"
+    return f"ERROR: unexpected exception – {exc}"
+
+
+# ---------------------------------------------------------------------- #
+def _full_prompt_chars(numbered_original: str, numbered_suggestion: str) -> int:
+    """
+    ``len(_build_prompt(numbered_original, numbered_suggestion))`` without
+    building it. Numbered lines never start with whitespace, so the prompt's
+    dedent only depends on whether each part is empty, one line or several.
+    """
+    original_shape, suggestion_shape = _prompt_shape(numbered_original), _prompt_shape(numbered_suggestion)
+    return (
+        _prompt_overhead(original_shape, suggestion_shape)
+        + len(numbered_original) - len(original_shape)
+        + len(numbered_suggestion) - len(suggestion_shape)
+    )
+
+
+def _prompt_shape(numbered: str) -> str:
+    """A short stand-in with the same line structure as `numbered`."""
+    if not numbered:
+        return ""
+    return "1: x\n2: x" if "\n" in numbered else "1: x"
+
+
+@lru_cache(maxsize=None)
+def _prompt_overhead(original_shape: str, suggestion_shape: str) -> int:
+    return len(_build_prompt(original_shape, suggestion_shape))
+
+
 @lru_cache(maxsize=1)
 def _build_prompt(numbered_original: str, numbered_suggestion: str) -> str:
     """Build and memoise the single user prompt sent to the model."""
@@ -100,3 +488,47 @@ def _build_prompt(numbered_original: str, numbered_suggestion: str) -> str:
         NO CHANGES
         """
     ).strip()
+
+
+def _build_hunk_prompt(original_lines: list[str], suggestion_lines: list[str], hunks: list) -> str:
+    """Build the user prompt showing only the changed hunks, numbered with absolute line numbers."""
+    original_parts: list[str] = []
+    suggestion_parts: list[str] = []
+    for a_start, a_end, b_start, b_end in hunks:
+        original_parts.append(f"@@ original lines {a_start + 1}-{a_end} @@")
+        original_parts.extend(add_line_numbers_to_list(original_lines[a_start:a_end], start=a_start + 1))
+        suggestion_parts.append(f"@@ suggestion lines {b_start + 1}-{b_end} @@")
+        suggestion_parts.extend(add_line_numbers_to_list(suggestion_lines[b_start:b_end], start=b_start + 1))
+
+    return "\n".join([
+        "You are an expert *diff engine*.",
+        "",
+        "Only the changed regions (hunks) of both files are shown, each with a few",
+        "unchanged context lines. Line numbers are the ABSOLUTE line numbers of each",
+        "file; every line not shown is unchanged and must not be touched.",
+        "",
+        "**Original Code** hunks (1-indexed):",
+        "```text",
+        *original_parts,
+        "```",
+        "",
+        "**AI-Generated Suggestion** hunks (1-indexed):",
+        "```text",
+        *suggestion_parts,
+        "```",
+        "",
+        "Produce the *minimal* set of operations to transform the Original Code",
+        "into the AI-Generated Suggestion, using ONLY:",
+        "",
+        "1. Insert lines *from the suggestion* **before** a line in the original:",
+        "   `INSERT <orig_line_before>: <exact_code_content>`",
+        "",
+        "2. Delete one line:",
+        "   `DELETE <orig_line>`",
+        "",
+        "3. Delete a contiguous range:",
+        "   `DELETE <start_orig_line>-<end_orig_line>`",
+        "",
+        "If nothing needs changing, reply exactly:",
+        "NO CHANGES",
+    ])
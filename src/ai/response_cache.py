@@ -0,0 +1,154 @@
+"""
+ResponseCache
+=============
+
+Persistent, content-addressed cache of reasoning-model replies.
+
+Entries live in a SQLite database (under ``AppSettings.data_dir`` by
+default) keyed by a SHA-256 of everything that determines the reply: model,
+system prompt and the numbered original / suggestion. WAL journaling plus a
+busy timeout make it safe to share between several processes; eviction is by
+age and by least-recent use once the entry or byte budget is exceeded.
+"""
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key          TEXT PRIMARY KEY,
+    response     TEXT NOT NULL,
+    size         INTEGER NOT NULL,
+    created_at   REAL NOT NULL,
+    last_used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used_at);
+CREATE INDEX IF NOT EXISTS responses_created ON responses (created_at);
+"""
+
+
+class ResponseCache:
+    """SQLite-backed reply cache with size/age eviction and hit/miss counters."""
+
+    FILENAME = "response_cache.sqlite3"
+
+    def __init__(
+        self,
+        path: Path | str,
+        max_entries: int = 1000,
+        max_bytes: int = 50 * 1024 * 1024,
+        max_age_seconds: float = 30 * 24 * 3600,
+    ) -> None:
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # One connection per instance, guarded by a lock so threads may share it;
+        # other processes coordinate through SQLite's own file locking.
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    @classmethod
+    def from_settings(cls, settings) -> "ResponseCache":
+        return cls(
+            Path(settings.data_dir) / cls.FILENAME,
+            max_entries=settings.response_cache_max_entries,
+            max_bytes=settings.response_cache_max_bytes,
+            max_age_seconds=settings.response_cache_max_age_seconds,
+        )
+
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def make_key(
+        model: str, system_prompt: str, numbered_original: str, numbered_suggestion: str, variant: str = ""
+    ) -> str:
+        """
+        Hash the request inputs; parts are length-prefixed so they cannot run
+        together. `variant` distinguishes other prompt layouts of the same pair.
+        """
+        digest = hashlib.sha256()
+        parts = (model, system_prompt, numbered_original, numbered_suggestion)
+        for part in parts + ((variant,) if variant else ()):
+            data = part.encode("utf-8")
+            digest.update(len(data).to_bytes(8, "big"))
+            digest.update(data)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached reply for `key`, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] > self.max_age_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_used_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        """Store a reply and evict whatever no longer fits the budgets."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, size, created_at, last_used_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, response, len(response.encode("utf-8")), now, now),
+                )
+                self._evict(now)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.max_age_seconds,))
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            " SELECT key FROM responses ORDER BY last_used_at DESC, key LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            " SELECT key FROM ("
+            "  SELECT key, SUM(size) OVER (ORDER BY last_used_at DESC, key) AS running FROM responses"
+            " ) WHERE running > ?)",
+            (self.max_bytes,),
+        )
+
+    # ------------------------------------------------------------------ #
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": total}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,197 @@
+"""
+Windowed reasoning
+==================
+
+Splits an (original, suggestion) pair that is too large for one model
+request into aligned windows along a local diff. Only windows containing
+changes are sent, concurrently through `AsyncReasoningAgent`; each window's
+instructions are shifted back to global original line numbers and merged
+into one list for `apply_instructions`.
+"""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import threading
+from dataclasses import dataclass, field, replace
+from typing import Sequence
+
+from src.ai.reasoning_agent import AsyncReasoningAgent
+from src.config.settings import get_settings
+from src.core.differ import Hunk, Match, changed_regions, format_instructions, match_lines
+from src.core.parser import DeleteInstruction, InsertInstruction, ParsedInstruction, parse_instructions
+from src.models.document import split_lines
+
+
+def split_windows(
+    a: Sequence[str], b: Sequence[str], matches: list[Match], max_lines: int, context: int = 3
+) -> list[Hunk]:
+    """
+    Cut the pair into windows that each hold at most `max_lines` lines
+    (original + suggestion side), padded with up to `context` unchanged lines.
+
+    Windows only start and end inside matched (unchanged) blocks, so each one
+    is a self-contained sub-problem; unchanged stretches between windows are
+    never included. A single changed region larger than `max_lines` cannot be
+    cut and becomes one oversized window.
+    """
+
+    def size(first: Hunk, last: Hunk) -> int:
+        return (last[1] - first[0]) + (last[3] - first[2]) + 4 * context
+
+    groups: list[list[Hunk]] = []
+    for region in changed_regions(a, b, matches):
+        if groups and region[0] - groups[-1][-1][1] <= 2 * context and size(groups[-1][0], region) <= max_lines:
+            groups[-1].append(region)
+        else:
+            groups.append([region])
+
+    windows: list[Hunk] = []
+    for index, group in enumerate(groups):
+        first, last = group[0], group[-1]
+        # Context lines sit in a matched block, so both sides shift equally. Windows
+        # never overlap: trailing context stops at the next changed region, leading
+        # context at the end of the previous window, so no line is edited twice.
+        previous_a_end, previous_b_end = (windows[-1][1], windows[-1][3]) if windows else (0, 0)
+        before = min(context, first[0] - previous_a_end, first[2] - previous_b_end)
+        after = min(context, len(a) - last[1], len(b) - last[3])
+        if index + 1 < len(groups):
+            following = groups[index + 1][0]
+            after = min(after, following[0] - last[1], following[2] - last[3])
+        windows.append((first[0] - before, last[1] + after, first[2] - before, last[3] + after))
+    return windows
+
+
+def shift_instructions(
+    instructions: list[ParsedInstruction], offset: int, window_lines: int
+) -> list[ParsedInstruction]:
+    """
+    Translate window-local line numbers to global ones (``+ offset``),
+    dropping anything that points outside the window.
+    """
+    shifted: list[ParsedInstruction] = []
+    for instruction in instructions:
+        if isinstance(instruction, InsertInstruction):
+            if 1 <= instruction.line_before <= window_lines + 1:
+                shifted.append(replace(instruction, line_before=instruction.line_before + offset))
+        else:
+            start = max(instruction.line_start, 1)
+            end = instruction.line_end if instruction.line_end is not None else instruction.line_start
+            end = min(end, window_lines)
+            if start <= end:
+                shifted.append(DeleteInstruction(
+                    line_start=start + offset,
+                    line_end=end + offset if end != start else None,
+                ))
+    return shifted
+
+
+@dataclass
+class WindowedResult:
+    instructions: list[ParsedInstruction] = field(default_factory=list)
+    windows: list[Hunk] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+
+
+async def aget_instructions_windowed(
+    original_code: str,
+    ai_suggestion: str,
+    agent: AsyncReasoningAgent,
+    max_lines: int,
+    context: int = 3,
+) -> WindowedResult:
+    """Send every changed window concurrently and merge the replies."""
+    a = split_lines(original_code)
+    b = split_lines(ai_suggestion)
+    if len(a) + len(b) <= max_lines:
+        windows = [(0, len(a), 0, len(b))]
+    else:
+        windows = split_windows(a, b, match_lines(a, b), max_lines, context)
+    if not windows:
+        return WindowedResult()
+
+    replies = await agent.get_instructions_many(
+        ("\n".join(a[a0:a1]), "\n".join(b[b0:b1])) for a0, a1, b0, b1 in windows
+    )
+    result = WindowedResult(windows=windows)
+    for (a0, a1, _, _), reply in zip(windows, replies):
+        if reply.startswith("ERROR:"):
+            result.errors.append(f"{reply} (original lines {a0 + 1}-{a1})")
+            continue
+        # Merged in window order, so inserts at a shared boundary keep their order.
+        result.instructions.extend(shift_instructions(parse_instructions(reply), a0, a1 - a0))
+    return result
+
+
+class WindowedReasoningAgent:
+    """
+    Drop-in `get_instructions` provider that windows large pairs.
+
+    Small pairs go out as a single request; larger ones are split with
+    `split_windows` and the windows are requested concurrently. The reply is
+    the merged instruction script (or an ``ERROR: …`` string).
+
+    Every call goes through one `AsyncReasoningAgent`, i.e. one pooled HTTP
+    client, running on a private event-loop thread that is started on first
+    use, so connections are reused between calls (e.g. in the ``serve``
+    daemon). Code that is already inside an event loop awaits
+    `aget_instructions`; the blocking `get_instructions` refuses to run there.
+    """
+
+    def __init__(self, max_lines: int | None = None, context: int | None = None) -> None:
+        settings = get_settings()
+        if not settings.openai_api_key:
+            raise ValueError("OpenAI API key not configured in settings.")
+        self.max_lines: int = max_lines or settings.window_max_lines
+        self.context: int = context if context is not None else settings.hunk_context_lines
+        # The async client binds to the loop that first uses it: always the one below.
+        self._agent = AsyncReasoningAgent()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.last_result: WindowedResult | None = None
+
+    def get_instructions(self, original_code: str, ai_suggestion: str) -> str:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return self._submit(original_code, ai_suggestion).result()
+        raise RuntimeError(
+            "WindowedReasoningAgent.get_instructions() would block the running event loop; "
+            "await aget_instructions() instead."
+        )
+
+    async def aget_instructions(self, original_code: str, ai_suggestion: str) -> str:
+        """`get_instructions` for callers inside an event loop; the requests still run on the agent's loop."""
+        return await asyncio.wrap_future(self._submit(original_code, ai_suggestion))
+
+    def close(self) -> None:
+        """Close the HTTP client and stop the event-loop thread."""
+        with self._lock:
+            loop, thread, self._loop, self._thread = self._loop, self._thread, None, None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._agent.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    def _submit(self, original_code: str, ai_suggestion: str) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(self._run(original_code, ai_suggestion), self._event_loop())
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="windowed-agent", daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    async def _run(self, original_code: str, ai_suggestion: str) -> str:
+        result = self.last_result = await aget_instructions_windowed(
+            original_code, ai_suggestion, self._agent, self.max_lines, self.context
+        )
+        if result.errors:
+            return "ERROR: " + "; ".join(error.removeprefix("ERROR: ") for error in result.errors)
+        return format_instructions(result.instructions)
@@ -0,0 +1,257 @@
+# src/cli/batch.py
+"""
+Batch (manifest) mode for the CLI.
+
+A manifest is a JSONL file with one ``{"original": ..., "suggestion": ...,
+"output": ...}`` object per line; relative paths are resolved against the
+manifest's directory. The local stages (reading, local diff, parsing,
+injection, writing) run in a process pool, the model stage runs through one
+shared `AsyncReasoningAgent` with bounded concurrency. One JSON result line
+per item is written in manifest order as soon as that item and all items
+before it are done; a failing item is reported and the batch carries on.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Literal, Optional, TextIO
+
+from src.core.differ import format_instructions, try_local_diff
+from src.core.injector import apply_instructions
+from src.core.pipeline import apply_raw_instructions
+from src.utils.file_operations import read_file, write_file
+
+
+@dataclass
+class ManifestItem:
+    index: int
+    original: Optional[str] = None
+    suggestion: Optional[str] = None
+    output: Optional[str] = None
+    error: Optional[str] = None  # set when the manifest line itself is unusable
+
+
+@dataclass
+class ItemResult:
+    index: int
+    status: Literal["ok", "error"]
+    original: Optional[str] = None
+    output: Optional[str] = None
+    source: Optional[Literal["local", "ai"]] = None
+    error: Optional[str] = None
+    modified_code: Optional[str] = None  # only when the item has no output path
+    seconds: float = 0.0
+
+    def to_json(self) -> str:
+        return json.dumps({key: value for key, value in asdict(self).items() if value is not None})
+
+
+def read_manifest(manifest_path: str) -> list[ManifestItem]:
+    """
+    Parse the manifest; malformed lines become items carrying an error.
+
+    Raises OSError if the manifest cannot be read and ValueError
+    (``UnicodeDecodeError``) if it is not UTF-8 text.
+    """
+    base = Path(manifest_path).parent
+    items: list[ManifestItem] = []
+    for line in Path(manifest_path).read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        item = ManifestItem(index=len(items))
+        items.append(item)
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError as exc:
+            item.error = f"ERROR: invalid manifest line: {exc}"
+            continue
+        if not isinstance(entry, dict) or not entry.get("original") or not entry.get("suggestion"):
+            item.error = "ERROR: manifest line needs 'original' and 'suggestion' paths."
+            continue
+        item.original = str(base / entry["original"])
+        item.suggestion = str(base / entry["suggestion"])
+        if entry.get("output"):
+            item.output = str(base / entry["output"])
+    return items
+
+
+# --------------------------------------------------------------------------- #
+# Process-pool stages (module level so they can be pickled)
+# --------------------------------------------------------------------------- #
+def _write_output(output_path: Optional[str], modified_code: str) -> None:
+    if output_path:
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        write_file(output_path, modified_code)
+
+
+def _local_stage(original_path: str, suggestion_path: str, output_path: Optional[str], use_local_diff: bool):
+    """
+    Read the pair and finish it locally if the suggestion is a complete file.
+
+    Returns ``("done", modified_code)`` or ``("needs_ai", original_code, suggested_code)``.
+    """
+    original_code = read_file(original_path)
+    suggested_code = read_file(suggestion_path)
+    instructions = try_local_diff(original_code, suggested_code) if use_local_diff else None
+    if instructions is None:
+        return ("needs_ai", original_code, suggested_code)
+    modified_code = apply_instructions(original_code, instructions)
+    _write_output(output_path, modified_code)
+    return ("done", modified_code)
+
+
+def _apply_stage(original_code: str, raw_instructions: str, output_path: Optional[str]):
+    """Parse and apply a model reply. Returns ``(modified_code, error)``."""
+    result = apply_raw_instructions(original_code, raw_instructions)
+    if result.error:
+        return None, result.error
+    _write_output(output_path, result.modified_code)
+    return result.modified_code, None
+
+
+# --------------------------------------------------------------------------- #
+class _BatchRunner:
+    def __init__(self, executor, agent_factory: Callable, use_local_diff: bool) -> None:
+        self._executor = executor
+        self._agent_factory = agent_factory
+        self._use_local_diff = use_local_diff
+        self._agent = None
+        self._agent_error: Optional[str] = None
+        self._window_max_lines = 0
+        self._window_context = 0
+        self._agent_lock = asyncio.Lock()
+
+    async def _get_agent(self):
+        """Build the shared agent on first use; None (with an error) if that fails."""
+        async with self._agent_lock:
+            if self._agent is None and self._agent_error is None:
+                try:
+                    from src.config.settings import get_settings
+                    settings = get_settings()
+                    self._window_max_lines = settings.window_max_lines
+                    self._window_context = settings.hunk_context_lines
+                    self._agent = self._agent_factory()
+                except ValueError as exc:  # missing API key / invalid settings
+                    self._agent_error = f"ERROR: {exc}"
+            return self._agent
+
+    async def _ask_model(self, original_code: str, suggested_code: str) -> str:
+        agent = await self._get_agent()
+        if agent is None:
+            return self._agent_error
+        total_lines = len(original_code.splitlines()) + len(suggested_code.splitlines())
+        if total_lines <= self._window_max_lines:
+            return await agent.get_instructions(original_code, suggested_code)
+        from src.ai.windowing import aget_instructions_windowed
+
+        result = await aget_instructions_windowed(
+            original_code, suggested_code, agent, self._window_max_lines, self._window_context
+        )
+        if result.errors:
+            return "ERROR: " + "; ".join(error.removeprefix("ERROR: ") for error in result.errors)
+        return format_instructions(result.instructions)
+
+    async def process(self, item: ManifestItem) -> ItemResult:
+        started = time.perf_counter()
+        result = ItemResult(index=item.index, status="error", original=item.original, output=item.output)
+        loop = asyncio.get_running_loop()
+        try:
+            if item.error:
+                result.error = item.error
+                return result
+            stage = await loop.run_in_executor(
+                self._executor, _local_stage, item.original, item.suggestion, item.output, self._use_local_diff
+            )
+            if stage[0] == "done":
+                modified_code, result.source = stage[1], "local"
+            else:
+                original_code, suggested_code = stage[1], stage[2]
+                result.source = "ai"
+                raw_instructions = await self._ask_model(original_code, suggested_code)
+                modified_code, error = await loop.run_in_executor(
+                    self._executor, _apply_stage, original_code, raw_instructions, item.output
+                )
+                if error:
+                    result.error = error
+                    return result
+            result.status = "ok"
+            if not item.output:
+                result.modified_code = modified_code
+            return result
+        except Exception as exc:  # noqa: BLE001 - one bad item must not abort the batch
+            result.error = f"ERROR: {exc}"
+            return result
+        finally:
+            result.seconds = round(time.perf_counter() - started, 4)
+
+    async def aclose(self) -> None:
+        if self._agent is not None and hasattr(self._agent, "aclose"):
+            await self._agent.aclose()
+
+
+def _default_agent_factory():
+    from src.ai.reasoning_agent import AsyncReasoningAgent
+
+    return AsyncReasoningAgent()
+
+
+async def arun_manifest(
+    items: list[ManifestItem],
+    out: TextIO,
+    jobs: Optional[int] = None,
+    use_local_diff: bool = True,
+    agent_factory: Optional[Callable] = None,
+) -> list[ItemResult]:
+    """Process `items`, writing one JSON line per item to `out` in manifest order."""
+    # "spawn" keeps workers independent of the event loop and any threads in this process.
+    executor = ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context("spawn"))
+    runner = _BatchRunner(executor, agent_factory or _default_agent_factory, use_local_diff)
+    results: list[ItemResult] = []
+    try:
+        tasks = [asyncio.create_task(runner.process(item)) for item in items]
+        for task in tasks:
+            result = await task
+            results.append(result)
+            out.write(result.to_json() + "\n")
+            out.flush()
+    finally:
+        await runner.aclose()
+        executor.shutdown(wait=True, cancel_futures=True)
+    return results
+
+
+def run_manifest(
+    manifest_path: str,
+    jobs: Optional[int] = None,
+    use_local_diff: bool = True,
+    out: Optional[TextIO] = None,
+    agent_factory: Optional[Callable] = None,
+) -> int:
+    """Run a whole manifest; returns the process exit code (1 if any item failed)."""
+    return run_manifest_items(read_manifest(manifest_path), jobs, use_local_diff, out, agent_factory)
+
+
+def run_manifest_items(
+    items: list[ManifestItem],
+    jobs: Optional[int] = None,
+    use_local_diff: bool = True,
+    out: Optional[TextIO] = None,
+    agent_factory: Optional[Callable] = None,
+) -> int:
+    """`run_manifest` for items already read with `read_manifest`."""
+    started = time.perf_counter()
+    out = out or sys.stdout
+    results = asyncio.run(arun_manifest(items, out, jobs, use_local_diff, agent_factory))
+    failed = sum(1 for result in results if result.status != "ok")
+    print(
+        f"Batch: {len(results)} items, {len(results) - failed} ok, {failed} failed "
+        f"in {time.perf_counter() - started:.2f}s",
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
@@ -1,27 +1,55 @@
 # src/cli/main.py
 import argparse
+import os
 import sys
+from pathlib import Path
 
-from src.config.settings import get_settings # For API key check later
-from src.utils.file_operations import read_file, write_file # We'll create this small util
-from src.ai.reasoning_agent import ReasoningAgent
-from src.core.parser import parse_instructions
-from src.core.injector import apply_instructions
+from src.utils.file_operations import read_file, write_file
+from src.core.pipeline import process_pair
+from src.models.document import Document
+from src.utils.tracing import NullTracer, Tracer, span, use_tracer
 
-# Placeholder for file_operations, create this file next:
-# src/utils/file_operations.py
-# def read_file(filepath: str) -> str: ...
-# def write_file(filepath: str, content: str) -> None: ...
+# Settings (pydantic-settings) and the agents (openai) are imported inside the
+# functions that need them: together they cost far more than a local apply.
+
+
+def _make_agent(total_lines: int = 0):
+    """Build the agent; only called when the suggestion is a partial snippet (or --no-local-diff)."""
+    with span("settings"):
+        from src.config.settings import get_settings
+        settings = get_settings()
+    if not settings.openai_api_key:
+        raise ValueError("OpenAI API key not found. Please set it in your .env file or environment variables.")
+    if total_lines > settings.window_max_lines:
+        print("Input is larger than one model window; sending the changed windows concurrently...")
+        from src.ai.windowing import WindowedReasoningAgent
+        return WindowedReasoningAgent()
+    print("Asking AI for transformation instructions...")
+    from src.ai.reasoning_agent import ReasoningAgent
+    return ReasoningAgent() # API key is checked in its __init__
 
 
 def main():
-    parser = argparse.ArgumentParser(description="CodeSlinger: AI-powered code transformation tool.")
+    if sys.argv[1:2] == ["serve"]:
+        from src.cli.server import serve_main
+        sys.exit(serve_main(sys.argv[2:]))
+    if sys.argv[1:2] == ["replay"]:
+        from src.cli.replay import replay_main
+        sys.exit(replay_main(sys.argv[2:]))
+
+    parser = argparse.ArgumentParser(
+        description="CodeSlinger: AI-powered code transformation tool. "
+                    "Run 'serve' as the first argument to start the background daemon, or 'replay' "
+                    "to benchmark the pipeline against a recorded dataset, instead."
+    )
     parser.add_argument(
         "original_file",
+        nargs="?",
         help="Path to the Python file with the original code."
     )
     parser.add_argument(
         "suggestion_file",
+        nargs="?",
         help="Path to the Python file with the AI's suggested code."
     )
     parser.add_argument(
@@ -29,70 +57,191 @@ def main():
         help="Path to write the modified code. Prints to stdout if not provided.",
         default=None
     )
+    parser.add_argument(
+        "--no-local-diff",
+        action="store_true",
+        help="Always ask the AI, even when the suggestion is a complete file that could be diffed locally."
+    )
+    parser.add_argument(
+        "--fix-indent",
+        action="store_true",
+        help="Re-indent the inserted lines to fit the surrounding Python code "
+             "(asks the indentation model only if the local repair fails)."
+    )
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="Reject the AI's instructions (exit 1, nothing written) if validation finds errors such as "
+             "out-of-range lines or overlapping deletes."
+    )
+    parser.add_argument(
+        "--record",
+        action="store_true",
+        help="Add this run (original, suggestion, instructions, result) to the dataset under data_dir/dataset."
+    )
+    parser.add_argument(
+        "--manifest",
+        help="JSONL file of {\"original\", \"suggestion\", \"output\"} entries to process as one batch; "
+             "one JSON result per entry is printed in manifest order.",
+        default=None
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        help="Worker processes for the local stages in --manifest mode (default: CPU count).",
+        default=None
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="Write a Chrome trace-event file of the pipeline stages to FILE and print a timing summary.",
+        default=None
+    )
+    parser.add_argument(
+        "--server",
+        metavar="URL",
+        help="Send the pair to a running 'serve' daemon (e.g. http://127.0.0.1:8765) instead of processing it here.",
+        default=None
+    )
     # Later, we can add arguments for verbosity, model selection, etc.
 
     args = parser.parse_args()
 
+    if args.manifest:
+        if args.original_file or args.suggestion_file:
+            parser.error("--manifest cannot be combined with original_file/suggestion_file")
+        from src.cli.batch import read_manifest, run_manifest_items
+        try:
+            items = read_manifest(args.manifest)
+        except (OSError, ValueError) as e:
+            print(f"Could not read manifest: {e}", file=sys.stderr)
+            sys.exit(1)
+        sys.exit(run_manifest_items(items, jobs=args.jobs, use_local_diff=not args.no_local_diff))
+    if not (args.original_file and args.suggestion_file):
+        parser.error("original_file and suggestion_file are required unless --manifest is given")
+
+    trace_file = _trace_file(args.trace)
+    tracer = Tracer() if trace_file else NullTracer()
+    try:
+        with use_tracer(tracer), span("cli"):
+            _run(args)
+    finally:
+        if tracer.enabled:
+            tracer.write_chrome_trace(trace_file)
+            print(tracer.summary(), file=sys.stderr)
+            print(f"Trace written to {trace_file}", file=sys.stderr)
+
+
+def _trace_file(cli_value):
+    """--trace wins; otherwise the `trace_file` setting, if settings can be loaded at all."""
+    if cli_value:
+        return cli_value
+    # Only pay for loading settings when the environment or a .env file could set it.
+    if "TRACE_FILE" not in (key.upper() for key in os.environ) and not Path(".env").is_file():
+        return None
+    from src.config.settings import get_settings
+    try:
+        return get_settings().trace_file
+    except ValueError:  # e.g. no API key: fine for local-diff runs, and reported later if needed
+        return None
+
+
+def _fix_indentation(original_code, modified_code, result):
+    from src.ai.indentation_model import ModelIndentationFixer, repair_injected
+    from src.core.parser import parse_instructions
+
+    # Results from --server carry only the instruction text.
+    instructions = result.instructions or parse_instructions(result.raw_instructions)
+    with span("fix_indentation", instructions=len(instructions)) as s:
+        fixed = repair_injected(original_code, modified_code, instructions, fallback=ModelIndentationFixer())
+        s.set(source=fixed.source, valid=fixed.valid)
+    if fixed.source == "rules":
+        print(f"Indentation repaired locally ({len(fixed.changed_lines)} line(s)).")
+    elif fixed.source == "model":
+        print("Indentation repaired by the indentation model.")
+    elif not fixed.valid:
+        print(f"Warning: {fixed.error}", file=sys.stderr)
+    return fixed.code
+
+
+def _record(original_code, suggested_code, result, modified_code):
+    """Queue the run for the dataset; the recorder's thread writes it, at the latest on exit."""
+    from src.ai.dataset_recorder import DatasetRecorder
+    from src.config.settings import get_settings
+
+    recorder = DatasetRecorder.from_settings(get_settings())
+    recorder.record(original_code, suggested_code, result.raw_instructions, modified_code, source=result.source)
+    return recorder
+
+
+def _run(args):
     print(f"Original file: {args.original_file}")
     print(f"Suggestion file: {args.suggestion_file}")
     print(f"Output file: {args.output_file if args.output_file else 'stdout'}")
 
-    # --- Begin application logic (to be expanded) ---
     try:
-        # 1. Load settings (primarily for API key)
-        settings = get_settings()
-        if not settings.openai_api_key:
-            print("Error: OpenAI API key not found. Please set it in your .env file or environment variables.", file=sys.stderr)
-            sys.exit(1)
+        # 1. Read input files
+        with span("read_files") as s:
+            # Documents: split once here, then shared by the local diff, the prompt and the injector.
+            original_code = Document(read_file(args.original_file))
+            suggested_code = Document(read_file(args.suggestion_file))
+            s.set(original_chars=len(original_code), suggestion_chars=len(suggested_code))
 
-        # 2. Read input files (We'll need to create src/utils/file_operations.py)
-        # original_code = read_file(args.original_file)
-        # suggested_code = read_file(args.suggestion_file)
-        
-        # For now, let's use placeholder content to test the flow without file I/O
-        original_code = "def hello():\n    print('world')"
-        suggested_code = "def hello():\n    # A greeting\n    print('world!')"
-        print("\n--- Using placeholder code for now ---")
-        print("Original Code:\n", original_code)
-        print("Suggested Code:\n", suggested_code)
-        print("--------------------------------------\n")
-
-
-        # 3. Initialize ReasoningAgent
-        agent = ReasoningAgent() # API key is checked in its __init__
-
-        # 4. Get transformation instructions
-        # print("Asking AI for transformation instructions...")
-        # instructions_str = agent.get_instructions(original_code, suggested_code)
-        
-        # Placeholder instructions_str to avoid API call during CLI dev
-        instructions_str = "INSERT 2:     # A greeting\nDELETE 2\nINSERT 3:     print('world!')" # Example
-        print(f"Raw Instructions from AI (placeholder):\n{instructions_str}\n")
-
-        if instructions_str.startswith("ERROR:") or not instructions_str.strip():
-            print(f"Could not get valid instructions: {instructions_str}", file=sys.stderr)
-            sys.exit(1)
-        if instructions_str.upper() == "NO CHANGES":
-            print("AI reported NO CHANGES needed.")
-            modified_code = original_code
+        # 2. Get instructions (local diff for complete files, AI for snippets),
+        #    parse and apply them
+        total_lines = original_code.line_count + suggested_code.line_count
+        agents = []
+        def agent_factory():
+            agents.append(_make_agent(total_lines))
+            return agents[-1]
+
+        if args.server:
+            from src.cli.server import ServerClient
+            client = ServerClient(args.server)
+            try:
+                result = client.process(original_code, suggested_code, use_local_diff=not args.no_local_diff)
+            except OSError as e:
+                print(f"Could not reach the CodeSlinger server at {args.server}: {e}", file=sys.stderr)
+                sys.exit(1)
+            finally:
+                client.close()
         else:
-            # 5. Parse instructions
-            parsed_instr = parse_instructions(instructions_str)
-            if not parsed_instr and instructions_str.upper() != "NO CHANGES": # Should be caught above, but defensive
-                print("Failed to parse instructions.", file=sys.stderr)
+            result = process_pair(
+                original_code,
+                suggested_code,
+                agent_factory=agent_factory,
+                use_local_diff=not args.no_local_diff,
+            )
+        prompt_stats = getattr(agents[0], "last_prompt_stats", None) if agents else None
+        if prompt_stats:
+            print(
+                f"Prompt size: {prompt_stats.sent_chars} of {prompt_stats.full_chars} chars "
+                f"({prompt_stats.mode} mode, {prompt_stats.reduction:.0%} smaller)"
+            )
+        if result.error:
+            print(f"Could not get valid instructions: {result.error}", file=sys.stderr)
+            sys.exit(1)
+
+        if result.validation is not None and result.validation.issues:
+            print(result.validation.summary(), file=sys.stderr)
+            if args.strict and not result.validation.ok:
+                print("Instructions rejected (--strict); nothing was written.", file=sys.stderr)
                 sys.exit(1)
-            print(f"Parsed Instructions: {parsed_instr}\n")
 
-            # 6. Apply instructions
-            modified_code = apply_instructions(original_code, parsed_instr)
-        
-        # 7. Output the result
+        source = "local diff" if result.source == "local" else "AI"
+        print(f"Raw Instructions ({source}):\n{result.raw_instructions}\n")
+        modified_code = result.modified_code
+        if args.fix_indent:
+            modified_code = _fix_indentation(original_code, modified_code, result)
+
+        if args.record:
+            _record(original_code, suggested_code, result, modified_code)
+
+        # 3. Output the result
         if args.output_file:
-            # write_file(args.output_file, modified_code)
-            # print(f"Modified code written to {args.output_file}")
-            print(f"--- Output (Placeholder: would write to {args.output_file}) ---")
-            print(modified_code)
-            print("----------------------------------------------------------")
+            with span("write_file", output_chars=len(modified_code)):
+                write_file(args.output_file, modified_code)
+            print(f"Modified code written to {args.output_file}")
         else:
             print("--- Modified Code (stdout) ---")
             print(modified_code)
@@ -106,4 +255,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,274 @@
+# src/cli/replay.py
+"""
+Replay mode for the CLI: benchmark the pipeline against a recorded dataset.
+
+A corpus is a dataset directory written by `DatasetRecorder`, or a single
+``.jsonl`` / ``.jsonl.gz`` file of records with ``original``,
+``raw_instructions`` and ``final_code`` (and ``suggestion`` for
+``--pipeline``). Each record's recorded instructions are parsed and applied
+to its original, and the result is compared with the recorded final code.
+With ``--pipeline`` the whole `process_pair` flow runs instead (local diff
+first), with a stub agent that answers with the recorded instructions.
+
+Records are read lazily and replayed in chunks on a process pool, with a
+bounded number of chunks in flight, so a corpus never has to fit in memory.
+The report gives throughput, latency percentiles and the exact-match rate;
+``--min-match`` turns it into a regression gate.
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from src.core.pipeline import apply_raw_instructions, process_pair
+
+CHUNK_SIZE = 64
+MAX_MISMATCHES_REPORTED = 20
+
+# (position in the corpus, record or an ``ERROR: …`` string for an unreadable line)
+CorpusEntry = Tuple[int, Any]
+
+
+class RecordedAgent:
+    """`InstructionSource` stub that answers with a record's recorded instructions."""
+
+    def __init__(self, raw_instructions: str) -> None:
+        self.raw_instructions = raw_instructions
+
+    def get_instructions(self, original_code: str, ai_suggestion: str) -> str:
+        return self.raw_instructions
+
+
+@dataclass
+class ReplayOutcome:
+    index: int
+    seconds: float
+    matched: bool
+    record_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class ReplayReport:
+    records: int = 0
+    matched: int = 0
+    errors: int = 0
+    input_bytes: int = 0
+    seconds: float = 0.0  # wall clock for the whole replay
+    latencies: List[float] = field(default_factory=list)
+    mismatches: List[str] = field(default_factory=list)  # ids (or positions) of the first few
+
+    def add(self, outcome: ReplayOutcome) -> None:
+        self.records += 1
+        self.latencies.append(outcome.seconds)
+        if outcome.error:
+            self.errors += 1
+        if outcome.matched:
+            self.matched += 1
+        elif len(self.mismatches) < MAX_MISMATCHES_REPORTED:
+            self.mismatches.append(outcome.record_id or f"#{outcome.index}")
+
+    @property
+    def exact_match_rate(self) -> float:
+        return self.matched / self.records if self.records else 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Records per second of wall clock."""
+        return self.records / self.seconds if self.seconds else 0.0
+
+    def percentile(self, p: float) -> float:
+        """Nearest-rank percentile of the per-record latencies, in seconds."""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        rank = max(1, -(-len(ordered) * p // 100))  # ceil
+        return ordered[int(rank) - 1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "records": self.records,
+            "matched": self.matched,
+            "errors": self.errors,
+            "exact_match_rate": round(self.exact_match_rate, 6),
+            "seconds": round(self.seconds, 4),
+            "records_per_second": round(self.throughput, 2),
+            "mb_per_second": round(self.input_bytes / 1e6 / self.seconds, 3) if self.seconds else 0.0,
+            "latency_ms": {f"p{p}": round(self.percentile(p) * 1000, 3) for p in (50, 90, 99, 100)},
+            "mismatches": self.mismatches,
+        }
+
+    def summary(self) -> str:
+        data = self.to_dict()
+        latency = data["latency_ms"]
+        return (
+            f"Replay: {self.records} records, {self.matched} exact matches "
+            f"({self.exact_match_rate:.2%}), {self.errors} errors in {self.seconds:.2f}s\n"
+            f"  throughput: {data['records_per_second']:.1f} records/s, {data['mb_per_second']:.2f} MB/s of input\n"
+            f"  latency (ms): p50 {latency['p50']:.3f}  p90 {latency['p90']:.3f}  "
+            f"p99 {latency['p99']:.3f}  max {latency['p100']:.3f}"
+        )
+
+
+# --------------------------------------------------------------------------- #
+# Corpus
+# --------------------------------------------------------------------------- #
+def iter_corpus(path: str) -> Iterator[CorpusEntry]:
+    """Records of a dataset directory or a (gzipped) JSONL file, numbered in order."""
+    corpus = Path(path)
+    if corpus.is_dir():
+        from src.ai.dataset_recorder import iter_records
+
+        yield from enumerate(iter_records(corpus))
+        return
+    opener = gzip.open if corpus.suffix == ".gz" else open
+    with opener(corpus, "rt", encoding="utf-8") as handle:
+        index = 0
+        for line in handle:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                record = f"ERROR: invalid corpus line: {exc}"
+            yield index, record
+            index += 1
+
+
+# --------------------------------------------------------------------------- #
+# Process-pool stage (module level so it can be pickled)
+# --------------------------------------------------------------------------- #
+def replay_record(index: int, record: Any, use_pipeline: bool = False) -> ReplayOutcome:
+    """Replay one record and compare the result with its recorded final code."""
+    if isinstance(record, str):
+        return ReplayOutcome(index=index, seconds=0.0, matched=False, error=record)
+    if not isinstance(record, dict) or record.get("original") is None or record.get("final_code") is None:
+        return ReplayOutcome(
+            index=index, seconds=0.0, matched=False, error="ERROR: record needs 'original' and 'final_code'."
+        )
+    original_code = record["original"]
+    raw_instructions = record.get("raw_instructions") or ""
+    started = time.perf_counter()
+    try:
+        if use_pipeline:
+            result = process_pair(
+                original_code, record.get("suggestion") or "", agent_factory=lambda: RecordedAgent(raw_instructions)
+            )
+        else:
+            result = apply_raw_instructions(original_code, raw_instructions)
+        error = result.error
+        matched = error is None and result.modified_code == record["final_code"]
+    except Exception as exc:  # noqa: BLE001 - one bad record must not abort the replay
+        error, matched = f"ERROR: {exc}", False
+    seconds = time.perf_counter() - started
+    return ReplayOutcome(index=index, seconds=seconds, matched=matched, record_id=record.get("id"), error=error)
+
+
+def _replay_chunk(entries: List[CorpusEntry], use_pipeline: bool) -> List[ReplayOutcome]:
+    return [replay_record(index, record, use_pipeline) for index, record in entries]
+
+
+def _entry_bytes(entries: List[CorpusEntry]) -> int:
+    return sum(
+        len(record.get("original") or "") + len(record.get("raw_instructions") or "")
+        for _, record in entries
+        if isinstance(record, dict)
+    )
+
+
+def _chunks(entries: Iterable[CorpusEntry], size: int) -> Iterator[List[CorpusEntry]]:
+    iterator = iter(entries)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def replay(
+    entries: Iterable[CorpusEntry],
+    jobs: Optional[int] = None,
+    use_pipeline: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+) -> ReplayReport:
+    """Replay `entries`; ``jobs=1`` runs in this process, otherwise on a pool of `jobs` workers."""
+    report = ReplayReport()
+    started = time.perf_counter()
+    if jobs == 1:
+        for chunk in _chunks(entries, chunk_size):
+            report.input_bytes += _entry_bytes(chunk)
+            for outcome in _replay_chunk(chunk, use_pipeline):
+                report.add(outcome)
+    else:
+        workers = jobs or os.cpu_count() or 1
+        # "spawn", as in batch mode: workers must not inherit this process' threads.
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            pending: deque = deque()
+            for chunk in _chunks(entries, chunk_size):
+                report.input_bytes += _entry_bytes(chunk)
+                pending.append(executor.submit(_replay_chunk, chunk, use_pipeline))
+                while len(pending) >= 2 * workers:
+                    for outcome in pending.popleft().result():
+                        report.add(outcome)
+            while pending:
+                for outcome in pending.popleft().result():
+                    report.add(outcome)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+# --------------------------------------------------------------------------- #
+def replay_main(argv: Optional[List[str]] = None, out: Optional[TextIO] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="codesling replay",
+        description="Replay a recorded dataset through the parser and injector and report speed and accuracy.",
+    )
+    parser.add_argument("corpus", help="Dataset directory (data_dir/dataset) or a .jsonl / .jsonl.gz file of records.")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Worker processes (default: CPU count; 1 runs inline).")
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Run the full pipeline (local diff first) with a stub agent returning the recorded instructions.",
+    )
+    parser.add_argument("--limit", type=int, default=None, help="Replay only the first N records.")
+    parser.add_argument(
+        "--min-match",
+        type=float,
+        default=None,
+        metavar="RATE",
+        help="Exit with status 1 if the exact-match rate is below RATE (0-1).",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON on stdout.")
+    args = parser.parse_args(argv)
+    out = out or sys.stdout
+
+    if not Path(args.corpus).exists():
+        print(f"Corpus not found: {args.corpus}", file=sys.stderr)
+        return 1
+    entries: Iterable[CorpusEntry] = iter_corpus(args.corpus)
+    if args.limit is not None:
+        entries = islice(entries, args.limit)
+    try:
+        report = replay(entries, jobs=args.jobs, use_pipeline=args.pipeline)
+    except OSError as exc:
+        print(f"Could not read corpus: {exc}", file=sys.stderr)
+        return 1
+
+    print(report.summary(), file=sys.stderr)
+    if args.json:
+        out.write(json.dumps(report.to_dict()) + "\n")
+    if not report.records:
+        print("Corpus contains no records.", file=sys.stderr)
+        return 1
+    if args.min_match is not None and report.exact_match_rate < args.min_match:
+        print(f"Exact-match rate {report.exact_match_rate:.2%} is below {args.min_match:.2%}.", file=sys.stderr)
+        return 1
+    return 0
@@ -0,0 +1,234 @@
+# src/cli/server.py
+"""
+``codesling serve``: a long-running local daemon.
+
+Keeps settings, the reasoning agent (and with it the OpenAI client's pooled
+connections) and the response cache alive between requests, so editor
+integrations only pay for the model call. It speaks JSON over HTTP/1.1 with
+keep-alive on localhost:
+
+    GET  /health   -> {"status": "ok", "agent_ready": bool}
+    POST /process  {"original": str, "suggestion": str, "use_local_diff": bool}
+                   -> {"modified_code", "raw_instructions", "source", "error", "validation", "seconds"}
+
+``validation`` is the `ValidationReport` of a model reply as a dict, or null.
+
+`ServerClient` is the matching thin client (used by ``--server``).
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+from src.core.pipeline import InstructionSource, PipelineResult, process_pair
+from src.core.validator import ValidationReport
+from src.models.document import Document
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+
+def _default_agent_factory(windowed: bool) -> InstructionSource:
+    if windowed:
+        from src.ai.windowing import WindowedReasoningAgent
+        return WindowedReasoningAgent()
+    from src.ai.reasoning_agent import ReasoningAgent
+    return ReasoningAgent()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so a client can reuse its connection
+    # Headers and body are separate writes; without TCP_NODELAY, Nagle plus the
+    # client's delayed ACK adds ~40ms to every keep-alive response.
+    disable_nagle_algorithm = True
+    server: "CodeSlingServer"
+
+    def do_GET(self) -> None:
+        if self.path != "/health":
+            self._send(404, {"error": f"ERROR: unknown path {self.path}"})
+            return
+        self._send(200, {"status": "ok", "agent_ready": self.server.agent_ready})
+
+    def do_POST(self) -> None:
+        if self.path != "/process":
+            self._send(404, {"error": f"ERROR: unknown path {self.path}"})
+            return
+        try:
+            length_header = self.headers.get("Content-Length", "0").strip()
+            if not (length_header.isascii() and length_header.isdigit()):
+                # The body can't be framed, so the connection can't carry another request.
+                self.close_connection = True
+                raise ValueError(f"invalid Content-Length {length_header!r}")
+            length = int(length_header)
+            if length > MAX_BODY_BYTES:
+                self.close_connection = True  # the unread body would be parsed as the next request
+                raise ValueError("request body too large")
+            body = json.loads(self.rfile.read(length) or b"null")
+            if not isinstance(body, dict) or not isinstance(body.get("original"), str) \
+                    or not isinstance(body.get("suggestion"), str):
+                raise ValueError("body must be a JSON object with string 'original' and 'suggestion'")
+        except ValueError as exc:  # includes JSONDecodeError
+            self._send(400, {"error": f"ERROR: bad request – {exc}"})
+            return
+        self._send(200, self.server.process(
+            body["original"], body["suggestion"], use_local_diff=bool(body.get("use_local_diff", True))
+        ))
+
+    def _send(self, status: int, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class CodeSlingServer(ThreadingHTTPServer):
+    """HTTP server holding one warm agent per kind (single request / windowed)."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int] = (DEFAULT_HOST, DEFAULT_PORT),
+        agent_factory: Optional[Callable[[bool], InstructionSource]] = None,
+        verbose: bool = False,
+    ) -> None:
+        super().__init__(address, _Handler)
+        self.verbose = verbose
+        self._agent_factory = agent_factory or _default_agent_factory
+        self._agents: Dict[bool, InstructionSource] = {}
+        self._agent_lock = threading.Lock()
+        self._window_max_lines: Optional[int] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def agent_ready(self) -> bool:
+        return bool(self._agents)
+
+    def warm_up(self) -> None:
+        """Load settings and build the agent now instead of on the first snippet."""
+        self._get_agent(0)
+
+    def _get_agent(self, total_lines: int) -> InstructionSource:
+        with self._agent_lock:
+            if self._window_max_lines is None:
+                from src.config.settings import get_settings
+                self._window_max_lines = get_settings().window_max_lines
+            windowed = total_lines > self._window_max_lines
+            if windowed not in self._agents:
+                self._agents[windowed] = self._agent_factory(windowed)
+            return self._agents[windowed]
+
+    def process(self, original_code: str, suggested_code: str, use_local_diff: bool = True) -> Dict[str, Any]:
+        started = time.perf_counter()
+        original_code, suggested_code = Document(original_code), Document(suggested_code)
+        total_lines = original_code.line_count + suggested_code.line_count
+        try:
+            result = process_pair(
+                original_code,
+                suggested_code,
+                agent_factory=lambda: self._get_agent(total_lines),
+                use_local_diff=use_local_diff,
+            )
+        except Exception as exc:  # noqa: BLE001 - e.g. missing API key; the daemon keeps serving
+            result = PipelineResult(modified_code=None, raw_instructions="", source="ai", error=f"ERROR: {exc}")
+        return {
+            "modified_code": result.modified_code,
+            "raw_instructions": result.raw_instructions,
+            "source": result.source,
+            "error": result.error,
+            "validation": result.validation.to_dict() if result.validation is not None else None,
+            "seconds": round(time.perf_counter() - started, 6),
+        }
+
+
+# --------------------------------------------------------------------------- #
+class ServerClient:
+    """Thin client for a running ``codesling serve``; reuses one connection."""
+
+    def __init__(self, url: str = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}", timeout: float = 600.0) -> None:
+        parts = urlsplit(url if "://" in url else f"http://{url}")
+        self._host, self._port = parts.hostname or DEFAULT_HOST, parts.port or DEFAULT_PORT
+        self._timeout = timeout
+        self._conn: Optional[http.client.HTTPConnection] = None
+
+    def _request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        try:
+            return self._round_trip(method, path, body, headers)
+        except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+            # The server dropped an idle keep-alive connection; reconnect once.
+            self.close()
+            return self._round_trip(method, path, body, headers)
+
+    def _round_trip(self, method: str, path: str, body: Optional[bytes], headers: Dict[str, str]) -> Dict[str, Any]:
+        if self._conn is None:
+            self._conn = http.client.HTTPConnection(self._host, self._port, timeout=self._timeout)
+        self._conn.request(method, path, body=body, headers=headers)
+        return json.loads(self._conn.getresponse().read() or b"{}")
+
+    def health(self) -> Dict[str, Any]:
+        return self._request("GET", "/health")
+
+    def process(self, original_code: str, suggested_code: str, use_local_diff: bool = True) -> PipelineResult:
+        reply = self._request("POST", "/process", {
+            "original": original_code, "suggestion": suggested_code, "use_local_diff": use_local_diff,
+        })
+        validation = reply.get("validation")
+        return PipelineResult(
+            modified_code=reply.get("modified_code"),
+            raw_instructions=reply.get("raw_instructions", ""),
+            source=reply.get("source", "ai"),
+            error=reply.get("error"),
+            validation=ValidationReport.from_dict(validation) if validation else None,
+        )
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+# --------------------------------------------------------------------------- #
+def serve_main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="codesling serve", description="Run the CodeSlinger daemon.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Interface to bind (default: localhost only).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--no-warm", action="store_true", help="Build the agent on the first snippet instead of at startup.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log every request.")
+    args = parser.parse_args(argv)
+
+    server = CodeSlingServer((args.host, args.port), verbose=args.verbose)
+    if not args.no_warm:
+        try:
+            server.warm_up()
+        except Exception as exc:  # noqa: BLE001 - local diffs still work without an agent
+            print(f"Agent not available ({exc}); serving local diffs only until it can be built.", file=sys.stderr)
+    print(f"CodeSlinger server listening on {server.url}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
@@ -3,6 +3,7 @@ from __future__ import annotations
 
 from functools import lru_cache
 from pathlib import Path
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -23,14 +24,34 @@ class AppSettings(BaseSettings):
     # --- Optional / defaults ------------------------------------------------
     deepseek_api_key: str | None = None  # <-- ADD THIS LINE
     openai_model: str = "gpt-4o-mini"
+    openai_base_url: str | None = None  # e.g. a local OpenAI-compatible server
     indentation_model_name: str | None = None
 
+    # Prompting: "full" sends both files, "hunks" only the changed regions
+    prompt_mode: Literal["full", "hunks"] = "full"
+    hunk_context_lines: int = 3
+    # Pairs with more lines than this (original + suggestion) are split into
+    # diff-aligned windows that are sent to the model concurrently
+    window_max_lines: int = 2000
+
     # General behaviour
     timeout_seconds: int = 60
+    max_concurrent_requests: int = 8  # in-flight API calls for batch / async work
     log_level: str = "INFO"
 
     # Paths
     data_dir: Path = Path("data")
+    # When set, every CLI run writes a Chrome trace-event file of its stages here
+    trace_file: Path | None = None
+
+    # Dataset recording (gzip JSONL shards under data_dir/dataset)
+    dataset_shard_max_bytes: int = 16 * 1024 * 1024
+
+    # Response cache (SQLite under data_dir)
+    response_cache_enabled: bool = True
+    response_cache_max_entries: int = 1000
+    response_cache_max_bytes: int = 50 * 1024 * 1024
+    response_cache_max_age_seconds: int = 30 * 24 * 3600
 
     # Pydantic-settings configuration
     model_config = SettingsConfigDict(
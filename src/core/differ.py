@@ -0,0 +1,245 @@
+# src/core/differ.py
+"""
+Local, deterministic diff engine.
+
+When the AI suggestion is a complete file, the INSERT / DELETE script the
+reasoning model would produce can be computed exactly on the machine. This
+module does that with a patience diff (unique lines anchor the alignment,
+`difflib` fills in regions with no unique lines) and emits the same
+`ParsedInstruction` objects / instruction text that `parse_instructions`
+and `apply_instructions` already consume.
+"""
+import difflib
+import re
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.core.parser import DeleteInstruction, InsertInstruction, ParsedInstruction
+from src.models.document import split_lines
+
+# (original index, suggestion index, length), all 0-indexed
+Match = Tuple[int, int, int]
+# (original start, original end, suggestion start, suggestion end), 0-indexed, end-exclusive
+Hunk = Tuple[int, int, int, int]
+
+# Lines that mark a suggestion as an elided snippet rather than a full file,
+# e.g. "...", "# ... existing code ...", "// rest of the function unchanged"
+ELISION_PATTERN = re.compile(
+    r"^\s*(?:#|//)?\s*(?:\.\.\.|…)\s*$"
+    r"|^\s*(?:#|//).*\b(?:rest of|existing|unchanged|remaining)\b.*"
+    r"\b(?:code|file|function|class|method|implementation)s?\b",
+    re.IGNORECASE,
+)
+
+
+# --------------------------------------------------------------------------- #
+# Line matching
+# --------------------------------------------------------------------------- #
+def match_lines(a: Sequence[str], b: Sequence[str]) -> List[Match]:
+    """
+    Align two sequences of lines with a patience diff.
+
+    Returns the matching blocks as sorted, non-overlapping (i, j, n) triples
+    meaning ``a[i:i+n] == b[j:j+n]``. Adjacent blocks are merged.
+    """
+    matches: List[Match] = []
+    pending = [(0, len(a), 0, len(b))]
+    while pending:
+        alo, ahi, blo, bhi = pending.pop()
+
+        # Common prefix / suffix are matched directly.
+        n = 0
+        while alo + n < ahi and blo + n < bhi and a[alo + n] == b[blo + n]:
+            n += 1
+        if n:
+            matches.append((alo, blo, n))
+            alo += n
+            blo += n
+        n = 0
+        while alo < ahi - n and blo < bhi - n and a[ahi - 1 - n] == b[bhi - 1 - n]:
+            n += 1
+        if n:
+            matches.append((ahi - n, bhi - n, n))
+            ahi -= n
+            bhi -= n
+        if alo == ahi or blo == bhi:
+            continue
+
+        anchors = _unique_anchors(a, b, alo, ahi, blo, bhi)
+        if anchors:
+            prev_a, prev_b = alo, blo
+            for i, j in anchors:
+                matches.append((i, j, 1))
+                pending.append((prev_a, i, prev_b, j))
+                prev_a, prev_b = i + 1, j + 1
+            pending.append((prev_a, ahi, prev_b, bhi))
+        else:
+            # No unique lines to anchor on: fall back to difflib for this region.
+            matcher = difflib.SequenceMatcher(None, a[alo:ahi], b[blo:bhi], autojunk=False)
+            for i, j, size in matcher.get_matching_blocks():
+                if size:
+                    matches.append((alo + i, blo + j, size))
+
+    matches.sort()
+    merged: List[Match] = []
+    for i, j, n in matches:
+        if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+            merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + n)
+        else:
+            merged.append((i, j, n))
+    return merged
+
+
+def _unique_anchors(
+    a: Sequence[str], b: Sequence[str], alo: int, ahi: int, blo: int, bhi: int
+) -> List[Tuple[int, int]]:
+    """Lines occurring exactly once on each side, reduced to their longest increasing run."""
+    counts: Dict[str, List[int]] = {}  # line -> [count in a, index in a, count in b, index in b]
+    for i in range(alo, ahi):
+        entry = counts.setdefault(a[i], [0, i, 0, -1])
+        entry[0] += 1
+    for j in range(blo, bhi):
+        entry = counts.get(b[j])
+        if entry is not None:
+            entry[2] += 1
+            entry[3] = j
+    pairs = sorted((entry[1], entry[3]) for entry in counts.values() if entry[0] == 1 and entry[2] == 1)
+    if not pairs:
+        return []
+
+    # Longest increasing subsequence on the suggestion indices (patience sorting).
+    tails: List[int] = []           # suggestion index at the top of each pile
+    tail_pair: List[int] = []       # pair index at the top of each pile
+    back: List[int] = [-1] * len(pairs)
+    for k, (_, j) in enumerate(pairs):
+        pile = bisect_left(tails, j)
+        if pile == len(tails):
+            tails.append(j)
+            tail_pair.append(k)
+        else:
+            tails[pile] = j
+            tail_pair[pile] = k
+        back[k] = tail_pair[pile - 1] if pile else -1
+    anchors = []
+    k = tail_pair[-1]
+    while k != -1:
+        anchors.append(pairs[k])
+        k = back[k]
+    anchors.reverse()
+    return anchors
+
+
+def changed_regions(a: Sequence[str], b: Sequence[str], matches: List[Match]) -> List[Hunk]:
+    """The unmatched regions between matching blocks, without any context."""
+    regions: List[Hunk] = []
+    i = j = 0
+    for ai, bj, n in list(matches) + [(len(a), len(b), 0)]:
+        if i < ai or j < bj:
+            regions.append((i, ai, j, bj))
+        i, j = ai + n, bj + n
+    return regions
+
+
+def changed_hunks(a: Sequence[str], b: Sequence[str], matches: List[Match], context: int = 3) -> List[Hunk]:
+    """
+    Group the changed regions between matching blocks into hunks padded with
+    up to `context` unchanged lines on each side. Hunks whose context would
+    touch or overlap are merged, like ``diff -U<context>``.
+    """
+    gaps = changed_regions(a, b, matches)
+    if not gaps:
+        return []
+
+    groups = [[gaps[0], gaps[0]]]
+    for gap in gaps[1:]:
+        if gap[0] - groups[-1][1][1] <= 2 * context:
+            groups[-1][1] = gap
+        else:
+            groups.append([gap, gap])
+
+    hunks: List[Hunk] = []
+    for first, last in groups:
+        # Context lines are unchanged, so both sides move by the same amount.
+        before = min(context, first[0], first[2])
+        after = min(context, len(a) - last[1], len(b) - last[3])
+        hunks.append((first[0] - before, last[1] + after, first[2] - before, last[3] + after))
+    return hunks
+
+
+# --------------------------------------------------------------------------- #
+# Instructions
+# --------------------------------------------------------------------------- #
+def instructions_from_matches(
+    a: Sequence[str], b: Sequence[str], matches: List[Match]
+) -> List[ParsedInstruction]:
+    """
+    Turn matching blocks into INSERT / DELETE instructions.
+
+    Each changed region becomes the suggestion's lines inserted before the
+    first affected original line, followed by a DELETE of the original lines.
+    """
+    instructions: List[ParsedInstruction] = []
+    for a_start, a_end, b_start, b_end in changed_regions(a, b, matches):
+        for k in range(b_start, b_end):
+            instructions.append(InsertInstruction(line_before=a_start + 1, content=b[k]))
+        if a_start < a_end:
+            end = a_end if a_end - a_start > 1 else None
+            instructions.append(DeleteInstruction(line_start=a_start + 1, line_end=end))
+    return instructions
+
+
+def diff_instructions(original_code: str, suggested_code: str) -> List[ParsedInstruction]:
+    """Compute the instructions that turn `original_code` into `suggested_code`."""
+    a = split_lines(original_code)
+    b = split_lines(suggested_code)
+    return instructions_from_matches(a, b, match_lines(a, b))
+
+
+def format_instructions(instructions: List[ParsedInstruction]) -> str:
+    """Render instructions in the text format the reasoning model replies with."""
+    if not instructions:
+        return "NO CHANGES"
+    lines = []
+    for instruction in instructions:
+        if isinstance(instruction, InsertInstruction):
+            # parse_instructions drops exactly one space after the colon
+            lines.append(f"INSERT {instruction.line_before}: {instruction.content}")
+        elif instruction.line_end is None:
+            lines.append(f"DELETE {instruction.line_start}")
+        else:
+            lines.append(f"DELETE {instruction.line_start}-{instruction.line_end}")
+    return "\n".join(lines)
+
+
+# --------------------------------------------------------------------------- #
+# Fast path
+# --------------------------------------------------------------------------- #
+def is_complete_suggestion(
+    a: Sequence[str], b: Sequence[str], matches: List[Match], min_kept_ratio: float = 0.5
+) -> bool:
+    """
+    Heuristic: does `b` look like a complete rewrite of `a` rather than a snippet?
+
+    A complete file keeps most of the original's non-blank lines in place and
+    contains no elision markers such as ``# ... existing code ...``.
+    """
+    if not any(line.strip() for line in a):
+        return True
+    if any(ELISION_PATTERN.match(line) for line in b):
+        return False
+    original_content = sum(1 for line in a if line.strip())
+    kept_content = sum(1 for i, _, n in matches for line in a[i:i + n] if line.strip())
+    return kept_content >= min_kept_ratio * original_content
+
+
+def try_local_diff(original_code: str, suggested_code: str) -> Optional[List[ParsedInstruction]]:
+    """
+    Return locally computed instructions when the suggestion is a complete
+    file, or None when it looks like a partial snippet that needs the model.
+    """
+    a = split_lines(original_code)
+    b = split_lines(suggested_code)
+    matches = match_lines(a, b)
+    if not is_complete_suggestion(a, b, matches):
+        return None
+    return instructions_from_matches(a, b, matches)
@@ -0,0 +1,159 @@
+# src/core/incremental.py
+"""
+Incremental local diff for live preview.
+
+`IncrementalDiffer` remembers the previous (original, suggestion) pair and
+its line alignment. On the next call it finds the region each side was
+edited in (common prefix / suffix with the previous text), keeps the
+previous matching blocks outside those regions (shifting the ones after
+them), and re-runs the patience diff only on the window between the
+surviving blocks. A one-character edit in a large file therefore costs a
+pass over the lines plus a diff of a few lines, not a full re-diff.
+
+The alignment it produces is always valid, but it can differ from a
+from-scratch `match_lines` in how ties are broken.
+"""
+from typing import List, Optional, Sequence, Tuple
+
+from src.core.differ import ELISION_PATTERN, Match, changed_regions, instructions_from_matches, match_lines
+from src.core.parser import ParsedInstruction
+
+
+_CHUNK = 256
+
+# (start, old end, new end) of the lines replaced on one side, 0-indexed, end-exclusive
+Edit = Tuple[int, int, int]
+
+
+def _edited_region(old: Sequence[str], new: Sequence[str]) -> Optional[Edit]:
+    """The smallest region of `old` replaced to get `new`, or None if they are equal."""
+    if old == new:
+        return None
+    limit = min(len(old), len(new))
+    prefix = 0
+    # Compare slices (in C) a chunk at a time, then line by line in the first differing chunk.
+    while prefix + _CHUNK <= limit and old[prefix:prefix + _CHUNK] == new[prefix:prefix + _CHUNK]:
+        prefix += _CHUNK
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    old_end, new_end = len(old), len(new)
+    while suffix + _CHUNK <= limit - prefix and old[old_end - suffix - _CHUNK:old_end - suffix] \
+            == new[new_end - suffix - _CHUNK:new_end - suffix]:
+        suffix += _CHUNK
+    while suffix < limit - prefix and old[old_end - 1 - suffix] == new[new_end - 1 - suffix]:
+        suffix += 1
+    return prefix, old_end - suffix, new_end - suffix
+
+
+def _cut_points(edit: Optional[Edit], start: int, length: int) -> List[int]:
+    """Offsets into a block at `start` where it enters or leaves `edit`."""
+    if edit is None:
+        return []
+    return [offset - start for offset in edit[:2] if start < offset < start + length]
+
+
+def _carry(index: int, edit: Optional[Edit]) -> Optional[int]:
+    """Where old line `index` is after `edit`, or None if it was replaced."""
+    if edit is None or index < edit[0]:
+        return index
+    if index < edit[1]:
+        return None
+    return index + edit[2] - edit[1]
+
+
+def _content_lines(lines: Sequence[str]) -> int:
+    return sum(1 for line in lines if line.strip())
+
+
+def _elision_lines(lines: Sequence[str]) -> int:
+    return sum(1 for line in lines if ELISION_PATTERN.match(line))
+
+
+def _touches(edit: Optional[Edit], lo: int, hi: int) -> bool:
+    return edit is not None and lo <= edit[2] and edit[0] <= hi
+
+
+class IncrementalDiffer:
+    """Local diff that reuses the previous call's alignment outside the edited lines."""
+
+    def __init__(self) -> None:
+        self._a: List[str] = []
+        self._b: List[str] = []
+        self._matches: Optional[List[Match]] = None
+        self._texts: Tuple[str, str] = ("", "")  # the texts `_a` and `_b` were split from
+        # Kept up to date edit by edit, so the completeness check need not rescan the files.
+        self._content = 0   # non-blank lines in the original
+        self._elisions = 0  # elision markers in the suggestion
+        self.last_window: Tuple[int, int] = (0, 0)  # lines of each side re-diffed by the last call
+
+    def reset(self) -> None:
+        self._a, self._b, self._matches = [], [], None
+        self._texts = ("", "")
+
+    def match(self, a: List[str], b: List[str]) -> List[Match]:
+        """`match_lines(a, b)`, reusing the previous alignment where the inputs did not change."""
+        if self._matches is None:
+            matches = match_lines(a, b)
+            self._content, self._elisions = _content_lines(a), _elision_lines(b)
+            self.last_window = (len(a), len(b))
+        else:
+            edit_a = _edited_region(self._a, a)
+            edit_b = _edited_region(self._b, b)
+            if edit_a is not None:
+                start, old_end, new_end = edit_a
+                self._content += _content_lines(a[start:new_end]) - _content_lines(self._a[start:old_end])
+            if edit_b is not None:
+                start, old_end, new_end = edit_b
+                self._elisions += _elision_lines(b[start:new_end]) - _elision_lines(self._b[start:old_end])
+            matches = self._rematch(a, b, edit_a, edit_b)
+        self._a, self._b, self._matches = a, b, matches
+        return matches
+
+    def _rematch(self, a: List[str], b: List[str], edit_a: Optional[Edit], edit_b: Optional[Edit]) -> List[Match]:
+        # Keep every piece of the previous blocks that neither edit touched.
+        kept: List[Match] = []
+        for i, j, n in self._matches:
+            cuts = sorted({0, n, *_cut_points(edit_a, i, n), *_cut_points(edit_b, j, n)})
+            for lo, hi in zip(cuts, cuts[1:]):
+                new_i, new_j = _carry(i + lo, edit_a), _carry(j + lo, edit_b)
+                if new_i is not None and new_j is not None:
+                    kept.append((new_i, new_j, hi - lo))
+
+        # Re-diff only the unmatched gaps the edits fall into.
+        matches = list(kept)
+        window_a = window_b = 0
+        for a_lo, a_hi, b_lo, b_hi in changed_regions(a, b, kept):
+            if _touches(edit_a, a_lo, a_hi) or _touches(edit_b, b_lo, b_hi):
+                window_a += a_hi - a_lo
+                window_b += b_hi - b_lo
+                matches.extend((a_lo + i, b_lo + j, n) for i, j, n in match_lines(a[a_lo:a_hi], b[b_lo:b_hi]))
+        self.last_window = (window_a, window_b)
+
+        merged: List[Match] = []
+        for i, j, n in sorted(matches):
+            if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+                merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + n)
+            else:
+                merged.append((i, j, n))
+        return merged
+
+    def try_diff(self, original_code: str, suggested_code: str) -> Optional[List[ParsedInstruction]]:
+        """Incremental `try_local_diff`: instructions for a complete file, None for a snippet."""
+        # Typing edits one side at a time; don't re-split the other.
+        a = self._a if self._matches is not None and original_code == self._texts[0] else original_code.splitlines()
+        b = self._b if self._matches is not None and suggested_code == self._texts[1] else suggested_code.splitlines()
+        matches = self.match(a, b)
+        self._texts = (original_code, suggested_code)
+        if not self.is_complete(a, b, matches):
+            return None
+        return instructions_from_matches(a, b, matches)
+
+    def is_complete(self, a: List[str], b: List[str], matches: List[Match], min_kept_ratio: float = 0.5) -> bool:
+        """`is_complete_suggestion` for the last `match` call, scanning only the unmatched lines."""
+        if not self._content:
+            return True
+        if self._elisions:
+            return False
+        dropped = sum(_content_lines(a[a_lo:a_hi]) for a_lo, a_hi, _, _ in changed_regions(a, b, matches))
+        return self._content - dropped >= min_kept_ratio * self._content
@@ -1,66 +1,275 @@
-# src/core/injector.py
-from typing import List
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Sequence, TextIO, Tuple, Union
 from src.core.parser import ParsedInstruction, InsertInstruction, DeleteInstruction
+from src.models.document import split_lines
+from src.models.instruction_batch import InstructionBatch
 
-def apply_instructions(original_code: str, instructions: List[ParsedInstruction]) -> str:
+# Every function taking instructions accepts either form; a batch is read column-wise.
+Instructions = Union[List[ParsedInstruction], InstructionBatch]
+
+def _delete_spans(instructions: Instructions) -> Iterator[Tuple[int, int]]:
+    if isinstance(instructions, InstructionBatch):
+        return instructions.delete_spans()
+    return (
+        (instruction.line_start, instruction.line_end if instruction.line_end is not None else instruction.line_start)
+        for instruction in instructions
+        if isinstance(instruction, DeleteInstruction)
+    )
+
+def _insert_items(instructions: Instructions) -> Iterator[Tuple[int, str]]:
+    if isinstance(instructions, InstructionBatch):
+        return instructions.insert_items()
+    return (
+        (instruction.line_before, instruction.content)
+        for instruction in instructions
+        if isinstance(instruction, InsertInstruction)
+    )
+
+def merge_delete_ranges(instructions: Instructions, num_lines: int) -> List[Tuple[int, int]]:
+    """
+    Normalises every DeleteInstruction into a sorted list of disjoint, inclusive
+    (start, end) line ranges (1-indexed), clipped to 1..num_lines.
+
+    Overlapping and adjacent ranges are merged, so the result scales with the
+    number of instructions rather than the number of deleted lines.
+    """
+    ranges = []
+    for start_line, end_line in _delete_spans(instructions):
+        start_line = max(start_line, 1)
+        end_line = min(end_line, num_lines)
+        if start_line <= end_line: # Ensure valid line numbers
+            ranges.append((start_line, end_line))
+    ranges.sort()
+
+    merged: List[Tuple[int, int]] = []
+    for start_line, end_line in ranges:
+        if merged and start_line <= merged[-1][1] + 1:
+            if end_line > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end_line)
+        else:
+            merged.append((start_line, end_line))
+    return merged
+
+def group_insertions(instructions: Instructions, num_lines: int) -> Dict[int, List[str]]:
+    """
+    Groups insertions by the line number they should appear before (1-indexed),
+    keeping the order in which they appear in the instruction list.
+    """
+    insertions_before_line: Dict[int, List[str]] = {} # {line_num: [content1, content2, ...]}
+    for line_before, content in _insert_items(instructions):
+        # Ensure line_before is within a reasonable range (1 to num_lines + 1 for appending)
+        if not (1 <= line_before <= num_lines + 1):
+            # Skip or log invalid insertion line numbers
+            # print(f"Warning: Invalid insertion line_before={line_before}, skipping.")
+            continue
+        insertions_before_line.setdefault(line_before, []).append(content)
+    return insertions_before_line
+
+def apply_instructions(original_code: str, instructions: Instructions) -> str:
     """
     Applies a list of parsed instructions (inserts and deletes) to the original code.
 
     Args:
-        original_code: The original code as a multi-line string.
-        instructions: A list of ParsedInstruction objects.
+        original_code: The original code as a multi-line string; a `Document`'s
+            lines are reused instead of splitting it again.
+        instructions: A list of ParsedInstruction objects or an InstructionBatch.
 
     Returns:
         The modified code as a multi-line string.
     """
-    original_lines = original_code.splitlines()
+    original_lines = split_lines(original_code)
     num_original_lines = len(original_lines)
-    
+
     # --- Pre-process instructions for easier application ---
-    
-    # 1. Collect all line numbers to be deleted (1-indexed)
-    lines_to_delete = set()
-    for instruction in instructions:
-        if isinstance(instruction, DeleteInstruction):
-            start_line = instruction.line_start
-            end_line = instruction.line_end if instruction.line_end is not None else instruction.line_start
-            for i in range(start_line, end_line + 1):
-                if 1 <= i <= num_original_lines: # Ensure valid line numbers
-                    lines_to_delete.add(i)
+
+    # 1. Merge all deletions into sorted, disjoint line ranges (1-indexed)
+    delete_ranges = merge_delete_ranges(instructions, num_original_lines)
 
     # 2. Group insertions by the line number they should appear before (1-indexed)
-    insertions_before_line = {} # {line_num: [content1, content2, ...]}
-    for instruction in instructions:
-        if isinstance(instruction, InsertInstruction):
-            line_before = instruction.line_before
-            # Ensure line_before is within a reasonable range (1 to num_lines + 1 for appending)
-            if not (1 <= line_before <= num_original_lines + 1):
-                # Skip or log invalid insertion line numbers
-                # print(f"Warning: Invalid insertion line_before={line_before}, skipping.")
-                continue
-
-            if line_before not in insertions_before_line:
-                insertions_before_line[line_before] = []
-            insertions_before_line[line_before].append(instruction.content)
-            
+    insertions_before_line = group_insertions(instructions, num_original_lines)
+
     # --- Build the new list of lines ---
     new_code_lines: List[str] = []
-    
-    for i in range(1, num_original_lines + 1): # Iterate through original line numbers (1-indexed)
+    for start_line, stop_line, inserted in _line_runs(num_original_lines, delete_ranges, insertions_before_line):
+        new_code_lines.extend(original_lines[start_line - 1:stop_line - 1]) # original_lines is 0-indexed
+        new_code_lines.extend(inserted)
+
+    return "\n".join(new_code_lines)
+
+_NO_LINES: Tuple[str, ...] = ()
+
+def _line_runs(
+    num_lines: int, delete_ranges: List[Tuple[int, int]], insertions_before_line: Dict[int, List[str]]
+) -> Iterator[Tuple[int, int, Sequence[str]]]:
+    """
+    Walks the result of applying `delete_ranges` and `insertions_before_line`
+    to a file of `num_lines` lines, yielding (start, stop, inserted): original
+    lines start..stop-1 that survive (none when start == stop), followed by the
+    content inserted before original line `stop`.
+
+    Every insertion point and every delete boundary splits the original into
+    runs of surviving lines, so each run can be copied with a single slice.
+    """
+    cut_points = set(insertions_before_line)
+    for start_line, end_line in delete_ranges:
+        cut_points.add(start_line)
+        cut_points.add(end_line + 1)
+    cut_points.add(num_lines + 1)
+
+    range_index = 0
+    current_line = 1 # 1-indexed position in the original
+    for cut in sorted(cut_points):
+        if cut > num_lines + 1:
+            break
+        start_line = current_line
+        # Original lines current_line .. cut-1 are either all kept or all deleted
+        if cut > current_line:
+            while range_index < len(delete_ranges) and delete_ranges[range_index][1] < current_line:
+                range_index += 1
+            if range_index < len(delete_ranges) and delete_ranges[range_index][0] <= current_line:
+                start_line = cut
+            current_line = cut
+        # Content scheduled for insertion BEFORE original line `cut`
+        # (cut == num_lines + 1 appends after all original lines)
+        yield start_line, cut, insertions_before_line.get(cut, _NO_LINES)
+
+@dataclass
+class LineChanges:
+    """
+    Where `apply_instructions` changes a file, as 1-indexed inclusive ranges:
+    `deleted` in the original, `inserted` in the result, and `kept` runs as
+    (original start, result start, length) for mapping positions between the two.
+    """
+    deleted: List[Tuple[int, int]] = field(default_factory=list)
+    inserted: List[Tuple[int, int]] = field(default_factory=list)
+    kept: List[Tuple[int, int, int]] = field(default_factory=list)
+
+def map_line_changes(num_lines: int, instructions: Instructions) -> LineChanges:
+    """
+    Computes the line ranges `apply_instructions` would delete, insert and keep
+    for a file of `num_lines` lines, without building the result.
+    """
+    delete_ranges = merge_delete_ranges(instructions, num_lines)
+    insertions_before_line = group_insertions(instructions, num_lines)
+    changes = LineChanges(deleted=delete_ranges)
+
+    result_line = 1 # next line number in the result
+    for start_line, stop_line, inserted in _line_runs(num_lines, delete_ranges, insertions_before_line):
+        if stop_line > start_line:
+            changes.kept.append((start_line, result_line, stop_line - start_line))
+            result_line += stop_line - start_line
+        if inserted:
+            changes.inserted.append((result_line, result_line + len(inserted) - 1))
+            result_line += len(inserted)
+    return changes
+
+def iter_source_lines(source: TextIO, block_size: int = 1 << 20) -> Iterator[str]:
+    """
+    Yields the lines of a text file handle opened with ``newline=""``, split
+    exactly as ``str.splitlines()`` would split the whole file, while reading
+    only `block_size` characters at a time.
+    """
+    pending = ""
+    while True:
+        block = source.read(block_size)
+        if not block:
+            break
+        text = pending + block
+        # Hold back the last (possibly incomplete) line. A trailing "\r" may
+        # still be the first half of a "\r\n" pair, so it is held back too.
+        parts = text.splitlines(keepends=True)
+        last = parts[-1]
+        if last[-1:] == "\r" or last.splitlines() == [last]:
+            pending = last
+            complete = text[:len(text) - len(last)]
+        else:
+            pending = ""
+            complete = text
+        yield from complete.splitlines()
+    if pending:
+        yield from pending.splitlines()
+
+def stream_instructions(
+    source_lines: Iterable[str],
+    instructions: Instructions,
+    output: TextIO,
+    chunk_size: int = 1 << 16,
+) -> int:
+    """
+    Streaming counterpart of `apply_instructions`.
+
+    Reads the original one line at a time and writes the result to `output`
+    in chunks of roughly `chunk_size` characters, so peak memory does not
+    grow with the size of the file. The text written is identical to what
+    `apply_instructions` would return for the same original.
+
+    Args:
+        source_lines: The original code, one line per item, without line endings.
+        instructions: A list of ParsedInstruction objects or an InstructionBatch.
+        output: A text file handle the modified code is written to.
+        chunk_size: Approximate number of characters buffered between writes.
+
+    Returns:
+        The number of lines in the original code.
+    """
+    # The total line count is unknown until EOF, so nothing is clipped yet;
+    # out-of-range inserts are dropped once the end is reached.
+    unbounded = float("inf")
+    delete_ranges = merge_delete_ranges(instructions, unbounded)
+    insertions_before_line = group_insertions(instructions, unbounded)
+
+    buffer: List[str] = []
+    buffered = 0
+    written_any = False
+
+    def flush() -> None:
+        nonlocal buffered, written_any
+        if buffer:
+            # Lines are "\n"-joined exactly like apply_instructions' result
+            output.write(("\n" if written_any else "") + "\n".join(buffer))
+            written_any = True
+            buffer.clear()
+        buffered = 0
+
+    range_index = 0
+    next_delete_start, next_delete_end = delete_ranges[0] if delete_ranges else (0, -1)
+    num_original_lines = 0
+    for line in source_lines:
+        num_original_lines += 1
+        i = num_original_lines
         # Add any content scheduled for insertion BEFORE the current original line i
         if i in insertions_before_line:
-            for content_to_insert in insertions_before_line[i]:
-                new_code_lines.append(content_to_insert)
-        
-        # If current original line i is NOT marked for deletion, add it
-        if i not in lines_to_delete:
-            new_code_lines.append(original_lines[i-1]) # original_lines is 0-indexed
-
-    # Handle insertions that are meant to go after all original lines
-    # (e.g., if line_before was num_original_lines + 1)
-    after_last_line_key = num_original_lines + 1
-    if after_last_line_key in insertions_before_line:
-        for content_to_insert in insertions_before_line[after_last_line_key]:
-            new_code_lines.append(content_to_insert)
-            
-    return "\n".join(new_code_lines)
\ No newline at end of file
+            buffer.extend(insertions_before_line[i])
+        if i > next_delete_end and range_index + 1 < len(delete_ranges):
+            range_index += 1
+            next_delete_start, next_delete_end = delete_ranges[range_index]
+        if next_delete_start <= i <= next_delete_end:
+            continue
+        buffer.append(line)
+        buffered += len(line)
+        if buffered >= chunk_size:
+            flush()
+
+    # Insertions meant to go after all original lines
+    buffer.extend(insertions_before_line.get(num_original_lines + 1, []))
+    flush()
+    return num_original_lines
+
+def apply_instructions_to_file(
+    original_path: str,
+    instructions: Instructions,
+    output_path: str,
+    chunk_size: int = 1 << 16,
+) -> int:
+    """
+    Applies instructions to the file at `original_path` and writes the result
+    to `output_path` without loading either file into memory as a whole.
+
+    Returns:
+        The number of lines in the original file.
+    """
+    # newline="" keeps "\r\n" / "\r" endings intact so iter_source_lines
+    # can reproduce splitlines() exactly.
+    with open(original_path, "r", encoding="utf-8", newline="") as source, \
+            open(output_path, "w", encoding="utf-8", newline="") as output:
+        return stream_instructions(iter_source_lines(source), instructions, output, chunk_size)
@@ -1,23 +1,26 @@
 # src/core/parser.py
 import re
-from dataclasses import dataclass, field
-from typing import List, Union, Literal, Optional
+from dataclasses import dataclass
+from typing import ClassVar, Iterable, Iterator, List, Union, Literal, Optional
 
 # --------------------------------------------------------------------------- #
 # Data models
 # --------------------------------------------------------------------------- #
-@dataclass
+# Slotted and frozen: no per-instance __dict__, and instructions can be shared
+# (windows, caches, batches) without defensive copies. `type` is a class
+# constant, not a field, so it costs nothing per instance.
+@dataclass(frozen=True, slots=True)
 class InsertInstruction:
     line_before: int
     content: str
-    type: Literal["insert"] = field(default="insert", init=False)
+    type: ClassVar[Literal["insert"]] = "insert"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DeleteInstruction:
     line_start: int
     line_end: Optional[int] = None
-    type: Literal["delete"] = field(default="delete", init=False)
+    type: ClassVar[Literal["delete"]] = "delete"
 
 
 ParsedInstruction = Union[InsertInstruction, DeleteInstruction]
@@ -46,6 +49,18 @@ DELETE_RANGE_PATTERN = re.compile(
 # NO CHANGES
 NO_CHANGES_PATTERN = re.compile(r"^\s*NO\s+CHANGES\s*$", re.IGNORECASE)
 
+# All three instruction kinds in one alternation, so each line is classified
+# by a single match instead of trying the patterns above one after another.
+# Exactly one of the `insert` / `delete` groups is set on a match; `end` is
+# only set for a DELETE range.
+INSTRUCTION_PATTERN = re.compile(
+    r"^\s*(?:"
+    r"INSERT\s+(?P<insert>\d+)\s*:\s?(?P<content>.*)"
+    r"|DELETE\s+(?P<delete>\d+)(?:\s*-\s*(?P<end>\d+))?\s*"
+    r")$",
+    re.IGNORECASE,
+)
+
 # --------------------------------------------------------------------------- #
 # Public API
 # --------------------------------------------------------------------------- #
@@ -56,42 +71,121 @@ def parse_instructions(instruction_string: str) -> List[ParsedInstruction]:
     * Leading/trailing **blank lines** are ignored.
     * Spaces inside the code content after the colon are preserved exactly.
     """
-    if not instruction_string or instruction_string.strip().upper().startswith("ERROR:"):
-        return []
-
-    # Quick path for “NO CHANGES”
-    if NO_CHANGES_PATTERN.fullmatch(instruction_string.strip()):
+    if not has_instructions(instruction_string):
         return []
 
     parsed_ops: List[ParsedInstruction] = []
 
     # Walk raw lines so we never strip the spaces that belong to code content.
+    # Blank and unrecognised lines simply fail to match and are skipped.
     for line in instruction_string.splitlines():
-        if not line.strip():  # skip completely blank lines
-            continue
-
-        # DELETE range (more specific than single)
-        m = DELETE_RANGE_PATTERN.match(line)
-        if m:
-            start, end = int(m.group(1)), int(m.group(2))
-            if start <= end:  # ignore invalid “15-10” style ranges
-                parsed_ops.append(DeleteInstruction(line_start=start, line_end=end))
-            continue
-
-        # DELETE single
-        m = DELETE_SINGLE_PATTERN.match(line)
-        if m:
-            parsed_ops.append(DeleteInstruction(line_start=int(m.group(1))))
-            continue
-
-        # INSERT
-        m = INSERT_PATTERN.match(line)
-        if m:
-            line_before = int(m.group(1))
-            content = m.group(2)  # already minus at most one leading space
-            parsed_ops.append(InsertInstruction(line_before=line_before, content=content))
-            continue
-
-        # Unrecognised line – silently skip (could log a warning)
+        op = _parse_line(line)
+        if op is not None:
+            parsed_ops.append(op)
 
     return parsed_ops
+
+
+def has_instructions(instruction_string: str) -> bool:
+    """False for an empty reply, an ``ERROR:`` reply or ``NO CHANGES``; those parse to nothing."""
+    if not instruction_string:
+        return False
+    stripped = instruction_string.strip()
+    if stripped.upper().startswith("ERROR:"):
+        return False
+    # Quick path for “NO CHANGES”
+    return NO_CHANGES_PATTERN.fullmatch(stripped) is None
+
+
+def _parse_line(line: str) -> Optional[ParsedInstruction]:
+    """Classify a single instruction line, or return None if it is not one."""
+    m = INSTRUCTION_PATTERN.match(line)
+    if m is None:
+        return None
+
+    # One groups() call instead of a group() call per name; see INSTRUCTION_PATTERN.
+    insert_line, content, start, end = m.groups()
+    if insert_line is not None:
+        # content is already minus at most one leading space
+        return InsertInstruction(int(insert_line), content)
+
+    start = int(start)
+    if end is None:
+        return DeleteInstruction(start)
+    if start <= int(end):  # ignore invalid “15-10” style ranges
+        return DeleteInstruction(start, int(end))
+    return None
+
+
+class InstructionStreamParser:
+    """
+    Push-based counterpart of `parse_instructions` for streamed completions.
+
+    Feed it text chunks as they arrive (split anywhere, even mid-line or
+    mid-number); each call returns the instructions whose lines were
+    completed by that chunk. Call `close()` once the stream ends to flush
+    the last line. The concatenated output always equals
+    ``parse_instructions(<all chunks joined>)``:
+
+    * An ``ERROR:`` reply is detected from its first non-blank line, after
+      which everything is swallowed and `is_error` is set.
+    * ``NO CHANGES`` lines never match an instruction, so they yield nothing.
+    """
+
+    def __init__(self) -> None:
+        self._pending = ""
+        self._seen_content = False
+        self.is_error = False
+        self.closed = False
+
+    def feed(self, chunk: str) -> List[ParsedInstruction]:
+        """Consume a chunk and return any instructions it completed."""
+        if self.closed:
+            raise ValueError("feed() called on a closed InstructionStreamParser.")
+        if self.is_error or not chunk:
+            return []
+
+        text = self._pending + chunk
+        # Hold back the trailing partial line. A final "\r" may still be the
+        # first half of a "\r\n" pair, so that line is held back as well.
+        last = text.splitlines(keepends=True)[-1]
+        if last[-1] == "\r" or last.splitlines() == [last]:
+            self._pending = last
+            text = text[:len(text) - len(last)]
+        else:
+            self._pending = ""
+        return self._parse_lines(text.splitlines())
+
+    def close(self) -> List[ParsedInstruction]:
+        """Flush the final, unterminated line at the end of the stream."""
+        if self.closed:
+            return []
+        self.closed = True
+        text, self._pending = self._pending, ""
+        if self.is_error or not text:
+            return []
+        return self._parse_lines(text.splitlines())
+
+    def _parse_lines(self, lines: List[str]) -> List[ParsedInstruction]:
+        parsed_ops: List[ParsedInstruction] = []
+        for line in lines:
+            if not self._seen_content:
+                stripped = line.strip()
+                if not stripped:
+                    continue
+                self._seen_content = True
+                if stripped.upper().startswith("ERROR:"):
+                    self.is_error = True
+                    return []
+            op = _parse_line(line)
+            if op is not None:
+                parsed_ops.append(op)
+        return parsed_ops
+
+
+def iter_parse_instructions(chunks: Iterable[str]) -> Iterator[ParsedInstruction]:
+    """Lazily parse a stream of text chunks, yielding each instruction as soon as its line is complete."""
+    parser = InstructionStreamParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
@@ -0,0 +1,111 @@
+# src/core/pipeline.py
+"""
+The original + suggestion -> modified code flow shared by the CLI and UI.
+
+Complete-file suggestions are diffed locally (`src.core.differ`); only
+partial snippets go to the reasoning model. The model is reached through an
+`agent_factory` so callers that never need it (or have no API key) never
+construct one.
+"""
+from dataclasses import dataclass, field
+from typing import Callable, List, Literal, Optional, Protocol
+
+from src.core.differ import format_instructions, try_local_diff
+from src.core.injector import apply_instructions
+from src.core.parser import NO_CHANGES_PATTERN, ParsedInstruction, parse_instructions
+from src.core.validator import ValidationReport, validate_instructions
+from src.models.document import split_lines
+from src.utils.tracing import span
+
+
+class InstructionSource(Protocol):
+    """Anything with `ReasoningAgent.get_instructions`’ signature."""
+
+    def get_instructions(self, original_code: str, ai_suggestion: str) -> str: ...
+
+
+@dataclass
+class PipelineResult:
+    modified_code: Optional[str]
+    raw_instructions: str
+    instructions: List[ParsedInstruction] = field(default_factory=list)
+    source: Literal["local", "ai"] = "local"
+    error: Optional[str] = None  # an ``ERROR: …`` string when no result could be produced
+    validation: Optional[ValidationReport] = None  # problems found in a model reply's instructions
+
+
+def process_pair(
+    original_code: str,
+    suggested_code: str,
+    agent_factory: Optional[Callable[[], InstructionSource]] = None,
+    use_local_diff: bool = True,
+) -> PipelineResult:
+    """
+    Produce the modified code for one (original, suggestion) pair.
+
+    Args:
+        original_code: The original code.
+        suggested_code: The AI suggestion, either a complete file or a snippet.
+        agent_factory: Called (once) only if the model is needed.
+        use_local_diff: Set to False to always ask the model.
+
+    Pass `Document`s (as the CLI, server and UI do) so the local diff, the
+    agent's prompt and the injector share one split of each text; plain
+    strings are not copied into documents here.
+    """
+    if use_local_diff:
+        with span("local_diff", original_chars=len(original_code), suggestion_chars=len(suggested_code)) as s:
+            instructions = try_local_diff(original_code, suggested_code)
+            s.set(complete=instructions is not None)
+        if instructions is not None:
+            return PipelineResult(
+                modified_code=_apply(original_code, instructions),
+                raw_instructions=format_instructions(instructions),
+                instructions=instructions,
+                source="local",
+            )
+
+    if agent_factory is None:
+        error = "ERROR: suggestion is a partial snippet and no reasoning agent is available."
+        return PipelineResult(modified_code=None, raw_instructions="", source="ai", error=error)
+
+    raw_instructions = agent_factory().get_instructions(original_code, suggested_code)
+    return apply_raw_instructions(original_code, raw_instructions)
+
+
+def apply_raw_instructions(original_code: str, raw_instructions: str) -> PipelineResult:
+    """Parse a model reply and apply it to `original_code`."""
+    if raw_instructions.startswith("ERROR:") or not raw_instructions.strip():
+        error = raw_instructions if raw_instructions.strip() else "ERROR: AI returned empty content."
+        return PipelineResult(modified_code=None, raw_instructions=raw_instructions, source="ai", error=error)
+    if NO_CHANGES_PATTERN.fullmatch(raw_instructions.strip()):
+        return PipelineResult(modified_code=original_code, raw_instructions=raw_instructions, source="ai")
+
+    with span("parse_instructions", input_chars=len(raw_instructions)) as s:
+        instructions = parse_instructions(raw_instructions)
+        s.set(instructions=len(instructions))
+    if not instructions:
+        return PipelineResult(
+            modified_code=None,
+            raw_instructions=raw_instructions,
+            source="ai",
+            error="ERROR: failed to parse instructions.",
+        )
+    # Local diffs are valid by construction; only model replies are checked.
+    with span("validate_instructions", instructions=len(instructions)) as s:
+        validation = validate_instructions(instructions, len(split_lines(original_code)))
+        s.set(errors=len(validation.errors), warnings=len(validation.warnings))
+    return PipelineResult(
+        modified_code=_apply(original_code, instructions),
+        raw_instructions=raw_instructions,
+        instructions=instructions,
+        source="ai",
+        validation=validation,
+    )
+
+
+def _apply(original_code: str, instructions: List[ParsedInstruction]) -> str:
+    with span("apply_instructions", input_chars=len(original_code), instructions=len(instructions)) as s:
+        modified_code = apply_instructions(original_code, instructions)
+        s.set(output_chars=len(modified_code))
+    return modified_code
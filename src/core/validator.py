@@ -0,0 +1,208 @@
+# src/core/validator.py
+"""
+Validation of an instruction list against the file it will be applied to.
+
+`apply_instructions` never fails: it drops out-of-range inserts, clips and
+merges overlapping deletes and places inserts that fall inside a deleted
+range where the range was. That is the right behaviour for applying, but
+it hides model mistakes. `validate_instructions` reports them, in
+O(n log n) for n instructions: one sort of the deletes, one of the inserts,
+and a bisect per insert into the merged delete ranges.
+
+Errors (the script is likely wrong; ``--strict`` rejects it):
+
+* ``out_of_bounds``      -- an INSERT outside 1..num_lines + 1, or a DELETE
+  reaching outside 1..num_lines;
+* ``invalid_range``      -- a DELETE whose end is before its start;
+* ``overlapping_delete`` -- two DELETEs sharing at least one line.
+
+Warnings (applied deterministically, but worth a look):
+
+* ``duplicate_insert``        -- the same non-blank content inserted twice before one line;
+* ``insert_in_deleted_range`` -- an INSERT before line L of a DELETE s-e with s < L <= e.
+"""
+from bisect import bisect_right
+from dataclasses import asdict, dataclass, field
+from itertools import islice
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from src.core.injector import Instructions
+from src.core.parser import InsertInstruction
+from src.models.instruction_batch import InstructionBatch
+
+IssueKind = Literal[
+    "out_of_bounds", "invalid_range", "overlapping_delete", "duplicate_insert", "insert_in_deleted_range"
+]
+ERROR_KINDS = frozenset({"out_of_bounds", "invalid_range", "overlapping_delete"})
+MAX_ISSUES_SHOWN = 10
+
+
+@dataclass(frozen=True)
+class ValidationIssue:
+    kind: IssueKind
+    index: int  # position of the offending instruction in the list (0-indexed)
+    message: str
+    other: Optional[int] = None  # position of the instruction it conflicts with, if any
+
+    @property
+    def severity(self) -> Literal["error", "warning"]:
+        return "error" if self.kind in ERROR_KINDS else "warning"
+
+
+@dataclass
+class ValidationReport:
+    num_lines: int
+    instructions: int
+    issues: List[ValidationIssue] = field(default_factory=list)
+
+    @property
+    def errors(self) -> List[ValidationIssue]:
+        return [issue for issue in self.issues if issue.severity == "error"]
+
+    @property
+    def warnings(self) -> List[ValidationIssue]:
+        return [issue for issue in self.issues if issue.severity == "warning"]
+
+    @property
+    def ok(self) -> bool:
+        """True if there are no errors (warnings allowed)."""
+        return not any(issue.severity == "error" for issue in self.issues)
+
+    def counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for issue in self.issues:
+            counts[issue.kind] = counts.get(issue.kind, 0) + 1
+        return counts
+
+    def summary(self, limit: int = MAX_ISSUES_SHOWN) -> str:
+        if not self.issues:
+            return f"Validation: {self.instructions} instructions, no issues."
+        counts = ", ".join(f"{count} {kind}" for kind, count in sorted(self.counts().items()))
+        lines = [
+            f"Validation: {self.instructions} instructions, {len(self.errors)} errors, "
+            f"{len(self.warnings)} warnings ({counts})"
+        ]
+        for issue in sorted(self.issues, key=lambda issue: issue.index)[:limit]:
+            lines.append(f"  {issue.severity}: #{issue.index + 1} {issue.message}")
+        if len(self.issues) > limit:
+            lines.append(f"  ... and {len(self.issues) - limit} more")
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "num_lines": self.num_lines,
+            "instructions": self.instructions,
+            "ok": self.ok,
+            "counts": self.counts(),
+            "issues": [asdict(issue) for issue in self.issues],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ValidationReport":
+        """Inverse of `to_dict` (``ok`` and ``counts`` are derived, so they are ignored)."""
+        return cls(
+            num_lines=data["num_lines"],
+            instructions=data["instructions"],
+            issues=[ValidationIssue(**issue) for issue in data.get("issues", [])],
+        )
+
+
+# (line_start, line_end, position) / (line_before, content, position)
+_Delete = Tuple[int, int, int]
+_Insert = Tuple[int, str, int]
+
+
+def _split(instructions: Instructions) -> Tuple[List[_Delete], List[_Insert]]:
+    deletes: List[_Delete] = []
+    inserts: List[_Insert] = []
+    if isinstance(instructions, InstructionBatch):
+        content, offsets, insert = instructions.content, instructions.offsets, InstructionBatch.INSERT
+        spans = instructions.delete_spans()
+        columns = zip(instructions.ops, instructions.lines, offsets, islice(offsets, 1, None))
+        for index, (op, line, lo, hi) in enumerate(columns):
+            if op == insert:
+                inserts.append((line, content[lo:hi], index))
+            else:
+                start, end = next(spans)
+                deletes.append((start, end, index))
+        return deletes, inserts
+    for index, instruction in enumerate(instructions):
+        if isinstance(instruction, InsertInstruction):
+            inserts.append((instruction.line_before, instruction.content, index))
+        else:
+            end = instruction.line_end if instruction.line_end is not None else instruction.line_start
+            deletes.append((instruction.line_start, end, index))
+    return deletes, inserts
+
+
+def _deleted_ranges(deletes: List[_Delete], num_lines: int) -> List[Tuple[int, int]]:
+    """
+    The deletes clipped to 1..num_lines, sorted, with only *overlapping* ones
+    merged. Unlike `merge_delete_ranges`, adjacent ranges stay apart: an insert
+    between "DELETE a-(L-1)" and "DELETE L-x" is a plain replacement.
+    """
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted((max(start, 1), min(end, num_lines)) for start, end, _ in deletes):
+        if start > end:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _describe_delete(start: int, end: int) -> str:
+    return f"DELETE {start}" if start == end else f"DELETE {start}-{end}"
+
+
+def validate_instructions(instructions: Instructions, num_lines: int) -> ValidationReport:
+    """Check `instructions` against a file of `num_lines` lines; see the module docstring for the checks."""
+    deletes, inserts = _split(instructions)
+    report = ValidationReport(num_lines=num_lines, instructions=len(deletes) + len(inserts))
+    issues = report.issues
+
+    # Deletes: bounds, then one sweep in start order for overlaps.
+    for start, end, index in deletes:
+        if end < start:
+            issues.append(ValidationIssue("invalid_range", index, f"{_describe_delete(start, end)} ends before it starts"))
+        elif start < 1 or end > num_lines:
+            issues.append(ValidationIssue(
+                "out_of_bounds", index, f"{_describe_delete(start, end)} reaches outside lines 1-{num_lines}"
+            ))
+    furthest_end, furthest_index = 0, -1
+    for start, end, index in sorted(d for d in deletes if d[0] <= d[1]):
+        if furthest_index >= 0 and start <= furthest_end:
+            issues.append(ValidationIssue(
+                "overlapping_delete", index,
+                f"{_describe_delete(start, end)} overlaps instruction #{furthest_index + 1}",
+                other=furthest_index,
+            ))
+        if end > furthest_end or furthest_index < 0:
+            furthest_end, furthest_index = end, index
+
+    # Inserts: bounds, duplicates (adjacent after sorting), position inside a deleted range.
+    ranges = _deleted_ranges(deletes, num_lines)
+    range_starts = [start for start, _ in ranges]
+    previous: Optional[_Insert] = None
+    for line, content, index in sorted(inserts):
+        if not 1 <= line <= num_lines + 1:
+            issues.append(ValidationIssue(
+                "out_of_bounds", index, f"INSERT {line} is outside lines 1-{num_lines + 1}; it would be dropped"
+            ))
+        elif previous is not None and previous[0] == line and previous[1] == content and content.strip():
+            issues.append(ValidationIssue(
+                "duplicate_insert", index,
+                f"INSERT {line} repeats instruction #{previous[2] + 1}: {content.strip()[:60]!r}",
+                other=previous[2],
+            ))
+        at = bisect_right(range_starts, line) - 1
+        if at >= 0 and ranges[at][0] < line <= ranges[at][1]:
+            issues.append(ValidationIssue(
+                "insert_in_deleted_range", index,
+                f"INSERT {line} falls inside deleted lines {ranges[at][0]}-{ranges[at][1]}; "
+                f"it is placed where the deleted lines were",
+            ))
+        previous = (line, content, index)
+    return report
@@ -0,0 +1,142 @@
+# src/models/document.py
+"""
+Text that is split into lines once and shared by every pipeline stage.
+
+`Document` is a `str` subclass, so it can be passed anywhere a string is
+expected (agents, fakes, caches, files) and compares and hashes like its
+text. On first use it keeps:
+
+* `lines` — the ``splitlines()`` list, shared rather than re-split;
+* `line_starts` — the character offset of every line in an ``array('q')``,
+  for mapping line numbers to text positions;
+* `numbered()` — the ``"N: line"`` view the model prompts use.
+
+`line(n)` is O(1) and `view(start, end)` returns a `LineView` over a range of
+lines without copying them. Stages that split text call `split_lines`, which
+reuses a document's lines and falls back to ``splitlines()`` for plain strings.
+Callers must treat `lines` as read-only.
+"""
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence, Union, overload
+
+
+class Document(str):
+    """A string that remembers its lines, line offsets and numbered form."""
+
+    def __new__(cls, text: str = "") -> "Document":
+        if isinstance(text, cls):  # already a document: keep its caches
+            return text
+        return super().__new__(cls, text)
+
+    def __init__(self, text: str = "") -> None:
+        if "_lines" not in self.__dict__:  # __init__ runs again when __new__ returned `text` itself
+            self._lines: Optional[List[str]] = None
+            self._starts: Optional[array] = None
+            self._numbered: Dict[int, str] = {}
+
+    # ------------------------------------------------------------------ #
+    @property
+    def lines(self) -> List[str]:
+        """``self.splitlines()``, computed once."""
+        if self._lines is None:
+            self._lines = self.splitlines()
+        return self._lines
+
+    @property
+    def line_count(self) -> int:
+        return len(self.lines)
+
+    def line(self, number: int) -> str:
+        """1-indexed line `number`."""
+        if not 1 <= number <= len(self.lines):
+            raise IndexError(f"line {number} out of range 1..{len(self.lines)}")
+        return self.lines[number - 1]
+
+    @property
+    def line_starts(self) -> array:
+        """Offset of the first character of every line, plus ``len(self)`` at the end."""
+        if self._starts is None:
+            starts = array("q")
+            position = 0
+            for line in self.lines:
+                starts.append(position)
+                position += len(line)
+                # Step over the line break; "\r\n" is the only two-character one.
+                position += 2 if self.startswith("\r\n", position) else 1
+            starts.append(len(self))
+            self._starts = starts
+        return self._starts
+
+    def view(self, start: int = 1, end: Optional[int] = None) -> "LineView":
+        """1-indexed, inclusive lines `start`..`end` (default: to the last line), without copying."""
+        count = len(self.lines)
+        end = count if end is None else min(end, count)
+        start = max(start, 1)
+        return LineView(self, start - 1, max(end, start - 1))
+
+    def numbered(self, start: int = 1) -> str:
+        """Every line prefixed with its number, ``"1: …\\n2: …"``, cached per `start`."""
+        numbered = self._numbered.get(start)
+        if numbered is None:
+            numbered = self._numbered[start] = "\n".join(f"{i}: {line}" for i, line in enumerate(self.lines, start))
+        return numbered
+
+    def __reduce__(self):
+        # Pickle as the plain text; caches are rebuilt on the other side.
+        return (Document, (str(self),))
+
+
+class LineView(Sequence[str]):
+    """A range of a document's lines; indexing and iteration read the document's list directly."""
+
+    __slots__ = ("document", "start", "stop")
+
+    def __init__(self, document: Document, start: int, stop: int) -> None:
+        self.document = document
+        self.start = start  # 0-indexed, end-exclusive into document.lines
+        self.stop = stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+    @overload
+    def __getitem__(self, index: slice) -> "LineView": ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            lo, hi, step = index.indices(len(self))
+            if step != 1:
+                return self.document.lines[self.start + lo:self.start + hi:step]
+            return LineView(self.document, self.start + lo, self.start + max(hi, lo))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("LineView index out of range")
+        return self.document.lines[self.start + index]
+
+    def __iter__(self) -> Iterator[str]:
+        lines = self.document.lines
+        for index in range(self.start, self.stop):
+            yield lines[index]
+
+    @property
+    def text(self) -> str:
+        """The lines as they appear in the document, line breaks between them included."""
+        if self.stop <= self.start:
+            return ""
+        starts = self.document.line_starts
+        end = starts[self.stop - 1] + len(self.document.lines[self.stop - 1])
+        return str(self.document[starts[self.start]:end])
+
+    def numbered(self) -> str:
+        """The lines prefixed with their numbers in the document."""
+        return "\n".join(f"{i}: {line}" for i, line in enumerate(self, self.start + 1))
+
+
+def split_lines(text: Union[str, Document]) -> List[str]:
+    """``text.splitlines()``, reusing a document's lines. Do not modify the result."""
+    if isinstance(text, Document):
+        return text.lines
+    return text.splitlines()
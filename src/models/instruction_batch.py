@@ -0,0 +1,179 @@
+# src/models/instruction_batch.py
+"""
+Columnar storage for large INSERT / DELETE scripts.
+
+A list of instruction objects costs an object header, a pointer and a
+separate string per instruction. `InstructionBatch` stores the same script as
+three typed arrays (opcode, first line, last line) plus all INSERT content in
+one string, addressed by an array of offsets. `InstructionBatch.parse` fills
+the columns straight from the reply text without creating instruction
+objects, and `apply_instructions` / `map_line_changes` read the columns
+directly. Iterating a batch yields ordinary `InsertInstruction` /
+`DeleteInstruction` objects, so code written for lists keeps working.
+"""
+import sys
+from array import array
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple, Union, overload
+
+from src.core.parser import (
+    INSTRUCTION_PATTERN,
+    DeleteInstruction,
+    InsertInstruction,
+    ParsedInstruction,
+    has_instructions,
+)
+
+_MAX_LINE = 2**63 - 1
+_NO_END = -(2**63)  # `ends` value of an INSERT or a single-line DELETE
+
+
+def _clamp(line: int) -> int:
+    # Any line number too large for the array is out of range for every file anyway.
+    return line if line <= _MAX_LINE else _MAX_LINE
+
+
+class InstructionBatch:
+    """An instruction script as typed arrays: opcodes, line numbers and offsets into one content string."""
+
+    INSERT = 0
+    DELETE = 1
+
+    __slots__ = ("ops", "lines", "ends", "offsets", "_pending", "_content")
+
+    def __init__(self, instructions: Iterable[ParsedInstruction] = ()) -> None:
+        self.ops = array("b")
+        self.lines = array("q")  # line_before of an INSERT, line_start of a DELETE
+        self.ends = array("q")  # line_end of a ranged DELETE, else _NO_END
+        self.offsets = array("q", [0])  # content of instruction i is content[offsets[i]:offsets[i + 1]]
+        self._content = ""
+        self._pending: List[str] = []  # content appended since `_content` was last joined
+        for instruction in instructions:
+            self.append(instruction)
+
+    @classmethod
+    def parse(cls, instruction_string: str) -> "InstructionBatch":
+        """`parse_instructions`, straight into columns."""
+        batch = cls()
+        if not has_instructions(instruction_string):
+            return batch
+        match = INSTRUCTION_PATTERN.match
+        for line in instruction_string.splitlines():
+            m = match(line)
+            if m is None:
+                continue
+            insert_line, content, start, end = m.groups()
+            if insert_line is not None:
+                batch.append_insert(int(insert_line), content)
+                continue
+            start = int(start)
+            if end is None:
+                batch.append_delete(start)
+            elif start <= int(end):  # ignore invalid “15-10” style ranges, like the parser
+                batch.append_delete(start, int(end))
+        batch.content  # join the content now, so the batch holds one string rather than one per line
+        return batch
+
+    # ------------------------------------------------------------------ #
+    # Building
+    # ------------------------------------------------------------------ #
+    def append_insert(self, line_before: int, content: str) -> None:
+        self.ops.append(self.INSERT)
+        self.lines.append(_clamp(line_before))
+        self.ends.append(_NO_END)
+        self._pending.append(content)
+        self.offsets.append(self.offsets[-1] + len(content))
+
+    def append_delete(self, line_start: int, line_end: Optional[int] = None) -> None:
+        self.ops.append(self.DELETE)
+        self.lines.append(_clamp(line_start))
+        self.ends.append(_NO_END if line_end is None else _clamp(line_end))
+        self.offsets.append(self.offsets[-1])
+
+    def append(self, instruction: ParsedInstruction) -> None:
+        if isinstance(instruction, InsertInstruction):
+            self.append_insert(instruction.line_before, instruction.content)
+        else:
+            self.append_delete(instruction.line_start, instruction.line_end)
+
+    def extend(self, instructions: Iterable[ParsedInstruction]) -> None:
+        for instruction in instructions:
+            self.append(instruction)
+
+    # ------------------------------------------------------------------ #
+    # Reading
+    # ------------------------------------------------------------------ #
+    @property
+    def content(self) -> str:
+        """All INSERT content, concatenated in instruction order."""
+        if self._pending:
+            self._content += "".join(self._pending)
+            self._pending.clear()
+        return self._content
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the columns and the content string."""
+        arrays = sum(column.itemsize * len(column) for column in (self.ops, self.lines, self.ends, self.offsets))
+        return arrays + sys.getsizeof(self.content)
+
+    def __len__(self) -> int:
+        return len(self.ops)
+
+    def _instruction(self, op: int, line: int, end: int, lo: int, hi: int, content: str) -> ParsedInstruction:
+        if op == self.INSERT:
+            return InsertInstruction(line_before=line, content=content[lo:hi])
+        return DeleteInstruction(line_start=line, line_end=None if end == _NO_END else end)
+
+    @overload
+    def __getitem__(self, index: int) -> ParsedInstruction: ...
+    @overload
+    def __getitem__(self, index: slice) -> "InstructionBatch": ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[ParsedInstruction, "InstructionBatch"]:
+        if isinstance(index, slice):
+            return InstructionBatch(self[i] for i in range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("InstructionBatch index out of range")
+        return self._instruction(
+            self.ops[index], self.lines[index], self.ends[index],
+            self.offsets[index], self.offsets[index + 1], self.content,
+        )
+
+    def __iter__(self) -> Iterator[ParsedInstruction]:
+        content = self.content
+        for op, line, end, lo, hi in zip(self.ops, self.lines, self.ends, self.offsets, islice(self.offsets, 1, None)):
+            yield self._instruction(op, line, end, lo, hi, content)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, InstructionBatch):
+            return (self.ops, self.lines, self.ends, self.offsets, self.content) == \
+                (other.ops, other.lines, other.ends, other.offsets, other.content)
+        if isinstance(other, list):
+            return len(other) == len(self) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None  # mutable
+
+    def __repr__(self) -> str:
+        return f"InstructionBatch({len(self)} instructions, {len(self.content)} content chars)"
+
+    # ------------------------------------------------------------------ #
+    # Column access for the injector
+    # ------------------------------------------------------------------ #
+    def delete_spans(self) -> Iterator[Tuple[int, int]]:
+        """(line_start, line_end) of every DELETE, in order, with single-line deletes as (n, n)."""
+        delete = self.DELETE
+        for op, line, end in zip(self.ops, self.lines, self.ends):
+            if op == delete:
+                yield line, line if end == _NO_END else end
+
+    def insert_items(self) -> Iterator[Tuple[int, str]]:
+        """(line_before, content) of every INSERT, in order."""
+        insert = self.INSERT
+        content = self.content
+        for op, line, lo, hi in zip(self.ops, self.lines, self.offsets, islice(self.offsets, 1, None)):
+            if op == insert:
+                yield line, content[lo:hi]
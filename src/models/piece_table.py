@@ -0,0 +1,200 @@
+# src/models/piece_table.py
+"""
+Line-based piece table: apply instruction lists to a large file in time
+proportional to the number of edits, with undo / redo.
+
+The text is never rebuilt on `apply`. It is described by a list of pieces,
+each a run of lines in one of two buffers: the original lines (never
+modified) and an append-only buffer of inserted lines. Applying instructions
+appends their content to the add buffer and splits or replaces only the
+pieces the edits touch. A step costs O(edits × log pieces) plus one pass
+over the piece list to re-index it, independent of the file's line count.
+
+Each step is stored as the splices it made to the piece list (position,
+pieces removed, pieces inserted), not as a copy of the text, so undo and
+redo replay those splices and memory grows with the edits, not with the
+file. `text` is joined lazily and cached until the next change; the result
+is the same string `apply_instructions` would return.
+"""
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.core.injector import Instructions, group_insertions, merge_delete_ranges
+from src.models.document import split_lines
+
+ORIGINAL = 0
+ADDED = 1
+
+# (buffer, first line in the buffer, number of lines)
+Piece = Tuple[int, int, int]
+# (index in the piece list, pieces removed, pieces inserted)
+Splice = Tuple[int, Tuple[Piece, ...], Tuple[Piece, ...]]
+
+
+class PieceTable:
+    """A document edited by instruction lists, with an undo / redo history of piece splices."""
+
+    def __init__(self, text: str = "") -> None:
+        original = split_lines(text)
+        self._buffers: Tuple[List[str], List[str]] = (original, [])
+        self._pieces: List[Piece] = [(ORIGINAL, 0, len(original))] if original else []
+        self._ends: List[int] = []  # cumulative line count at the end of each piece
+        self._undo: List[List[Splice]] = []
+        self._redo: List[List[Splice]] = []
+        self._text: Optional[str] = None
+        self._reindex()
+
+    # ------------------------------------------------------------------ #
+    # Reading
+    # ------------------------------------------------------------------ #
+    @property
+    def line_count(self) -> int:
+        return self._ends[-1] if self._ends else 0
+
+    def __len__(self) -> int:
+        return self.line_count
+
+    def line(self, number: int) -> str:
+        """1-indexed line `number`, found by bisecting the pieces."""
+        if not 1 <= number <= self.line_count:
+            raise IndexError(f"line {number} out of range 1..{self.line_count}")
+        index = bisect_right(self._ends, number - 1)
+        buffer, start, length = self._pieces[index]
+        return self._buffers[buffer][start + (number - 1) - (self._ends[index] - length)]
+
+    def iter_lines(self) -> Iterator[str]:
+        for buffer, start, length in self._pieces:
+            yield from self._buffers[buffer][start:start + length]
+
+    @property
+    def text(self) -> str:
+        """The current text, joined on first access after a change."""
+        if self._text is None:
+            self._text = "\n".join(self.iter_lines())
+        return self._text
+
+    @property
+    def piece_count(self) -> int:
+        return len(self._pieces)
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    # ------------------------------------------------------------------ #
+    # Editing
+    # ------------------------------------------------------------------ #
+    def apply(self, instructions: Instructions) -> None:
+        """
+        Apply instructions numbered against the current text, as
+        `apply_instructions` would, and push the step onto the undo stack.
+        Clears the redo stack. A step that changes nothing is not recorded.
+        """
+        num_lines = self.line_count
+        delete_ranges = merge_delete_ranges(instructions, num_lines)
+        insertions = group_insertions(instructions, num_lines)
+        step: List[Splice] = []
+        # Right to left, so the piece indices and line numbers of the edits still to come stay valid.
+        for position, count, lines in reversed(_edits(delete_ranges, insertions)):
+            step.append(self._splice(position, count, lines))
+        if not step:
+            return
+        self._undo.append(step)
+        self._redo.clear()
+        self._reindex()
+
+    def undo(self) -> bool:
+        """Revert the last applied step; False if there is none."""
+        if not self._undo:
+            return False
+        step = self._undo.pop()
+        for index, removed, inserted in reversed(step):
+            self._pieces[index:index + len(inserted)] = removed
+        self._redo.append(step)
+        self._reindex()
+        return True
+
+    def redo(self) -> bool:
+        """Re-apply the last undone step; False if there is none."""
+        if not self._redo:
+            return False
+        step = self._redo.pop()
+        for index, removed, inserted in step:
+            self._pieces[index:index + len(removed)] = inserted
+        self._undo.append(step)
+        self._reindex()
+        return True
+
+    # ------------------------------------------------------------------ #
+    def _splice(self, position: int, count: int, lines: List[str]) -> Splice:
+        """
+        Replace `count` lines from 0-indexed `position` with `lines`.
+
+        `_ends` is only rebuilt once per step, so it is stale after the first
+        splice; it stays correct before the last splice's piece, and edits run
+        right to left, so piece starts are read from the end of the piece before.
+        """
+        added: Tuple[Piece, ...] = ()
+        if lines:
+            add_buffer = self._buffers[ADDED]
+            added = ((ADDED, len(add_buffer), len(lines)),)
+            add_buffer.extend(lines)
+
+        first = bisect_right(self._ends, position)  # piece containing `position`, or len(pieces) at the end
+        if first >= len(self._pieces):
+            self._pieces.extend(added)
+            return first, (), added
+
+        replacement: List[Piece] = []
+        buffer, start, length = self._pieces[first]
+        offset = position - self._piece_start(first)
+        if offset:
+            replacement.append((buffer, start, offset))
+        last = first
+        if count:
+            last = bisect_right(self._ends, position + count - 1)
+            buffer, start, length = self._pieces[last]
+            offset = position + count - self._piece_start(last)
+        replacement.extend(added)
+        if offset < length:
+            replacement.append((buffer, start + offset, length - offset))
+
+        removed = tuple(self._pieces[first:last + 1])
+        self._pieces[first:last + 1] = replacement
+        return first, removed, tuple(replacement)
+
+    def _piece_start(self, index: int) -> int:
+        return self._ends[index - 1] if index else 0
+
+    def _reindex(self) -> None:
+        self._ends = list(accumulate(length for _, _, length in self._pieces))
+        self._text = None
+
+
+def _edits(delete_ranges: List[Tuple[int, int]], insertions: Dict[int, List[str]]) -> List[Tuple[int, int, List[str]]]:
+    """
+    (0-indexed position, lines deleted, lines inserted) edits, left to right,
+    equivalent to `apply_instructions`: content inserted before a deleted line
+    takes that run's place, in line order.
+    """
+    points = sorted(insertions)
+    edits: List[Tuple[int, int, List[str]]] = []
+    point_index = 0
+    for start_line, end_line in delete_ranges:
+        while point_index < len(points) and points[point_index] < start_line:
+            line = points[point_index]
+            edits.append((line - 1, 0, insertions[line]))
+            point_index += 1
+        content: List[str] = []
+        while point_index < len(points) and points[point_index] <= end_line:
+            content.extend(insertions[points[point_index]])
+            point_index += 1
+        edits.append((start_line - 1, end_line - start_line + 1, content))
+    for line in points[point_index:]:
+        edits.append((line - 1, 0, insertions[line]))
+    return edits
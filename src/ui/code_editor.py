@@ -0,0 +1,234 @@
+# src/ui/code_editor.py
+"""
+Code views for large documents.
+
+`CodeEditor` is a `QPlainTextEdit` (block-based layout, so documents with
+hundreds of thousands of lines stay fast) with a line-number gutter and line
+highlights. Highlights are stored as sorted line ranges and only turned into
+extra selections for the blocks currently on screen, recomputed as the view
+scrolls.
+
+`DiffView` puts the original and the result side by side, highlighting the
+lines the instructions delete and insert, with the two sides scrolled together.
+"""
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PySide6.QtCore import QRect, QSize, Qt, Slot
+from PySide6.QtGui import QColor, QFontDatabase, QPainter, QTextCursor, QTextFormat
+from PySide6.QtWidgets import QLabel, QPlainTextEdit, QSplitter, QTextEdit, QVBoxLayout, QWidget
+
+from src.core.injector import map_line_changes
+from src.core.parser import ParsedInstruction
+from src.models.document import split_lines
+
+HIGHLIGHT_COLORS: Dict[str, QColor] = {
+    "inserted": QColor("#ccf2d0"),
+    "deleted": QColor("#f7d0d0"),
+}
+
+
+class _LineNumberArea(QWidget):
+    def __init__(self, editor: "CodeEditor") -> None:
+        super().__init__(editor)
+        self._editor = editor
+
+    def sizeHint(self) -> QSize:
+        return QSize(self._editor.line_number_area_width(), 0)
+
+    def paintEvent(self, event) -> None:
+        self._editor.paint_line_numbers(event)
+
+
+class CodeEditor(QPlainTextEdit):
+    """Monospace, non-wrapping plain-text editor with a line-number gutter."""
+
+    def __init__(self, parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self._line_number_area = _LineNumberArea(self)
+        # Sorted, disjoint, 1-indexed inclusive (start, end, kind) ranges.
+        self._highlights: List[Tuple[int, int, str]] = []
+        self._highlight_starts: List[int] = []
+        self._highlighted_range: Optional[Tuple[int, int]] = None
+
+        self.blockCountChanged.connect(self._update_line_number_area_width)
+        self.updateRequest.connect(self._on_update_request)
+        self._update_line_number_area_width()
+
+    # ------------------------------------------------------------------ #
+    # Gutter
+    # ------------------------------------------------------------------ #
+    def line_number_area_width(self) -> int:
+        digits = len(str(max(1, self.blockCount())))
+        return 8 + self.fontMetrics().horizontalAdvance("9") * digits
+
+    @Slot()
+    def _update_line_number_area_width(self, *_args) -> None:
+        self.setViewportMargins(self.line_number_area_width(), 0, 0, 0)
+
+    @Slot(QRect, int)
+    def _on_update_request(self, rect: QRect, dy: int) -> None:
+        if dy:
+            self._line_number_area.scroll(0, dy)
+        else:
+            self._line_number_area.update(0, rect.y(), self._line_number_area.width(), rect.height())
+        if rect.contains(self.viewport().rect()):
+            self._update_line_number_area_width()
+        self._refresh_highlights()
+
+    def resizeEvent(self, event) -> None:
+        super().resizeEvent(event)
+        contents = self.contentsRect()
+        self._line_number_area.setGeometry(
+            QRect(contents.left(), contents.top(), self.line_number_area_width(), contents.height())
+        )
+        self._refresh_highlights()
+
+    def paint_line_numbers(self, event) -> None:
+        painter = QPainter(self._line_number_area)
+        painter.fillRect(event.rect(), self.palette().alternateBase())
+        painter.setPen(self.palette().placeholderText().color())
+        block = self.firstVisibleBlock()
+        top = round(self.blockBoundingGeometry(block).translated(self.contentOffset()).top())
+        bottom = top + round(self.blockBoundingRect(block).height())
+        width = self._line_number_area.width() - 4
+        height = self.fontMetrics().height()
+        while block.isValid() and top <= event.rect().bottom():
+            if block.isVisible() and bottom >= event.rect().top():
+                painter.drawText(0, top, width, height, Qt.AlignmentFlag.AlignRight, str(block.blockNumber() + 1))
+            block = block.next()
+            top = bottom
+            bottom = top + round(self.blockBoundingRect(block).height())
+        painter.end()
+
+    # ------------------------------------------------------------------ #
+    # Highlights
+    # ------------------------------------------------------------------ #
+    def set_line_highlights(self, ranges: Iterable[Tuple[int, int]], kind: str) -> None:
+        """Highlight 1-indexed inclusive line ranges (replacing earlier ones) with `kind`'s colour."""
+        self._highlights = sorted((start, end, kind) for start, end in ranges if start <= end)
+        self._highlight_starts = [start for start, _, _ in self._highlights]
+        self._highlighted_range = None
+        self._refresh_highlights()
+
+    def clear_line_highlights(self) -> None:
+        self.set_line_highlights([], "")
+
+    def visible_block_range(self) -> Tuple[int, int]:
+        """0-indexed numbers of the first and last block at least partly on screen."""
+        block = self.firstVisibleBlock()
+        first = last = block.blockNumber()
+        offset = self.contentOffset()
+        height = self.viewport().height()
+        while block.isValid() and self.blockBoundingGeometry(block).translated(offset).top() < height:
+            last = block.blockNumber()
+            block = block.next()
+        return first, last
+
+    def _refresh_highlights(self) -> None:
+        if not self._highlights:
+            if self._highlighted_range != (-1, -1):
+                self._highlighted_range = (-1, -1)
+                self.setExtraSelections([])
+            return
+        first, last = self.visible_block_range()
+        if self._highlighted_range == (first, last):
+            return
+        self._highlighted_range = (first, last)
+
+        selections = []
+        document = self.document()
+        index = max(0, bisect_right(self._highlight_starts, first + 1) - 1)
+        while index < len(self._highlights) and self._highlights[index][0] <= last + 1:
+            start, end, kind = self._highlights[index]
+            for line in range(max(start, first + 1), min(end, last + 1) + 1):
+                block = document.findBlockByNumber(line - 1)
+                if not block.isValid():
+                    break
+                selection = QTextEdit.ExtraSelection()
+                selection.format.setBackground(HIGHLIGHT_COLORS.get(kind, QColor("#fff3b0")))
+                selection.format.setProperty(QTextFormat.Property.FullWidthSelection, True)
+                selection.cursor = QTextCursor(block)
+                selections.append(selection)
+            index += 1
+        self.setExtraSelections(selections)
+
+
+class DiffView(QWidget):
+    """Original (deleted lines highlighted) and result (inserted lines highlighted), scrolled together."""
+
+    def __init__(self, parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        self.original_view = CodeEditor()
+        self.result_view = CodeEditor()
+        for view in (self.original_view, self.result_view):
+            view.setReadOnly(True)
+
+        splitter = QSplitter(Qt.Orientation.Horizontal)
+        for title, view in (("Original", self.original_view), ("Result", self.result_view)):
+            pane = QWidget()
+            pane_layout = QVBoxLayout(pane)
+            pane_layout.setContentsMargins(0, 0, 0, 0)
+            pane_layout.addWidget(QLabel(title))
+            pane_layout.addWidget(view)
+            splitter.addWidget(pane)
+        layout = QVBoxLayout(self)
+        layout.addWidget(splitter)
+
+        self._kept: List[Tuple[int, int, int]] = []
+        self._kept_original_starts: List[int] = []
+        self._kept_result_starts: List[int] = []
+        self._syncing = False
+        self.original_view.verticalScrollBar().valueChanged.connect(self._on_original_scrolled)
+        self.result_view.verticalScrollBar().valueChanged.connect(self._on_result_scrolled)
+
+    def set_diff(self, original_code: str, modified_code: str, instructions: List[ParsedInstruction]) -> None:
+        changes = map_line_changes(len(split_lines(original_code)), instructions)
+        self._kept = changes.kept
+        self._kept_original_starts = [original for original, _, _ in changes.kept]
+        self._kept_result_starts = [result for _, result, _ in changes.kept]
+        self._syncing = True
+        try:
+            self.original_view.setPlainText(original_code)
+            self.result_view.setPlainText(modified_code)
+        finally:
+            self._syncing = False
+        self.original_view.set_line_highlights(changes.deleted, "deleted")
+        self.result_view.set_line_highlights(changes.inserted, "inserted")
+
+    # ------------------------------------------------------------------ #
+    def result_line_for(self, original_line: int) -> int:
+        """Result line shown next to 1-indexed `original_line`; a deleted line maps to just after the kept run before it."""
+        index = bisect_right(self._kept_original_starts, original_line) - 1
+        if index < 0:
+            return 1
+        original_start, result_start, length = self._kept[index]
+        return result_start + min(original_line - original_start, length)
+
+    def original_line_for(self, result_line: int) -> int:
+        """Inverse of `result_line_for`."""
+        index = bisect_right(self._kept_result_starts, result_line) - 1
+        if index < 0:
+            return 1
+        original_start, result_start, length = self._kept[index]
+        return original_start + min(result_line - result_start, length)
+
+    # With no wrapping, a QPlainTextEdit's scroll value is its first visible block.
+    @Slot(int)
+    def _on_original_scrolled(self, value: int) -> None:
+        self._sync(self.result_view, self.result_line_for(value + 1) - 1)
+
+    @Slot(int)
+    def _on_result_scrolled(self, value: int) -> None:
+        self._sync(self.original_view, self.original_line_for(value + 1) - 1)
+
+    def _sync(self, view: CodeEditor, value: int) -> None:
+        if self._syncing:
+            return
+        self._syncing = True
+        try:
+            view.verticalScrollBar().setValue(value)
+        finally:
+            self._syncing = False
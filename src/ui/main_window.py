@@ -1,18 +1,26 @@
 import sys
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget,
-    QVBoxLayout, QHBoxLayout, QTextEdit,
+    QVBoxLayout, QHBoxLayout,
     QPushButton, QDialog, QDialogButtonBox,
-    QSizePolicy
+    QSizePolicy, QCheckBox
 )
-from PySide6.QtCore import Qt, Slot
+from PySide6.QtCore import Qt, QThreadPool, QTimer, Slot
 from PySide6.QtGui import QClipboard
 
+from src.core.incremental import IncrementalDiffer
+from src.core.injector import apply_instructions
+from src.ui.code_editor import CodeEditor, DiffView
+from src.ui.workers import ProcessWorker, default_agent_factory, default_recorder_factory
+
 # Let's define placeholder texts that your app will use
 PLACEHOLDER_ORIGINAL_CODE = "Paste your original code here...\n\n# Example:\ndef hello_world():\n    print(\"Hello, Original World!\")"
 PLACEHOLDER_AI_SUGGESTION = "Paste AI's suggested code or instructions here...\n\n# Example:\n# Replace the print statement in hello_world with:\n# print(\"Hello, AI Enhanced World!\")"
 PLACEHOLDER_MODIFIED_CODE = "Modified code will appear here..."
 
+LIVE_PREVIEW_DEBOUNCE_MS = 300 # Quiet time after the last keystroke before the preview refreshes
+PARTIAL_OUTPUT_INTERVAL_MS = 100 # At most one streamed-output redraw per interval; only the latest is shown
+
 class CodeEditorDialog(QDialog):
     def __init__(self, parent=None, window_title="Edit Code", initial_text=""):
         super().__init__(parent)
@@ -21,9 +29,8 @@ class CodeEditorDialog(QDialog):
 
         self.layout = QVBoxLayout(self)
 
-        self.text_edit = QTextEdit()
+        self.text_edit = CodeEditor() # Line numbers, no wrapping
         self.text_edit.setPlainText(initial_text)
-        self.text_edit.setLineWrapMode(QTextEdit.LineWrapMode.NoWrap) # Good for code
         self.layout.addWidget(self.text_edit)
 
         self.button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
@@ -34,12 +41,53 @@ class CodeEditorDialog(QDialog):
     def get_text(self):
         return self.text_edit.toPlainText()
 
+class DiffDialog(QDialog):
+    def __init__(self, parent=None, original_code="", modified_code="", instructions=()):
+        super().__init__(parent)
+        self.setWindowTitle("Diff")
+        self.setMinimumSize(900, 500)
+
+        self.layout = QVBoxLayout(self)
+        self.diff_view = DiffView()
+        self.diff_view.set_diff(original_code, modified_code, list(instructions))
+        self.layout.addWidget(self.diff_view)
+
+        self.button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        self.button_box.rejected.connect(self.reject)
+        self.layout.addWidget(self.button_box)
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Code_Slinge V1.0 (MVP)")
         self.setGeometry(100, 100, 1000, 700) # X, Y, Width, Height
 
+        # Processing runs on a worker thread; one pair at a time.
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+        self.agent_factory = default_agent_factory
+        self._worker = None
+        self._last_diff = None # (original, modified, instructions) of the last result
+        # Streamed partial output: the latest text waits here until the timer redraws the output once.
+        self._pending_partial = None
+        self._partial_timer = QTimer(self)
+        self._partial_timer.setSingleShot(True)
+        self._partial_timer.setInterval(PARTIAL_OUTPUT_INTERVAL_MS)
+        self._partial_timer.timeout.connect(self._show_pending_partial)
+        # Dataset recording: built on the first feedback click, written from its own thread.
+        self.recorder_factory = default_recorder_factory
+        self._recorder = None
+        self._last_record = None # (original, suggestion, raw instructions, source) of the last processed result
+
+        # Live preview: re-diffs (locally, incrementally) once typing pauses.
+        self._preview_timer = QTimer(self)
+        self._preview_timer.setSingleShot(True)
+        self._preview_timer.setInterval(LIVE_PREVIEW_DEBOUNCE_MS)
+        self._preview_differ = IncrementalDiffer()
+        self._preview_inputs = ("", "") # (original, suggestion) the preview was last computed for
+        self._preview_stale = [True, True] # which of those inputs has been edited since
+        self._preview_output = None # what the preview last put in the output, until anything else changes it
+
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
         self.main_layout = QVBoxLayout(self.central_widget)
@@ -54,12 +102,12 @@ class MainWindow(QMainWindow):
         self.btn_expand_ai_suggestion = QPushButton("Expand AI Suggestion View")
 
         # --- Input Text Areas ---
-        self.txt_original_code = QTextEdit()
+        self.txt_original_code = CodeEditor()
         self.txt_original_code.setPlaceholderText(PLACEHOLDER_ORIGINAL_CODE)
         self.btn_clear_original = QPushButton("Clear")
         self.btn_copy_original = QPushButton("Copy")
 
-        self.txt_ai_suggestion = QTextEdit()
+        self.txt_ai_suggestion = CodeEditor()
         self.txt_ai_suggestion.setPlaceholderText(PLACEHOLDER_AI_SUGGESTION)
         self.btn_clear_ai_suggestion = QPushButton("Clear")
         self.btn_copy_ai_suggestion = QPushButton("Copy")
@@ -71,21 +119,28 @@ class MainWindow(QMainWindow):
         font.setBold(True)
         self.btn_process_code.setFont(font)
         self.btn_process_code.setFixedHeight(50)
+        self.btn_cancel = QPushButton("Cancel")
+        self.btn_cancel.setFixedHeight(50)
+        self.btn_cancel.setEnabled(False)
+        self.chk_live_preview = QCheckBox("Live preview")
+        self.chk_live_preview.setToolTip("Update the output as you type (complete-file suggestions only)")
 
 
         # --- Output Text Area ---
         self.btn_expand_output = QPushButton("Expand Output Code View")
-        self.txt_modified_code = QTextEdit()
+        self.txt_modified_code = CodeEditor()
         self.txt_modified_code.setPlaceholderText(PLACEHOLDER_MODIFIED_CODE)
         self.txt_modified_code.setReadOnly(False) # User wants this editable in expanded view, so keep it editable here too
         self.btn_clear_output = QPushButton("Clear")
         self.btn_copy_output = QPushButton("Copy")
+        self.btn_show_diff = QPushButton("Show Diff")
+        self.btn_show_diff.setEnabled(False) # Enabled once there is a result to compare
 
-        # --- Bottom Placeholder Buttons ---
-        self.btn_ai_did_good = QPushButton("AI Did Good (Placeholder)")
-        self.btn_ai_did_bad = QPushButton("AI Did Bad (Placeholder)")
-        self.btn_ai_did_good.setEnabled(False) # Disabled for now
-        self.btn_ai_did_bad.setEnabled(False)  # Disabled for now
+        # --- Bottom Feedback Buttons (record the last result for the dataset) ---
+        self.btn_ai_did_good = QPushButton("AI Did Good")
+        self.btn_ai_did_bad = QPushButton("AI Did Bad")
+        self.btn_ai_did_good.setEnabled(False) # Enabled once there is a result to rate
+        self.btn_ai_did_bad.setEnabled(False)
 
     def _setup_layouts(self):
         # Top buttons layout
@@ -117,8 +172,14 @@ class MainWindow(QMainWindow):
 
         self.main_layout.addLayout(inputs_layout)
 
-        # Process button
-        self.main_layout.addWidget(self.btn_process_code, alignment=Qt.AlignmentFlag.AlignCenter)
+        # Process / Cancel buttons
+        process_layout = QHBoxLayout()
+        process_layout.addStretch()
+        process_layout.addWidget(self.btn_process_code)
+        process_layout.addWidget(self.btn_cancel)
+        process_layout.addWidget(self.chk_live_preview)
+        process_layout.addStretch()
+        self.main_layout.addLayout(process_layout)
 
         # Output area layout
         self.main_layout.addWidget(self.btn_expand_output)
@@ -127,6 +188,7 @@ class MainWindow(QMainWindow):
         output_buttons_layout = QHBoxLayout()
         output_buttons_layout.addWidget(self.btn_clear_output)
         output_buttons_layout.addWidget(self.btn_copy_output)
+        output_buttons_layout.addWidget(self.btn_show_diff)
         output_buttons_layout.addStretch()
         output_layout.addLayout(output_buttons_layout)
         self.main_layout.addLayout(output_layout)
@@ -162,8 +224,19 @@ class MainWindow(QMainWindow):
         self.btn_copy_ai_suggestion.clicked.connect(lambda: self._copy_to_clipboard(self.txt_ai_suggestion.toPlainText()))
         self.btn_copy_output.clicked.connect(lambda: self._copy_to_clipboard(self.txt_modified_code.toPlainText()))
 
-        # Process button
+        # Process / Cancel buttons
         self.btn_process_code.clicked.connect(self._on_process_code_clicked)
+        self.btn_cancel.clicked.connect(self._on_cancel_clicked)
+        self.btn_show_diff.clicked.connect(self._open_diff_dialog)
+        self.btn_ai_did_good.clicked.connect(lambda: self._record_feedback("good"))
+        self.btn_ai_did_bad.clicked.connect(lambda: self._record_feedback("bad"))
+
+        # Live preview
+        self.txt_original_code.textChanged.connect(lambda: self._on_input_edited(0))
+        self.txt_ai_suggestion.textChanged.connect(lambda: self._on_input_edited(1))
+        self.txt_modified_code.textChanged.connect(self._on_output_changed)
+        self.chk_live_preview.toggled.connect(lambda _checked: self._schedule_live_preview())
+        self._preview_timer.timeout.connect(self._run_live_preview)
 
     @Slot()
     def _open_editor_dialog(self, text_edit_widget, title):
@@ -180,6 +253,57 @@ class MainWindow(QMainWindow):
             text_edit_widget.setPlainText(dialog.get_text())
 
     @Slot()
+    def _on_input_edited(self, index):
+        self._preview_stale[index] = True
+        self._schedule_live_preview()
+
+    @Slot()
+    def _on_output_changed(self):
+        self._preview_output = None
+
+    @Slot()
+    def _schedule_live_preview(self):
+        # Every edit restarts the timer, so a burst of typing causes one refresh.
+        if self.chk_live_preview.isChecked():
+            self._preview_timer.start()
+        else:
+            self._preview_timer.stop()
+
+    @Slot()
+    def _run_live_preview(self):
+        if self._worker is not None or not any(self._preview_stale):
+            return
+        # Only read back the input(s) that were edited; large documents are slow to copy out.
+        editors = (self.txt_original_code, self.txt_ai_suggestion)
+        original_code, ai_suggestion = (
+            editor.toPlainText() if stale else cached
+            for editor, stale, cached in zip(editors, self._preview_stale, self._preview_inputs)
+        )
+        self._preview_stale = [False, False]
+        if (original_code, ai_suggestion) == self._preview_inputs:
+            return
+        self._preview_inputs = (original_code, ai_suggestion)
+        if not original_code.strip() or not ai_suggestion.strip():
+            return
+        instructions = self._preview_differ.try_diff(original_code, ai_suggestion)
+        if instructions is None:
+            self.statusBar().showMessage("Live preview: suggestion is a partial snippet; click Process to ask the AI.")
+            return
+        modified_code = apply_instructions(original_code, instructions)
+        if modified_code != self._preview_output:
+            self.txt_modified_code.setPlainText(modified_code)
+            self._preview_output = modified_code
+        self._last_diff = (original_code, modified_code, instructions)
+        self.btn_show_diff.setEnabled(True)
+        self.statusBar().showMessage("Live preview updated.")
+
+    @Slot()
+    def _open_diff_dialog(self):
+        if self._last_diff is None:
+            return
+        original_code, modified_code, instructions = self._last_diff
+        DiffDialog(self, original_code, modified_code, instructions).exec()
+
     def _copy_to_clipboard(self, text_to_copy):
         if text_to_copy:
             clipboard = QApplication.clipboard()
@@ -217,22 +341,110 @@ class MainWindow(QMainWindow):
         print(f"AI Suggestion (first 50 chars): {ai_suggestion_for_processing[:50]}")
         print("-------------------------")
 
-        # --- THIS IS WHERE YOU'LL INTEGRATE YOUR CORE LOGIC ---
-        # (Comments for your actual logic integration remain here)
-        # ...
-        # -------------------------------------------------------
-        
-        # For now, just a placeholder action:
-        # Pre-process the strings for the f-string to avoid the backslash issue
-        original_preview_for_output = original_code_for_processing[:30].replace('\n', ' ').replace('\r', '')
-        suggestion_preview_for_output = ai_suggestion_for_processing[:30].replace('\n', ' ').replace('\r', '')
-
-        processed_text = (
-            f"--- SIMULATED PROCESSED OUTPUT ---\n"
-            f"Based on Original (starts with: '{original_preview_for_output}...')\n"
-            f"And AI Suggestion (starts with: '{suggestion_preview_for_output}...')\n"
-            f"\nYour amazing Code_Slinge logic would go here!"
-        )
-        self.txt_modified_code.setPlainText(processed_text)
-        print("Processing complete (simulated). Output area updated.")
+        self._start_worker(original_code_for_processing, ai_suggestion_for_processing)
+
+    def _start_worker(self, original_code, ai_suggestion):
+        """Process the pair off the GUI thread; results arrive through the worker's signals."""
+        if self._worker is not None:
+            self._worker.cancel()
+        self._drop_pending_partial()
+        worker = ProcessWorker(original_code, ai_suggestion, agent_factory=self.agent_factory)
+        # Signals from a worker that has since been cancelled or replaced are ignored.
+        worker.signals.progress.connect(lambda message: self._on_worker_progress(worker, message))
+        worker.signals.partial.connect(lambda text: self._on_worker_partial(worker, text))
+        worker.signals.finished.connect(lambda result: self._on_worker_finished(worker, result))
+        worker.signals.failed.connect(lambda error: self._on_worker_failed(worker, error))
+        self._worker = worker
+        self._last_diff = None
+        self.btn_show_diff.setEnabled(False)
+        self._set_last_record(None)
+        self.btn_process_code.setEnabled(False)
+        self.btn_cancel.setEnabled(True)
+        self.statusBar().showMessage("Processing...")
+        self.thread_pool.start(worker)
+
+    def _finish_worker(self, message):
+        self._worker = None
+        self._drop_pending_partial()
+        self.btn_process_code.setEnabled(True)
+        self.btn_cancel.setEnabled(False)
+        self.statusBar().showMessage(message)
+
+    def closeEvent(self, event):
+        if self._worker is not None:
+            self._worker.cancel()
+        self.thread_pool.waitForDone(5000)
+        if self._recorder is not None:
+            self._recorder.close()
+        super().closeEvent(event)
+
+    def _set_last_record(self, record):
+        self._last_record = record
+        self.btn_ai_did_good.setEnabled(record is not None)
+        self.btn_ai_did_bad.setEnabled(record is not None)
+
+    def _record_feedback(self, label):
+        if self._last_record is None:
+            return
+        original_code, ai_suggestion, raw_instructions, source = self._last_record
+        try:
+            if self._recorder is None:
+                self._recorder = self.recorder_factory()
+            # The output as it is now, including any manual fixes.
+            self._recorder.record(
+                original_code, ai_suggestion, raw_instructions, self.txt_modified_code.toPlainText(),
+                label=label, source=source,
+            )
+        except Exception as e:
+            self.statusBar().showMessage(f"ERROR: could not record feedback: {e}")
+            return
+        self._set_last_record(None) # one rating per result
+        self.statusBar().showMessage(f"Recorded as {label}.")
 
+    @Slot()
+    def _on_cancel_clicked(self):
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        self._finish_worker("Cancelled.")
+        print("Processing cancelled.")
+
+    def _on_worker_progress(self, worker, message):
+        if worker is self._worker:
+            self.statusBar().showMessage(message)
+
+    def _on_worker_partial(self, worker, text):
+        if worker is not self._worker:
+            return
+        self._pending_partial = text
+        if not self._partial_timer.isActive():
+            self._partial_timer.start()
+
+    def _show_pending_partial(self):
+        if self._pending_partial is not None and self._worker is not None:
+            self.txt_modified_code.setPlainText(self._pending_partial)
+        self._pending_partial = None
+
+    def _drop_pending_partial(self):
+        self._partial_timer.stop()
+        self._pending_partial = None
+
+    def _on_worker_finished(self, worker, result):
+        if worker is not self._worker:
+            return
+        if result.error is not None:
+            self._on_worker_failed(worker, result.error)
+            return
+        self.txt_modified_code.setPlainText(result.modified_code)
+        self._last_diff = (worker.original_code, result.modified_code, result.instructions)
+        self._set_last_record((worker.original_code, worker.suggested_code, result.raw_instructions, result.source))
+        self.btn_show_diff.setEnabled(True)
+        source = "local diff" if result.source == "local" else "AI"
+        self._finish_worker(f"Done ({source}).")
+        print(f"Processing complete ({source}). Output area updated.")
+
+    def _on_worker_failed(self, worker, error):
+        if worker is not self._worker:
+            return
+        self._finish_worker(error)
+        print(f"Processing failed: {error}")
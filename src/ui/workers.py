@@ -0,0 +1,144 @@
+# src/ui/workers.py
+"""
+Background processing for the main window.
+
+`ProcessWorker` runs one (original, suggestion) pair on a `QThreadPool`
+thread: the local diff first, then, for partial snippets, a streamed
+request through an `AsyncReasoningAgent` on a private event loop. Progress,
+partial output and the final `PipelineResult` come back as Qt signals, which
+are delivered on the GUI thread. `cancel()` cancels the asyncio task, which
+drops the HTTP request at once, even while waiting for the first token.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Callable, Optional
+
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from src.core.injector import apply_instructions
+from src.core.parser import InstructionStreamParser, ParsedInstruction
+from src.core.pipeline import PipelineResult, apply_raw_instructions, process_pair
+from src.models.document import Document
+
+
+def default_agent_factory():
+    """An `AsyncReasoningAgent`; built inside the worker's event loop."""
+    from src.ai.reasoning_agent import AsyncReasoningAgent
+
+    return AsyncReasoningAgent()
+
+
+def default_recorder_factory():
+    """A `DatasetRecorder` under ``data_dir``; recording needs no API key, so it works without one."""
+    from pathlib import Path
+
+    from src.ai.dataset_recorder import DatasetRecorder
+    from src.config.settings import get_settings
+
+    try:
+        return DatasetRecorder.from_settings(get_settings())
+    except ValueError:  # settings invalid, e.g. no API key: use the default data_dir
+        return DatasetRecorder(Path("data") / DatasetRecorder.DIRNAME)
+
+
+class WorkerSignals(QObject):
+    progress = Signal(str)      # short status message
+    partial = Signal(str)       # original with the instructions received so far applied (throttled)
+    finished = Signal(object)   # PipelineResult (check .error)
+    failed = Signal(str)        # unexpected exception, as an ``ERROR: …`` string
+    cancelled = Signal()
+
+
+class ProcessWorker(QRunnable):
+    # Seconds between partial updates: each one re-applies every instruction so
+    # far to the whole original, so a per-line emit is O(lines x file size).
+    partial_interval = 0.1
+
+    def __init__(
+        self,
+        original_code: str,
+        suggested_code: str,
+        agent_factory: Optional[Callable[[], object]] = None,
+        use_local_diff: bool = True,
+    ) -> None:
+        super().__init__()
+        # Split once: every streamed partial result re-applies to the same original.
+        self.original_code = Document(original_code)
+        self.suggested_code = Document(suggested_code)
+        self.signals = WorkerSignals()
+        self._agent_factory = agent_factory or default_agent_factory
+        self._use_local_diff = use_local_diff
+        self._cancel_requested = threading.Event()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------ #
+    def cancel(self) -> None:
+        """Abandon the pair; safe to call from any thread, at any time."""
+        self._cancel_requested.set()
+        with self._lock:
+            if self._loop is not None and self._task is not None:
+                self._loop.call_soon_threadsafe(self._task.cancel)
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._cancel_requested.is_set()
+
+    def run(self) -> None:
+        try:
+            self.signals.progress.emit("Diffing locally...")
+            result = process_pair(self.original_code, self.suggested_code, use_local_diff=self._use_local_diff)
+            if result.error is None:
+                self.signals.finished.emit(result)
+                return
+            if self.is_cancelled:
+                self.signals.cancelled.emit()
+                return
+            self.signals.progress.emit("Suggestion is a partial snippet; asking AI...")
+            self.signals.finished.emit(asyncio.run(self._ask_model()))
+        except asyncio.CancelledError:
+            self.signals.cancelled.emit()
+        except Exception as exc:  # noqa: BLE001 - reported to the window, never raised into Qt
+            self.signals.failed.emit(f"ERROR: {exc}")
+
+    async def _ask_model(self):
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.current_task()
+        if self.is_cancelled:
+            raise asyncio.CancelledError
+        agent = self._agent_factory()
+        parser = InstructionStreamParser()
+        received: list[str] = []
+        instructions: list[ParsedInstruction] = []
+        next_partial = 0.0  # monotonic time the next partial may be emitted; the first goes out at once
+        try:
+            async for text in agent.stream_instructions(self.original_code, self.suggested_code):
+                if not received:
+                    self.signals.progress.emit("Receiving instructions...")
+                received.append(text)
+                new = parser.feed(text)
+                if new:
+                    instructions.extend(new)
+                    # Skipped partials are not lost: the next one, or `finished`, includes them.
+                    if time.monotonic() >= next_partial:
+                        self.signals.partial.emit(apply_instructions(self.original_code, instructions))
+                        next_partial = time.monotonic() + self.partial_interval
+        finally:
+            with self._lock:
+                self._loop = self._task = None
+            await agent.aclose()
+        raw = "".join(received)
+        # A failure after the first instruction is appended to the streamed text,
+        # so the parser never sees it as an error reply; never apply a partial reply.
+        metrics = getattr(agent, "last_metrics", None)
+        error = getattr(metrics, "error", None) or next(
+            (line.strip() for line in raw.splitlines() if line.strip().upper().startswith("ERROR:")), None
+        )
+        if error is not None:
+            return PipelineResult(modified_code=None, raw_instructions=raw, source="ai", error=error)
+        return apply_raw_instructions(self.original_code, raw)
@@ -1,11 +1,17 @@
 # src/utils/code_utils.py
+from typing import Iterable
 
-def add_line_numbers(code_string: str) -> str:
+from src.models.document import Document
+
+
+def add_line_numbers(code_string: str, start: int = 1) -> str:
     """
     Adds line numbers to a given string of code.
 
     Args:
         code_string: A string containing code, with lines separated by newlines.
+            A `Document` is numbered once and the result cached on it.
+        start: The number given to the first line.
 
     Returns:
         A string with each line prefixed by its number (1-indexed),
@@ -13,23 +19,24 @@ def add_line_numbers(code_string: str) -> str:
     """
     if not code_string:
         return ""
+    if isinstance(code_string, Document):
+        return code_string.numbered(start)
     lines = code_string.splitlines()
-    numbered_lines = [f"{i+1}: {line}" for i, line in enumerate(lines)]
+    numbered_lines = [f"{i}: {line}" for i, line in enumerate(lines, start)]
     return "\n".join(numbered_lines)
 
-def add_line_numbers_to_list(code_lines: list[str]) -> list[str]:
+def add_line_numbers_to_list(code_lines: Iterable[str], start: int = 1) -> list[str]:
     """
     Adds line numbers to a list of code lines.
 
     Args:
-        code_lines: A list of strings, where each string is a line of code.
+        code_lines: The lines of code, e.g. a list or a `Document` line view.
+        start: The number given to the first line.
 
     Returns:
         A list of strings with each line prefixed by its number (1-indexed).
     """
-    if not code_lines:
-        return []
-    return [f"{i+1}: {line}" for i, line in enumerate(code_lines)]
+    return [f"{i}: {line}" for i, line in enumerate(code_lines, start)]
 
 # We can add other code utilities here later, such as stripping line numbers
 # or basic syntax validation (as mentioned in architecture.md), if needed.
@@ -0,0 +1,163 @@
+# src/utils/tracing.py
+"""
+Lightweight span tracing for the CLI pipeline.
+
+Stages wrap themselves in ``with span("name", input_chars=...) as s:`` and
+may attach more sizes with ``s.set(output_chars=...)``. Spans go to the
+tracer installed for the current context (`use_tracer`); by default that is
+a `NullTracer` whose spans are one shared no-op object, so instrumented code
+costs a context-variable lookup when tracing is off.
+
+A `Tracer` records wall and CPU (thread) time per span and exports them as a
+Chrome trace-event file (load it in chrome://tracing or Perfetto) plus a
+one-line summary.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Iterator, Union
+
+
+class Span:
+    """One timed stage; use as a context manager."""
+
+    __slots__ = ("name", "attrs", "start_ns", "end_ns", "cpu_start_ns", "cpu_ns", "thread_id", "_tracer")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: dict[str, Any]) -> None:
+        self._tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.start_ns = self.end_ns = self.cpu_start_ns = self.cpu_ns = 0
+        self.thread_id = 0
+
+    def set(self, **attrs: Any) -> None:
+        """Attach (or overwrite) attributes such as output sizes."""
+        self.attrs.update(attrs)
+
+    @property
+    def wall_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    @property
+    def cpu_ms(self) -> float:
+        return self.cpu_ns / 1e6
+
+    def __enter__(self) -> "Span":
+        self.thread_id = threading.get_ident()
+        self.cpu_start_ns = time.thread_time_ns()
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.end_ns = time.perf_counter_ns()
+        self.cpu_ns = time.thread_time_ns() - self.cpu_start_ns
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self._tracer.spans.append(self)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class NullTracer:
+    """Tracer used when tracing is off: records nothing."""
+
+    enabled = False
+
+    def span(self, name: str, **attrs: Any) -> _NullSpan:
+        return _NULL_SPAN
+
+
+class Tracer:
+    """Collects finished spans; spans may finish on any thread."""
+
+    enabled = True
+
+    def __init__(self) -> None:
+        self.spans: list[Span] = []
+        self.origin_ns = time.perf_counter_ns()
+
+    def span(self, name: str, **attrs: Any) -> Span:
+        return Span(self, name, attrs)
+
+    # ------------------------------------------------------------------ #
+    def to_chrome_trace(self) -> dict[str, Any]:
+        """Complete ("X") events in the Chrome trace-event format, microseconds."""
+        pid = os.getpid()
+        events = [
+            {
+                "name": span.name,
+                "cat": "codesling",
+                "ph": "X",
+                "ts": (span.start_ns - self.origin_ns) / 1000,
+                "dur": (span.end_ns - span.start_ns) / 1000,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": {**span.attrs, "cpu_ms": round(span.cpu_ms, 3)},
+            }
+            for span in sorted(self.spans, key=lambda s: s.start_ns)
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: Union[str, Path]) -> None:
+        Path(path).write_text(json.dumps(self.to_chrome_trace(), default=str), encoding="utf-8")
+
+    def totals(self) -> dict[str, tuple[int, float, float]]:
+        """name -> (count, wall ms, cpu ms), in order of first start."""
+        totals: dict[str, tuple[int, float, float]] = {}
+        for span in sorted(self.spans, key=lambda s: s.start_ns):
+            count, wall, cpu = totals.get(span.name, (0, 0.0, 0.0))
+            totals[span.name] = (count + 1, wall + span.wall_ms, cpu + span.cpu_ms)
+        return totals
+
+    def summary(self) -> str:
+        """One line: total wall time, then wall (cpu) time per stage."""
+        elapsed = (time.perf_counter_ns() - self.origin_ns) / 1e6
+        stages = ", ".join(
+            f"{name}{f' x{count}' if count > 1 else ''} {wall:.1f}ms ({cpu:.1f} cpu)"
+            for name, (count, wall, cpu) in self.totals().items()
+        )
+        return f"Trace: {elapsed:.1f}ms total | {stages or 'no spans'}"
+
+
+AnyTracer = Union[Tracer, NullTracer]
+_NULL_TRACER = NullTracer()
+_current_tracer: ContextVar[AnyTracer] = ContextVar("codesling_tracer", default=_NULL_TRACER)
+
+
+def get_tracer() -> AnyTracer:
+    return _current_tracer.get()
+
+
+@contextmanager
+def use_tracer(tracer: AnyTracer) -> Iterator[AnyTracer]:
+    """Install `tracer` for the current context (and tasks started from it)."""
+    token = _current_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _current_tracer.reset(token)
+
+
+def span(name: str, **attrs: Any) -> Union[Span, _NullSpan]:
+    """Start a span on the current tracer (a no-op when tracing is off)."""
+    return _current_tracer.get().span(name, **attrs)
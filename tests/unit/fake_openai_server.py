@@ -0,0 +1,125 @@
+# tests/unit/fake_openai_server.py
+"""
+A tiny OpenAI-compatible chat-completions server on 127.0.0.1 for tests.
+
+It answers every request with `content` (or `content(request_body)` when
+it is callable), either as a single JSON completion
+or, when the request asks for ``stream=True``, as server-sent events split
+into `chunk_size`-character deltas. `latency` delays the first byte and
+`chunk_delay` the gap between streamed deltas. No network access needed.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOpenAIServer:
+    def __init__(self, content="NO CHANGES", chunk_size=8, latency=0.0, chunk_delay=0.0, status=200):
+        self.content = content
+        self.chunk_size = chunk_size
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.status = status
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):  # keep test output quiet
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with fake._lock:
+                    fake.requests.append(body)
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                try:
+                    time.sleep(fake.latency)
+                    self._respond(body)
+                finally:
+                    with fake._lock:
+                        fake.in_flight -= 1
+
+            def _respond(self, body):
+                if fake.status != 200:
+                    payload = json.dumps({"error": {"message": "fake failure", "type": "server_error"}}).encode()
+                    self.send_response(fake.status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                else:
+                    content = fake.content(body) if callable(fake.content) else fake.content
+                    if body.get("stream"):
+                        self._stream(body, content)
+                    else:
+                        self._complete(body, content)
+
+            def _complete(self, body, content):
+                payload = json.dumps({
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": 0,
+                    "model": body.get("model", "fake"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }],
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _stream(self, body, content):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                pieces = [content[i:i + fake.chunk_size] for i in range(0, len(content), fake.chunk_size)]
+                try:
+                    for index, piece in enumerate(pieces):
+                        if index:
+                            time.sleep(fake.chunk_delay)
+                        event = {
+                            "id": "chatcmpl-fake",
+                            "object": "chat.completion.chunk",
+                            "created": 0,
+                            "model": body.get("model", "fake"),
+                            "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                        }
+                        self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                        self.wfile.flush()
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client abandoned the stream
+                self.close_connection = True
+
+        return Handler
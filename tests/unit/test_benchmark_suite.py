@@ -0,0 +1,69 @@
+# tests/unit/test_benchmark_suite.py
+import ast
+import json
+
+import pytest
+
+from benchmarks import run_suite
+from benchmarks.corpus import PROFILES, generate_instructions, generate_python_file, make_case
+from src.core.injector import apply_instructions
+from src.core.parser import DeleteInstruction, InsertInstruction, parse_instructions
+
+
+def test_generated_file_is_seeded_python_of_exact_length():
+    code = generate_python_file(500, seed=3)
+    assert code == generate_python_file(500, seed=3)
+    assert code != generate_python_file(500, seed=4)
+    assert len(code.splitlines()) == 500
+    ast.parse(generate_python_file(5000))
+
+@pytest.mark.parametrize("profile", PROFILES)
+def test_generated_instructions_stay_in_bounds_and_round_trip(profile):
+    code, instructions, text = make_case(2000, profile)
+    assert instructions
+    assert parse_instructions(text) == instructions
+    for instruction in instructions:
+        if isinstance(instruction, InsertInstruction):
+            assert 1 <= instruction.line_before <= 2001
+        else:
+            assert 1 <= instruction.line_start <= (instruction.line_end or instruction.line_start) <= 2000
+    apply_instructions(code, instructions)
+
+def test_profiles_differ_in_density():
+    dense, sparse, ranged = (generate_instructions(10_000, profile) for profile in PROFILES)
+    assert len(dense) > 100 * len(sparse) > 0
+    deleted = sum(i.line_end - i.line_start + 1 for i in ranged if isinstance(i, DeleteInstruction))
+    assert deleted >= 4_000
+
+def test_compare_flags_only_slowdowns_beyond_threshold():
+    baseline = {"a": 1.0, "b": 1.0, "c": 1.0}
+    assert run_suite.compare({"a": 1.19, "b": 1.21, "c": 0.5, "new": 9.0}, baseline, 20) == ["b"]
+
+def test_compare_ignores_slowdowns_below_the_absolute_floor():
+    baseline = {"tiny": 1e-6, "big": 1e-2}
+    assert run_suite.compare({"tiny": 3e-6, "big": 1.3e-2}, baseline, 20, min_delta=0.5e-3) == ["big"]
+
+def test_trivial_parse_cases_are_not_generated():
+    names = [name for name, _ in run_suite.iter_cases([100])]
+    assert "parse_instructions/100/dense" in names
+    assert "parse_instructions/100/sparse" not in names   # a NO CHANGES reply
+    assert "apply_instructions/100/sparse" in names
+
+def test_saved_baseline_is_the_median_of_recent_runs(tmp_path):
+    path = tmp_path / "baselines.json"
+    for seconds in (1.0, 9.0, 2.0):
+        run_suite.save_baseline(path, {"case": seconds})
+    assert run_suite.load_baseline(path) == {"case": 2.0}
+    for _ in range(run_suite.BASELINE_SAMPLES):
+        run_suite.save_baseline(path, {"case": 5.0})
+    assert run_suite.load_samples(path) == {"case": [5.0] * run_suite.BASELINE_SAMPLES}
+
+def test_main_saves_then_compares_baseline(tmp_path, monkeypatch):
+    monkeypatch.setattr(run_suite, "time_case", lambda func, **kwargs: 0.001)
+    path = tmp_path / "baselines.json"
+    assert run_suite.main(["--sizes", "100", "--baseline", str(path), "--save"]) == 0
+    assert "apply_instructions/100/ranged" in json.loads(path.read_text(encoding="utf-8"))["results"]
+    assert run_suite.main(["--sizes", "100", "--baseline", str(path)]) == 0
+
+    monkeypatch.setattr(run_suite, "time_case", lambda func, **kwargs: 0.002)
+    assert run_suite.main(["--sizes", "100", "--filter", "parse", "--baseline", str(path)]) == 1
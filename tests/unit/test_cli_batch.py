@@ -0,0 +1,129 @@
+# tests/unit/test_cli_batch.py
+import io
+import json
+import sys
+
+import pytest
+
+from src.cli import batch
+from src.cli import main as cli_main
+from tests.unit.fake_openai_server import FakeOpenAIServer
+
+SNIPPET_ORIGINAL = "\n".join(f"x{i} = {i}" for i in range(10))
+
+
+@pytest.fixture(autouse=True)
+def batch_settings(monkeypatch, tmp_path):
+    from src.config.settings import AppSettings
+
+    settings = AppSettings(openai_api_key="test-key", data_dir=tmp_path, response_cache_enabled=False)
+    monkeypatch.setattr("src.config.settings.get_settings", lambda: settings)
+    monkeypatch.setattr("src.ai.reasoning_agent.get_settings", lambda: settings)
+    return settings
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    (tmp_path / "complete.py").write_text("def hello():\n    print('world')\n", encoding="utf-8")
+    (tmp_path / "complete_new.py").write_text("def hello():\n    print('world!')\n", encoding="utf-8")
+    (tmp_path / "snippet.py").write_text(SNIPPET_ORIGINAL, encoding="utf-8")
+    (tmp_path / "snippet_new.py").write_text("x3 = 'three'", encoding="utf-8")
+    lines = [
+        {"original": "complete.py", "suggestion": "complete_new.py", "output": "out/complete.py"},
+        {"original": "snippet.py", "suggestion": "snippet_new.py", "output": "out/snippet.py"},
+        {"original": "missing.py", "suggestion": "snippet_new.py", "output": "out/missing.py"},
+        "not json",
+        {"original": "complete.py", "suggestion": "complete_new.py"},
+    ]
+    path = tmp_path / "manifest.jsonl"
+    path.write_text(
+        "\n".join(line if isinstance(line, str) else json.dumps(line) for line in lines) + "\n",
+        encoding="utf-8",
+    )
+    return path
+
+
+class FakeAsyncAgent:
+    def __init__(self):
+        self.calls = []
+
+    async def get_instructions(self, original_code, ai_suggestion):
+        self.calls.append(ai_suggestion)
+        return "INSERT 4: x3 = 'three'\nDELETE 4"
+
+
+def test_read_manifest_resolves_paths_and_flags_bad_lines(manifest):
+    items = batch.read_manifest(str(manifest))
+    assert [item.index for item in items] == [0, 1, 2, 3, 4]
+    assert items[0].original == str(manifest.parent / "complete.py")
+    assert items[3].error.startswith("ERROR: invalid manifest line")
+    assert items[4].output is None
+
+
+def test_run_manifest_streams_ordered_results_and_survives_bad_items(manifest):
+    agent = FakeAsyncAgent()
+    out = io.StringIO()
+    code = batch.run_manifest(str(manifest), jobs=2, out=out, agent_factory=lambda: agent)
+
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert code == 1
+    assert [r["index"] for r in results] == [0, 1, 2, 3, 4]
+    assert [r["status"] for r in results] == ["ok", "ok", "error", "error", "ok"]
+    assert [r.get("source") for r in results[:2]] == ["local", "ai"]
+    assert "File not found" in results[2]["error"]
+    assert results[4]["modified_code"] == "def hello():\n    print('world!')"
+    assert agent.calls == ["x3 = 'three'"]    # only the snippet reaches the model
+
+    out_dir = manifest.parent / "out"
+    assert (out_dir / "complete.py").read_text(encoding="utf-8") == "def hello():\n    print('world!')"
+    assert "x3 = 'three'\nx4 = 4" in (out_dir / "snippet.py").read_text(encoding="utf-8")
+
+
+def test_run_manifest_without_api_key_only_fails_model_items(manifest):
+    def no_key():
+        raise ValueError("OpenAI API key not configured in settings.")
+    out = io.StringIO()
+    batch.run_manifest(str(manifest), jobs=1, out=out, agent_factory=no_key)
+
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert results[0]["status"] == "ok"
+    assert results[1]["error"] == "ERROR: OpenAI API key not configured in settings."
+
+
+def test_run_manifest_with_async_agent(manifest, batch_settings):
+    with FakeOpenAIServer(content="INSERT 4: x3 = 'three'\nDELETE 4") as server:
+        batch_settings.openai_base_url = server.base_url
+        out = io.StringIO()
+        batch.run_manifest(str(manifest), jobs=2, out=out)
+
+    assert len(server.requests) == 1
+    assert json.loads(out.getvalue().splitlines()[1])["status"] == "ok"
+
+
+def test_cli_manifest_flag(manifest, monkeypatch, capsys):
+    monkeypatch.setattr(batch, "_default_agent_factory", FakeAsyncAgent)
+    monkeypatch.setattr(sys, "argv", ["codesling", "--manifest", str(manifest), "-j", "1"])
+    with pytest.raises(SystemExit) as excinfo:
+        cli_main.main()
+    assert excinfo.value.code == 1
+    captured = capsys.readouterr()
+    assert len(captured.out.splitlines()) == 5
+    assert "Batch: 5 items, 3 ok, 2 failed" in captured.err
+
+
+def test_cli_manifest_read_errors_are_reported(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["codesling", "--manifest", str(tmp_path / "missing.jsonl")])
+    with pytest.raises(SystemExit) as excinfo:
+        cli_main.main()
+    assert excinfo.value.code == 1
+    assert "Could not read manifest" in capsys.readouterr().err
+
+
+def test_cli_manifest_run_failures_are_not_read_errors(manifest, monkeypatch, capsys):
+    def crash(*args, **kwargs):
+        raise RuntimeError("worker pool broke")
+    monkeypatch.setattr(batch, "run_manifest_items", crash)
+    monkeypatch.setattr(sys, "argv", ["codesling", "--manifest", str(manifest)])
+    with pytest.raises(RuntimeError, match="worker pool broke"):
+        cli_main.main()
+    assert "Could not read manifest" not in capsys.readouterr().err
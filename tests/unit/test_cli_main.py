@@ -0,0 +1,126 @@
+# tests/unit/test_cli_main.py
+import sys
+
+import pytest
+
+from src.cli import main as cli_main
+
+
+def _run(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["codesling", *argv])
+    cli_main.main()
+
+
+def test_cli_complete_suggestion_uses_local_diff(tmp_path, monkeypatch, capsys):
+    original = tmp_path / "original.py"
+    suggestion = tmp_path / "suggestion.py"
+    output = tmp_path / "out.py"
+    original.write_text("def hello():\n    print('world')\n", encoding="utf-8")
+    suggestion.write_text("def hello():\n    # A greeting\n    print('world!')\n", encoding="utf-8")
+
+    def no_agent(total_lines=0):
+        raise AssertionError("ReasoningAgent must not be built for a complete-file suggestion")
+    monkeypatch.setattr(cli_main, "_make_agent", no_agent)
+
+    _run(monkeypatch, str(original), str(suggestion), "-o", str(output))
+
+    assert output.read_text(encoding="utf-8") == "def hello():\n    # A greeting\n    print('world!')"
+    assert "Raw Instructions (local diff)" in capsys.readouterr().out
+
+
+def test_cli_snippet_calls_agent(tmp_path, monkeypatch, capsys):
+    original = tmp_path / "original.py"
+    suggestion = tmp_path / "suggestion.py"
+    original.write_text("\n".join(f"x{i} = {i}" for i in range(10)), encoding="utf-8")
+    suggestion.write_text("x3 = 'three'", encoding="utf-8")
+
+    class FakeAgent:
+        def get_instructions(self, original_code, ai_suggestion):
+            return "INSERT 4: x3 = 'three'\nDELETE 4"
+    monkeypatch.setattr(cli_main, "_make_agent", lambda total_lines=0: FakeAgent())
+
+    _run(monkeypatch, str(original), str(suggestion))
+
+    out = capsys.readouterr().out
+    assert "Raw Instructions (AI)" in out
+    assert "x3 = 'three'\nx4 = 4" in out
+
+
+def test_cli_agent_error_exits_nonzero(tmp_path, monkeypatch, capsys):
+    original = tmp_path / "original.py"
+    suggestion = tmp_path / "suggestion.py"
+    original.write_text("\n".join(f"x{i} = {i}" for i in range(10)), encoding="utf-8")
+    suggestion.write_text("x3 = 'three'", encoding="utf-8")
+
+    class FailingAgent:
+        def get_instructions(self, original_code, ai_suggestion):
+            return "ERROR: request to OpenAI timed out."
+    monkeypatch.setattr(cli_main, "_make_agent", lambda total_lines=0: FailingAgent())
+
+    with pytest.raises(SystemExit) as excinfo:
+        _run(monkeypatch, str(original), str(suggestion))
+    assert excinfo.value.code == 1
+    assert "timed out" in capsys.readouterr().err
+
+
+def test_cli_fix_indent_reindents_inserted_lines(tmp_path, monkeypatch, capsys):
+    original = tmp_path / "original.py"
+    suggestion = tmp_path / "suggestion.py"
+    output = tmp_path / "out.py"
+    original.write_text("def f(x):\n    if x:\n        y = 1\n    return x\n", encoding="utf-8")
+    suggestion.write_text("y = 2", encoding="utf-8")
+
+    class FakeAgent:
+        def get_instructions(self, original_code, ai_suggestion):
+            return "INSERT 3: y = 2\nDELETE 3"
+    monkeypatch.setattr(cli_main, "_make_agent", lambda total_lines=0: FakeAgent())
+
+    _run(monkeypatch, str(original), str(suggestion), "-o", str(output), "--fix-indent")
+
+    assert output.read_text(encoding="utf-8") == "def f(x):\n    if x:\n        y = 2\n    return x"
+    assert "Indentation repaired locally (1 line(s))" in capsys.readouterr().out
+
+
+def test_cli_record_adds_run_to_dataset(tmp_path, monkeypatch):
+    from types import SimpleNamespace
+
+    from src.ai.dataset_recorder import iter_records
+    original = tmp_path / "original.py"
+    suggestion = tmp_path / "suggestion.py"
+    original.write_text("a = 1\nb = 2", encoding="utf-8")
+    suggestion.write_text("a = 1\nb = 3", encoding="utf-8")
+    settings = SimpleNamespace(data_dir=tmp_path / "data", dataset_shard_max_bytes=1 << 20)
+    monkeypatch.setattr("src.config.settings.get_settings", lambda: settings)
+    recorders = []
+    real_record = cli_main._record
+    monkeypatch.setattr(cli_main, "_record", lambda *args: recorders.append(real_record(*args)))
+
+    _run(monkeypatch, str(original), str(suggestion), "--record")
+
+    recorders[0].close()
+    [record] = iter_records(tmp_path / "data" / "dataset")
+    assert (record["final_code"], record["source"], record["label"]) == ("a = 1\nb = 3", "local", None)
+
+
+def test_cli_strict_rejects_invalid_instructions(tmp_path, monkeypatch, capsys):
+    original = tmp_path / "original.py"
+    suggestion = tmp_path / "suggestion.py"
+    output = tmp_path / "out.py"
+    original.write_text("\n".join(f"x{i} = {i}" for i in range(10)), encoding="utf-8")
+    suggestion.write_text("x3 = 'three'", encoding="utf-8")
+
+    class FakeAgent:
+        def get_instructions(self, original_code, ai_suggestion):
+            return "INSERT 4: x3 = 'three'\nDELETE 4-20"
+    monkeypatch.setattr(cli_main, "_make_agent", lambda total_lines=0: FakeAgent())
+
+    _run(monkeypatch, str(original), str(suggestion), "-o", str(output))
+    assert "out_of_bounds" in capsys.readouterr().err
+    assert output.exists()
+
+    output.unlink()
+    with pytest.raises(SystemExit) as excinfo:
+        _run(monkeypatch, str(original), str(suggestion), "-o", str(output), "--strict")
+    assert excinfo.value.code == 1
+    assert "rejected (--strict)" in capsys.readouterr().err
+    assert not output.exists()
@@ -0,0 +1,73 @@
+# tests/unit/test_cli_replay.py
+import gzip
+import io
+import json
+import sys
+
+import pytest
+
+from src.ai.dataset_recorder import DatasetRecorder
+from src.cli import main as cli_main
+from src.cli import replay
+
+ORIGINAL = "def hello():\n    print('world')\n"
+SUGGESTION = "def hello():\n    print('world!')\n"
+RAW = "INSERT 2:     print('world!')\nDELETE 2"
+FINAL = "def hello():\n    print('world!')"
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    directory = tmp_path / "dataset"
+    recorder = DatasetRecorder(directory)
+    recorder.record(ORIGINAL, SUGGESTION, RAW, FINAL, label="good")
+    recorder.record(ORIGINAL, SUGGESTION, RAW, "edited by hand", label="bad")
+    recorder.record("x = 1", "x = 2", "NO CHANGES", "x = 1", label="good")
+    recorder.close()
+    return directory
+
+
+def test_replay_reports_exact_matches_and_latency(dataset):
+    report = replay.replay(replay.iter_corpus(str(dataset)), jobs=1)
+    assert (report.records, report.matched, report.errors) == (3, 2, 0)
+    assert len(report.mismatches) == 1
+    assert 0 < report.percentile(50) <= report.percentile(99) <= report.percentile(100)
+    assert report.to_dict()["exact_match_rate"] == pytest.approx(2 / 3, abs=1e-6)
+
+
+def test_pipeline_mode_uses_local_diff_or_recorded_instructions(tmp_path):
+    snippet = {"original": "a = 1\nb = 2\nc = 3\nd = 4", "suggestion": "b = 20",
+               "raw_instructions": "INSERT 2: b = 20\nDELETE 2", "final_code": "a = 1\nb = 20\nc = 3\nd = 4"}
+    complete = {"original": ORIGINAL, "suggestion": SUGGESTION, "raw_instructions": "", "final_code": FINAL}
+    report = replay.replay(enumerate([snippet, complete]), jobs=1, use_pipeline=True)
+    assert (report.records, report.matched) == (2, 2)
+
+
+def test_unreadable_lines_and_incomplete_records_count_as_errors(tmp_path):
+    corpus = tmp_path / "corpus.jsonl.gz"
+    with gzip.open(corpus, "wt", encoding="utf-8") as handle:
+        handle.write(json.dumps({"original": "x = 1", "raw_instructions": "DELETE 1", "final_code": ""}) + "\n")
+        handle.write("not json\n\n")
+        handle.write(json.dumps({"original": "x = 1"}) + "\n")
+    report = replay.replay(replay.iter_corpus(str(corpus)), jobs=1)
+    assert (report.records, report.matched, report.errors) == (3, 1, 2)
+    assert report.mismatches == ["#1", "#2"]
+
+
+def test_replay_in_worker_processes_matches_inline(dataset):
+    inline = replay.replay(replay.iter_corpus(str(dataset)), jobs=1)
+    pooled = replay.replay(replay.iter_corpus(str(dataset)), jobs=2, chunk_size=1)
+    assert (pooled.records, pooled.matched, pooled.mismatches) == (inline.records, inline.matched, inline.mismatches)
+
+
+def test_cli_replay_subcommand_gates_on_match_rate(dataset, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["main.py", "replay", str(dataset), "-j", "1", "--json", "--min-match", "0.5"])
+    with pytest.raises(SystemExit) as exc:
+        cli_main.main()
+    assert exc.value.code == 0
+    captured = capsys.readouterr()
+    assert json.loads(captured.out)["matched"] == 2
+    assert "records/s" in captured.err
+
+    assert replay.replay_main([str(dataset), "-j", "1", "--min-match", "1"], out=io.StringIO()) == 1
+    assert replay.replay_main([str(dataset / "missing.jsonl")]) == 1
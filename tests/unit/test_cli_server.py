@@ -0,0 +1,139 @@
+# tests/unit/test_cli_server.py
+import http.client
+import json
+import sys
+import threading
+
+import pytest
+
+from src.cli import main as cli_main
+from src.cli.server import CodeSlingServer, ServerClient
+
+SNIPPET_ORIGINAL = "\n".join(f"x{i} = {i}" for i in range(10))
+
+
+class FakeAgent:
+    def __init__(self):
+        self.calls = 0
+
+    def get_instructions(self, original_code, ai_suggestion):
+        self.calls += 1
+        return "INSERT 4: x3 = 'three'\nDELETE 4"
+
+
+@pytest.fixture
+def server(monkeypatch, tmp_path):
+    from src.config.settings import AppSettings
+
+    settings = AppSettings(openai_api_key="test-key", data_dir=tmp_path)
+    monkeypatch.setattr("src.config.settings.get_settings", lambda: settings)
+    built = []
+
+    def factory(windowed):
+        built.append(FakeAgent())
+        return built[-1]
+
+    srv = CodeSlingServer(("127.0.0.1", 0), agent_factory=factory)
+    srv.built = built
+    thread = threading.Thread(target=srv.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_health_and_local_diff_without_agent(server):
+    client = ServerClient(server.url)
+    assert client.health() == {"status": "ok", "agent_ready": False}
+    result = client.process("a = 1\nb = 2", "a = 1\nb = 3")
+    assert (result.modified_code, result.source, result.error) == ("a = 1\nb = 3", "local", None)
+    assert server.built == []            # complete files never build the agent
+    client.close()
+
+
+def test_agent_is_built_once_and_reused(server):
+    client = ServerClient(server.url)
+    for _ in range(3):
+        result = client.process(SNIPPET_ORIGINAL, "x3 = 'three'")
+        assert result.source == "ai" and "x3 = 'three'\nx4 = 4" in result.modified_code
+    assert len(server.built) == 1 and server.built[0].calls == 3
+    assert client.health()["agent_ready"] is True
+    client.close()
+
+
+def test_bad_requests_get_400(server):
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+    conn.request("POST", "/process", body=b"{not json", headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    assert response.status == 400 and json.loads(response.read())["error"].startswith("ERROR: bad request")
+    # Same keep-alive connection still usable afterwards.
+    conn.request("POST", "/process", body=json.dumps({"original": "a"}).encode())
+    assert conn.getresponse().status == 400
+    conn.close()
+
+
+@pytest.mark.parametrize("length", ["-5", "abc", "1e3"])
+def test_invalid_content_length_gets_400_and_closes(server, length):
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+    conn.putrequest("POST", "/process")
+    conn.putheader("Content-Length", length)
+    conn.endheaders(b'{"original": "a", "suggestion": "b"}')
+    response = conn.getresponse()
+    assert response.status == 400 and response.getheader("Connection") == "close"
+    assert json.loads(response.read())["error"] == f"ERROR: bad request – invalid Content-Length {length!r}"
+    conn.close()
+
+
+def test_agent_failure_is_reported_per_request(monkeypatch, tmp_path):
+    def no_key(windowed):
+        raise ValueError("OpenAI API key not configured in settings.")
+    from src.config.settings import AppSettings
+    monkeypatch.setattr("src.config.settings.get_settings", lambda: AppSettings(openai_api_key="k", data_dir=tmp_path))
+    srv = CodeSlingServer(("127.0.0.1", 0), agent_factory=no_key)
+    reply = srv.process(SNIPPET_ORIGINAL, "x3 = 'three'")
+    srv.server_close()
+    assert reply["error"] == "ERROR: OpenAI API key not configured in settings."
+
+
+def test_cli_server_flag(server, tmp_path, monkeypatch):
+    original = tmp_path / "original.py"
+    suggestion = tmp_path / "suggestion.py"
+    output = tmp_path / "out.py"
+    original.write_text(SNIPPET_ORIGINAL, encoding="utf-8")
+    suggestion.write_text("x3 = 'three'", encoding="utf-8")
+    monkeypatch.setattr(cli_main, "_make_agent", lambda total_lines=0: pytest.fail("must not build a local agent"))
+    monkeypatch.setattr(sys, "argv", ["codesling", str(original), str(suggestion), "-o", str(output), "--server", server.url])
+    cli_main.main()
+    assert "x3 = 'three'\nx4 = 4" in output.read_text(encoding="utf-8")
+
+
+def test_cli_server_strict_uses_the_daemons_validation(server, tmp_path, monkeypatch, capsys):
+    original = tmp_path / "original.py"
+    suggestion = tmp_path / "suggestion.py"
+    output = tmp_path / "out.py"
+    original.write_text(SNIPPET_ORIGINAL, encoding="utf-8")
+    suggestion.write_text("x3 = 'three'", encoding="utf-8")
+    server.process(SNIPPET_ORIGINAL, "x3 = 'three'")  # build the agent, then make it overreach
+    server.built[0].get_instructions = lambda original_code, ai_suggestion: "INSERT 4: x3 = 'three'\nDELETE 4-20"
+
+    result = ServerClient(server.url).process(SNIPPET_ORIGINAL, "x3 = 'three'")
+    assert not result.validation.ok and result.validation.counts() == {"out_of_bounds": 1}
+
+    monkeypatch.setattr(sys, "argv", [
+        "codesling", str(original), str(suggestion), "-o", str(output), "--server", server.url, "--strict",
+    ])
+    with pytest.raises(SystemExit) as excinfo:
+        cli_main.main()
+    assert excinfo.value.code == 1
+    assert "rejected (--strict)" in capsys.readouterr().err
+    assert not output.exists()
+
+
+def test_cli_server_unreachable(tmp_path, monkeypatch, capsys):
+    original = tmp_path / "original.py"
+    original.write_text("a", encoding="utf-8")
+    monkeypatch.setattr(sys, "argv", ["codesling", str(original), str(original), "--server", "http://127.0.0.1:9"])
+    with pytest.raises(SystemExit) as excinfo:
+        cli_main.main()
+    assert excinfo.value.code == 1
+    assert "Could not reach the CodeSlinger server" in capsys.readouterr().err
@@ -29,4 +29,7 @@ def test_add_line_numbers_to_list_single_line():
 def test_add_line_numbers_to_list_multiple_lines():
     code_list = ["def foo():", "    return 'bar'"]
     expected = ["1: def foo():", "2:     return 'bar'"]
-    assert add_line_numbers_to_list(code_list) == expected
\ No newline at end of file
+    assert add_line_numbers_to_list(code_list) == expected
+def test_add_line_numbers_with_start_offset():
+    assert add_line_numbers("a\nb", start=41) == "41: a\n42: b"
+    assert add_line_numbers_to_list(["a", "b"], start=7) == ["7: a", "8: b"]
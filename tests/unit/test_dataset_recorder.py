@@ -0,0 +1,68 @@
+# tests/unit/test_dataset_recorder.py
+import os
+import time
+
+from src.ai.dataset_recorder import DatasetRecorder, content_hash, iter_records
+
+
+def _record(recorder, n, label="good"):
+    recorder.record(f"original {n}", f"suggestion {n}", "NO CHANGES", f"final {n}", label=label, source="local")
+
+
+def test_records_are_written_and_read_back(tmp_path):
+    recorder = DatasetRecorder(tmp_path)
+    _record(recorder, 1)
+    recorder.close()
+
+    [record] = list(iter_records(tmp_path))
+    assert record["original"] == "original 1"
+    assert record["final_code"] == "final 1"
+    assert record["label"] == "good" and record["source"] == "local"
+    assert record["id"] == content_hash(record)
+
+def test_duplicates_are_dropped_within_and_across_sessions(tmp_path):
+    recorder = DatasetRecorder(tmp_path)
+    _record(recorder, 1)
+    _record(recorder, 1)
+    _record(recorder, 1, label="bad")  # a different rating is a different record
+    recorder.close()
+    assert (recorder.written, recorder.duplicates) == (2, 1)
+
+    recorder = DatasetRecorder(tmp_path)
+    _record(recorder, 1)
+    _record(recorder, 2)
+    recorder.close()
+    assert (recorder.written, recorder.duplicates) == (1, 1)
+    assert sorted(r["original"] for r in iter_records(tmp_path)) == ["original 1", "original 1", "original 2"]
+
+def test_shards_rotate_by_compressed_size(tmp_path):
+    recorder = DatasetRecorder(tmp_path, max_shard_bytes=4096)
+    for n in range(20):
+        recorder.record(os.urandom(2048).hex(), "s", "NO CHANGES", "f")
+    recorder.close()
+
+    shards = sorted(tmp_path.glob("*.jsonl.gz"))
+    assert len(shards) > 1
+    assert all(shard.stat().st_size < 4096 * 2 for shard in shards)
+    assert len(list(iter_records(tmp_path))) == 20
+
+def test_flush_makes_records_readable_before_close(tmp_path):
+    recorder = DatasetRecorder(tmp_path)
+    _record(recorder, 1)
+    recorder.flush()
+    assert [r["original"] for r in iter_records(tmp_path)] == ["original 1"]  # shard not closed yet
+    recorder.close()
+    recorder.close()
+    _record(recorder, 2)  # ignored after close
+    assert len(list(iter_records(tmp_path))) == 1
+
+def test_record_does_not_block_on_disk(tmp_path):
+    recorder = DatasetRecorder(tmp_path)
+    code = "x = 1\n" * 1000
+    started = time.perf_counter()
+    for n in range(2000):
+        recorder.record(code, code, "NO CHANGES", code + str(n))
+    per_call = (time.perf_counter() - started) / 2000
+    recorder.close()
+    assert per_call < 50e-6
+    assert recorder.written == 2000
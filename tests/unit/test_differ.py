@@ -0,0 +1,117 @@
+# tests/unit/test_differ.py
+import random
+
+import pytest
+
+from src.core.differ import (
+    changed_hunks,
+    diff_instructions,
+    format_instructions,
+    is_complete_suggestion,
+    match_lines,
+    try_local_diff,
+)
+from src.core.injector import apply_instructions
+from src.core.parser import DeleteInstruction, InsertInstruction, parse_instructions
+
+
+def test_match_lines_identical():
+    lines = ["a", "b", "c"]
+    assert match_lines(lines, lines) == [(0, 0, 3)]
+
+def test_match_lines_empty_sides():
+    assert match_lines([], ["a"]) == []
+    assert match_lines(["a"], []) == []
+
+def test_diff_no_changes():
+    assert diff_instructions("a\nb", "a\nb") == []
+    assert format_instructions([]) == "NO CHANGES"
+
+def test_diff_replacement_inserts_before_deleted_line():
+    original = "def hello():\n    print('world')"
+    suggestion = "def hello():\n    # A greeting\n    print('world!')"
+    assert diff_instructions(original, suggestion) == [
+        InsertInstruction(line_before=2, content="    # A greeting"),
+        InsertInstruction(line_before=2, content="    print('world!')"),
+        DeleteInstruction(line_start=2),
+    ]
+
+def test_diff_append_and_delete_range():
+    original = "a\nb\nc\nd"
+    suggestion = "a\nd\ne"
+    assert diff_instructions(original, suggestion) == [
+        DeleteInstruction(line_start=2, line_end=3),
+        InsertInstruction(line_before=5, content="e"),
+    ]
+
+def test_format_instructions_round_trips_through_parser():
+    instructions = [
+        InsertInstruction(line_before=3, content="    indented()"),
+        InsertInstruction(line_before=3, content=""),
+        InsertInstruction(line_before=3, content=" odd spacing  "),
+        DeleteInstruction(line_start=4),
+        DeleteInstruction(line_start=7, line_end=9),
+    ]
+    assert parse_instructions(format_instructions(instructions)) == instructions
+
+def test_diff_moved_block_uses_unique_anchors():
+    original = ["import os", "def a():", "    return 1", "", "def b():", "    return 2"]
+    suggestion = ["import os", "def b():", "    return 2", "", "def a():", "    return 1"]
+    result = apply_instructions("\n".join(original), diff_instructions("\n".join(original), "\n".join(suggestion)))
+    assert result == "\n".join(suggestion)
+
+def test_diff_random_pairs_apply_back_to_suggestion():
+    rng = random.Random(7)
+    for _ in range(500):
+        a = [rng.choice(["x = 1", "y = 2", "", "pass", "return x"]) for _ in range(rng.randint(0, 20))]
+        b = [rng.choice(["x = 1", "y = 3", "", "pass", "z()"]) for _ in range(rng.randint(0, 20))]
+        original, suggestion = "\n".join(a), "\n".join(b)
+        instructions = diff_instructions(original, suggestion)
+        assert apply_instructions(original, instructions) == "\n".join(suggestion.splitlines())
+        assert parse_instructions(format_instructions(instructions)) == instructions
+
+@pytest.mark.parametrize("snippet", [
+    "def f():\n    # ... existing code ...\n    return 2",
+    "class A:\n    ...\n    def g(self):\n        pass",
+    "// rest of the function unchanged",
+])
+def test_elided_snippet_is_not_complete(snippet):
+    original = "\n".join(f"line_{i}" for i in range(10))
+    assert try_local_diff(original, original + "\n" + snippet) is None
+
+def test_short_snippet_is_not_complete():
+    original = "\n".join(f"value_{i} = {i}" for i in range(50))
+    snippet = "value_10 = 10\nvalue_11 = 'changed'"
+    assert try_local_diff(original, snippet) is None
+
+def test_complete_file_with_small_edit_is_diffed_locally():
+    original = "\n".join(f"value_{i} = {i}" for i in range(50))
+    suggestion = original.replace("value_10 = 10", "value_10 = 'ten'")
+    instructions = try_local_diff(original, suggestion)
+    assert instructions == [
+        InsertInstruction(line_before=11, content="value_10 = 'ten'"),
+        DeleteInstruction(line_start=11),
+    ]
+
+def test_empty_original_is_complete():
+    assert is_complete_suggestion([], ["x"], [])
+    assert try_local_diff("", "x\ny") == [
+        InsertInstruction(line_before=1, content="x"),
+        InsertInstruction(line_before=1, content="y"),
+    ]
+
+
+def test_changed_hunks_pads_and_merges_context():
+    a = [f"l{i}" for i in range(30)]
+    b = list(a)
+    b[5] = "changed5"
+    b[8] = "changed8"      # within 2*context of line 5 -> same hunk
+    b[25] = "changed25"    # far away -> own hunk
+    hunks = changed_hunks(a, b, match_lines(a, b), context=2)
+    assert hunks == [(3, 11, 3, 11), (23, 28, 23, 28)]
+
+def test_changed_hunks_clips_at_file_edges_and_tracks_offsets():
+    a = ["x", "y", "z"]
+    b = ["new", "x", "y", "z", "tail"]
+    assert changed_hunks(a, b, match_lines(a, b), context=3) == [(0, 3, 0, 5)]
+    assert changed_hunks(a, a, match_lines(a, a)) == []
@@ -0,0 +1,97 @@
+# tests/unit/test_document.py
+import pickle
+
+import pytest
+
+from src.ai.reasoning_agent import _prepare_request
+from src.core.injector import apply_instructions
+from src.core.parser import DeleteInstruction
+from src.core.pipeline import process_pair
+from src.models.document import Document, split_lines
+from src.utils.code_utils import add_line_numbers
+
+
+class CountingDocument(Document):
+    def splitlines(self, *args, **kwargs):
+        self.__dict__["splits"] = self.__dict__.get("splits", 0) + 1
+        return super().splitlines(*args, **kwargs)
+
+
+def test_document_is_a_string_with_cached_lines():
+    doc = Document("a\r\nb\n\nc")
+    assert doc == "a\r\nb\n\nc" and hash(doc) == hash("a\r\nb\n\nc")
+    assert doc.lines == ["a", "b", "", "c"] and doc.lines is split_lines(doc)
+    assert doc.line(2) == "b" and doc.line_count == 4
+    assert list(doc.line_starts) == [0, 3, 5, 6, 7]
+    assert Document(doc) is doc
+    with pytest.raises(IndexError):
+        doc.line(5)
+
+
+def test_views_share_lines_and_keep_original_line_breaks():
+    doc = Document("one\r\ntwo\nthree\rfour")
+    view = doc.view(2, 3)
+    assert list(view) == ["two", "three"] and len(view) == 2 and view[-1] == "three"
+    assert view.text == "two\nthree"
+    assert doc.view(1, 2).text == "one\r\ntwo"
+    assert list(view[1:]) == ["three"] and view[1:].numbered() == "3: three"
+    assert list(doc.view(3)) == ["three", "four"]
+    assert len(doc.view(3, 2)) == 0 and doc.view(3, 2).text == ""
+
+
+def test_numbered_view_is_cached_and_matches_add_line_numbers():
+    text = "def f():\n    return 1\n"
+    doc = Document(text)
+    assert add_line_numbers(doc) == add_line_numbers(text) == "1: def f():\n2:     return 1"
+    assert add_line_numbers(doc) is doc.numbered()
+    assert add_line_numbers(doc, start=5) == add_line_numbers(text, start=5)
+
+
+def test_pickles_as_a_fresh_document():
+    doc = Document("x\ny")
+    doc.lines
+    copy = pickle.loads(pickle.dumps(doc))
+    assert type(copy) is Document and copy == doc and copy.lines == ["x", "y"]
+
+
+def test_pipeline_splits_each_input_once():
+    original = CountingDocument("\n".join(f"x{i} = {i}" for i in range(50)))
+    suggestion = CountingDocument(original.replace("x7 = 7", "x7 = 'seven'"))
+    result = process_pair(original, suggestion)
+    assert result.source == "local" and "x7 = 'seven'" in result.modified_code
+    assert apply_instructions(original, [DeleteInstruction(1)]).startswith("x1 = 1")
+    assert original.splits == 1 and suggestion.splits == 1
+
+
+def test_prompt_reuses_document_splits_in_hunk_mode():
+    original = CountingDocument("\n".join(f"x{i} = {i}" for i in range(200)))
+    suggestion = CountingDocument(original.replace("x70 = 70", "x70 = 'seventy'"))
+    request = _prepare_request("model", original, suggestion, prompt_mode="hunks")
+    assert request.stats.mode == "hunks"
+    assert original.splits == 1 and suggestion.splits == 1
+
+
+def test_plain_strings_are_not_copied_into_documents(monkeypatch):
+    def no_document(cls, text=""):
+        raise AssertionError("plain strings must not be wrapped in a Document")
+    monkeypatch.setattr(Document, "__new__", no_document)
+    original = "\n".join(f"x{i} = {i}" for i in range(200))
+    suggestion = original.replace("x70 = 70", "x70 = 'seventy'")
+    assert process_pair(original, suggestion).source == "local"
+    assert _prepare_request("model", original, suggestion, prompt_mode="hunks").stats.mode == "hunks"
+
+
+def test_hunk_mode_sizes_the_full_prompt_without_building_it(monkeypatch):
+    import src.ai.reasoning_agent as reasoning_agent
+
+    original = "\n".join(f"x{i} = {i}" for i in range(200))
+    suggestion = original.replace("x70 = 70", "x70 = 'seventy'")
+    full_prompt = _prepare_request("model", original, suggestion).messages[1]["content"]
+    built = []
+    build_prompt = reasoning_agent._build_prompt
+    monkeypatch.setattr(
+        reasoning_agent, "_build_prompt", lambda o, s: built.append(len(o) + len(s)) or build_prompt(o, s)
+    )
+    request = _prepare_request("model", original, suggestion, prompt_mode="hunks")
+    assert request.stats.mode == "hunks" and request.stats.full_chars == len(full_prompt)
+    assert all(size < 20 for size in built)  # at most the short stand-ins used for sizing
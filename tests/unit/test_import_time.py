@@ -0,0 +1,42 @@
+# tests/unit/test_import_time.py
+"""Cold-start guard: an offline CLI apply must not load the model/settings stack."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+HEAVY_MODULES = ("openai", "pydantic_settings", "pydantic", "PySide6", "sqlite3", "asyncio", "multiprocessing")
+# Generous so slow CI machines pass; an eager openai + pydantic-settings import alone costs ~0.5s.
+IMPORT_BUDGET_US = 200_000
+
+
+def _importtime(args, cwd):
+    env = {**os.environ, "PYTHONPATH": str(PROJECT_ROOT)}
+    env.pop("OPENAI_API_KEY", None)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args], cwd=cwd, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    imports = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imports[name.strip()] = int(cumulative_us)
+    return imports
+
+
+def test_offline_apply_skips_heavy_imports(tmp_path):
+    (tmp_path / "original.py").write_text("a = 1\nb = 2\n", encoding="utf-8")
+    (tmp_path / "suggestion.py").write_text("a = 1\nb = 3\n", encoding="utf-8")
+    imports = _importtime(["-m", "src.cli.main", "original.py", "suggestion.py", "-o", "out.py"], cwd=tmp_path)
+
+    assert (tmp_path / "out.py").read_text(encoding="utf-8") == "a = 1\nb = 3"
+    loaded = sorted(name for name in imports if name.split(".")[0] in HEAVY_MODULES)
+    assert loaded == []
+
+
+def test_cli_import_time_budget(tmp_path):
+    imports = _importtime(["-c", "import src.cli.main"], cwd=tmp_path)
+    assert imports["src.cli.main"] < IMPORT_BUDGET_US
@@ -0,0 +1,75 @@
+# tests/unit/test_incremental.py
+import random
+
+from src.core.differ import is_complete_suggestion, match_lines, try_local_diff
+from src.core.incremental import IncrementalDiffer
+from src.core.injector import apply_instructions
+
+LINES = ["x = 1", "y = 2", "", "pass", "return x", "# ... existing code ..."]
+
+
+def _assert_valid(matches, a, b):
+    i_end = j_end = 0
+    for i, j, n in matches:
+        assert n > 0 and i >= i_end and j >= j_end
+        assert a[i:i + n] == b[j:j + n]
+        i_end, j_end = i + n, j + n
+
+
+def _edit(rng, lines):
+    k = rng.randint(0, len(lines))
+    lines[k:k + rng.randint(0, 2)] = [rng.choice(LINES) for _ in range(rng.randint(0, 2))]
+
+
+def test_incremental_matches_stay_valid_across_random_edits():
+    rng = random.Random(11)
+    for _ in range(300):
+        differ = IncrementalDiffer()
+        a = [rng.choice(LINES) for _ in range(rng.randint(0, 20))]
+        b = [rng.choice(LINES) for _ in range(rng.randint(0, 20))]
+        for _ in range(5):
+            matches = differ.match(list(a), list(b))
+            _assert_valid(matches, a, b)
+            assert differ.is_complete(a, b, matches) == is_complete_suggestion(a, b, matches)
+            if rng.random() < 0.7:
+                _edit(rng, a)
+            if rng.random() < 0.7:
+                _edit(rng, b)
+
+def test_try_diff_applies_back_to_suggestion():
+    differ = IncrementalDiffer()
+    original = "\n".join(f"line_{i}" for i in range(50))
+    suggestion = original.replace("line_10", "line_ten")
+    for edited in (original, original.replace("line_30", "line_thirty"), original + "\nextra"):
+        instructions = differ.try_diff(edited, suggestion)
+        assert apply_instructions(edited, instructions) == suggestion
+
+def test_single_line_edit_only_rediffs_around_it():
+    differ = IncrementalDiffer()
+    lines = [f"value_{i} = {i}" for i in range(10_000)]
+    suggestion = "\n".join(lines[:100] + ["changed = 1"] + lines[101:])
+    differ.try_diff("\n".join(lines), suggestion)
+    assert differ.last_window == (10_000, 10_000)
+
+    lines[5_000] += "  # edited"
+    instructions = differ.try_diff("\n".join(lines), suggestion)
+    assert differ.last_window == (1, 1)
+    assert apply_instructions("\n".join(lines), instructions) == suggestion
+
+    differ.try_diff("\n".join(lines), suggestion)
+    assert differ.last_window == (0, 0)
+
+def test_snippet_returns_none_like_try_local_diff():
+    differ = IncrementalDiffer()
+    original = "\n".join(f"line_{i}" for i in range(10))
+    snippet = original + "\n# ... existing code ..."
+    assert differ.try_diff(original, original) == []
+    assert differ.try_diff(original, snippet) is None
+    assert try_local_diff(original, snippet) is None
+
+def test_reset_forgets_previous_alignment():
+    differ = IncrementalDiffer()
+    differ.match(["a", "b"], ["a", "c"])
+    differ.reset()
+    assert differ.match(["x"], ["x"]) == match_lines(["x"], ["x"])
+    assert differ.last_window == (1, 1)
@@ -0,0 +1,118 @@
+# tests/unit/test_indentation_model.py
+import random
+import time
+
+import pytest
+
+from benchmarks.corpus import generate_python_file
+from src.ai.indentation_model import (
+    IndentationResult,
+    compiles,
+    detect_indent_unit,
+    fix_indentation,
+    repair_injected,
+)
+from src.core.injector import apply_instructions
+from src.core.parser import DeleteInstruction, InsertInstruction
+
+ORIGINAL = """class A:
+    def f(self, x):
+        if x:
+            y = 1
+        return x
+
+    def g(self):
+        pass
+"""
+
+
+def _repair(instructions, fallback=None):
+    return repair_injected(ORIGINAL, apply_instructions(ORIGINAL, instructions), instructions, fallback=fallback)
+
+
+@pytest.mark.parametrize("lines, unit", [
+    (["def f():", "    if x:", "        y"], "    "),
+    (["if a:", "  b", "  if c:", "    d"], "  "),
+    (["def f():", "\tx", "\t\ty"], "\t"),
+    (["x = 1"], "    "),
+])
+def test_detect_indent_unit(lines, unit):
+    assert detect_indent_unit(lines) == unit
+
+def test_snippet_relative_line_moves_into_enclosing_block():
+    result = _repair([InsertInstruction(line_before=5, content="z = 2")])
+    assert result.source == "rules" and result.valid
+    assert "            y = 1\n        z = 2\n        return x" in result.code
+    assert result.changed_lines == [5]
+
+def test_inserted_block_keeps_its_relative_structure():
+    result = _repair([
+        InsertInstruction(line_before=5, content="if z:"),
+        InsertInstruction(line_before=5, content="  w = 3"),
+    ])
+    assert "        if z:\n            w = 3\n        return x" in result.code
+
+def test_run_after_block_opener_becomes_its_body():
+    result = _repair([
+        InsertInstruction(line_before=4, content="# note"),
+        InsertInstruction(line_before=4, content="z = (1,"),
+        InsertInstruction(line_before=4, content="     2)"),
+    ])
+    assert "        if x:\n            # note\n            z = (1,\n                 2)\n            y = 1" in result.code
+
+def test_valid_indentation_from_the_model_is_kept():
+    # At the end of a block both levels are legal; the inserted line's own one wins.
+    result = _repair([InsertInstruction(line_before=9, content="def top():"), InsertInstruction(line_before=9, content="    return 0")])
+    assert result.source == "unchanged"
+    assert result.code.endswith("        pass\ndef top():\n    return 0")
+
+def test_multiline_string_contents_are_not_shifted():
+    result = _repair([
+        InsertInstruction(line_before=5, content="w = '''a"),
+        InsertInstruction(line_before=5, content="b'''"),
+    ])
+    assert "        w = '''a\nb'''\n" in result.code
+
+def test_unrepairable_code_asks_fallback_once():
+    calls = []
+    def fallback(code):
+        calls.append(code)
+        return code.replace("\nif z:\n        return x", "\n        if z:\n            return x")
+    result = _repair([InsertInstruction(line_before=5, content="if z:")], fallback=fallback)
+    assert len(calls) == 1
+    assert result.source == "model" and result.valid
+    assert "        if z:\n            return x\n" in result.code
+
+def test_fallback_reply_that_rewrites_lines_is_rejected():
+    # ORIGINAL compiles, but it drops the inserted line rather than re-indenting it.
+    result = _repair([InsertInstruction(line_before=5, content="if z:")], fallback=lambda code: ORIGINAL)
+    assert not result.valid and result.error.startswith("ERROR:")
+    assert "if z:" in result.code
+
+def test_fallback_not_called_when_rules_succeed_or_original_is_not_python():
+    fallback = lambda code: pytest.fail("fallback must not be called")
+    assert _repair([InsertInstruction(line_before=5, content="z = 2")], fallback=fallback).valid
+    original = "function f() {\n  return 1;\n}"
+    instructions = [InsertInstruction(line_before=2, content="x();")]
+    result = repair_injected(original, apply_instructions(original, instructions), instructions, fallback=fallback)
+    assert not result.valid and result.error.startswith("ERROR:")
+
+def test_fix_indentation_never_breaks_valid_code():
+    code = "x = 1\nif x:\n    y = 2\n"
+    assert fix_indentation(code, [(3, 3)]) == IndentationResult(code)
+
+def test_repairs_10k_line_file_quickly():
+    original = generate_python_file(10_000)
+    rng = random.Random(3)
+    rows = sorted(rng.sample(range(2, 10_000), 500))
+    instructions = [InsertInstruction(line_before=row + 1, content="value = compute(x, 1)") for row in rows]
+    instructions.append(DeleteInstruction(line_start=rows[0] + 1))
+    modified = apply_instructions(original, instructions)
+    assert not compiles(modified)
+
+    started = time.perf_counter()
+    result = repair_injected(original, modified, instructions)
+    elapsed = time.perf_counter() - started
+
+    assert result.source == "rules" and result.valid
+    assert elapsed < 1.0
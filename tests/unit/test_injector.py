@@ -1,6 +1,15 @@
 # tests/unit/test_injector.py
 import pytest
-from src.core.injector import apply_instructions
+import io
+
+from src.core.injector import (
+    apply_instructions,
+    apply_instructions_to_file,
+    iter_source_lines,
+    map_line_changes,
+    merge_delete_ranges,
+    stream_instructions,
+)
 from src.core.parser import InsertInstruction, DeleteInstruction
 
 def test_apply_no_instructions():
@@ -128,4 +137,110 @@ def test_empty_original_code_delete_noop():
     code = ""
     instructions = [DeleteInstruction(line_start=1)]
     expected = ""
-    assert apply_instructions(code, instructions) == expected
\ No newline at end of file
+    assert apply_instructions(code, instructions) == expected
+
+def test_apply_overlapping_and_duplicate_deletes():
+    code = "l1\nl2\nl3\nl4\nl5\nl6"
+    instructions = [
+        DeleteInstruction(line_start=2, line_end=4),
+        DeleteInstruction(line_start=3, line_end=5),
+        DeleteInstruction(line_start=3),
+    ]
+    assert apply_instructions(code, instructions) == "l1\nl6"
+
+def test_apply_insert_before_deleted_line_kept():
+    # Replacement pattern: insert before a line that is itself deleted
+    code = "a\nb\nc"
+    instructions = [InsertInstruction(line_before=2, content="B"), DeleteInstruction(line_start=2)]
+    assert apply_instructions(code, instructions) == "a\nB\nc"
+
+def test_apply_delete_range_beyond_end_is_clipped():
+    code = "line1\nline2\nline3"
+    instructions = [DeleteInstruction(line_start=2, line_end=5_000_000)]
+    assert apply_instructions(code, instructions) == "line1"
+
+def test_merge_delete_ranges_sorts_merges_and_clips():
+    instructions = [
+        DeleteInstruction(line_start=8, line_end=20),
+        DeleteInstruction(line_start=1, line_end=2),
+        DeleteInstruction(line_start=3),        # adjacent to 1-2
+        InsertInstruction(line_before=5, content="x"),
+        DeleteInstruction(line_start=6, line_end=9),
+        DeleteInstruction(line_start=0, line_end=0),  # out of range
+    ]
+    assert merge_delete_ranges(instructions, num_lines=10) == [(1, 3), (6, 10)]
+
+def test_map_line_changes_ranges_match_apply_instructions():
+    code = "\n".join(f"l{i}" for i in range(1, 11))
+    instructions = [
+        InsertInstruction(line_before=1, content="top"),
+        InsertInstruction(line_before=3, content="C"),
+        DeleteInstruction(line_start=3, line_end=4),
+        DeleteInstruction(line_start=8),
+        InsertInstruction(line_before=11, content="end"),
+    ]
+    changes = map_line_changes(10, instructions)
+    result = apply_instructions(code, instructions).splitlines()
+    original = code.splitlines()
+
+    assert changes.deleted == [(3, 4), (8, 8)]
+    assert changes.inserted == [(1, 1), (4, 4), (10, 10)]
+    assert [result[start - 1] for start, _ in changes.inserted] == ["top", "C", "end"]
+    assert changes.kept == [(1, 2, 2), (5, 5, 3), (9, 8, 2)]
+    for original_start, result_start, length in changes.kept:
+        assert original[original_start - 1:original_start - 1 + length] == \
+            result[result_start - 1:result_start - 1 + length]
+
+def test_map_line_changes_no_instructions_keeps_everything():
+    changes = map_line_changes(5, [])
+    assert (changes.deleted, changes.inserted, changes.kept) == ([], [], [(1, 1, 5)])
+
+def test_map_line_changes_accounts_for_every_result_line():
+    import random
+
+    rng = random.Random(7)
+    for _ in range(200):
+        num_lines = rng.randrange(0, 30)
+        code = "\n".join(f"l{i}" for i in range(1, num_lines + 1))
+        instructions = []
+        for _ in range(rng.randrange(0, 8)):
+            if rng.random() < 0.5:
+                instructions.append(InsertInstruction(line_before=rng.randrange(0, num_lines + 3), content="new"))
+            else:
+                start = rng.randrange(0, num_lines + 2)
+                instructions.append(DeleteInstruction(line_start=start, line_end=start + rng.randrange(0, 4)))
+        result = apply_instructions(code, instructions).splitlines()
+        changes = map_line_changes(num_lines, instructions)
+        covered = sorted(
+            [(start, end) for start, end in changes.inserted]
+            + [(result_start, result_start + length - 1) for _, result_start, length in changes.kept]
+        )
+        lines = [line for start, end in covered for line in range(start, end + 1)]
+        assert lines == list(range(1, len(result) + 1))
+
+
+
+STREAM_CASES = [
+    ("", [InsertInstruction(line_before=1, content="hello")]),
+    ("line1\nline2\nline3\n", [DeleteInstruction(line_start=2), InsertInstruction(line_before=4, content="end")]),
+    ("a\r\nb\r\nc", [InsertInstruction(line_before=2, content="B"), DeleteInstruction(line_start=2)]),
+    ("a\rb\x0cc\u2028d\n\ne", [DeleteInstruction(line_start=3, line_end=4), InsertInstruction(line_before=9, content="bad")]),
+    ("only", [DeleteInstruction(line_start=1, line_end=1)]),
+]
+
+@pytest.mark.parametrize("code, instructions", STREAM_CASES)
+def test_stream_instructions_matches_apply_instructions(code, instructions):
+    output = io.StringIO()
+    line_count = stream_instructions(
+        iter_source_lines(io.StringIO(code, newline=""), block_size=3), instructions, output, chunk_size=4
+    )
+    assert output.getvalue() == apply_instructions(code, instructions)
+    assert line_count == len(code.splitlines())
+
+@pytest.mark.parametrize("code, instructions", STREAM_CASES)
+def test_apply_instructions_to_file_is_byte_identical(tmp_path, code, instructions):
+    original = tmp_path / "original.py"
+    result = tmp_path / "result.py"
+    original.write_bytes(code.encode("utf-8"))
+    apply_instructions_to_file(str(original), instructions, str(result))
+    assert result.read_bytes() == apply_instructions(code, instructions).encode("utf-8")
@@ -0,0 +1,72 @@
+# tests/unit/test_instruction_batch.py
+import tracemalloc
+
+import pytest
+
+from benchmarks.corpus import PROFILES, make_case
+from src.core.injector import apply_instructions, map_line_changes
+from src.core.parser import DeleteInstruction, InsertInstruction, parse_instructions
+from src.models.instruction_batch import InstructionBatch
+
+SCRIPT = "INSERT 1: import os\nDELETE 2\nnot an instruction\nDELETE 4-3\nDELETE 3-4\nINSERT 6:     tail()\nINSERT 2:"
+
+
+def test_parse_matches_parse_instructions():
+    batch = InstructionBatch.parse(SCRIPT)
+    assert batch == parse_instructions(SCRIPT)
+    assert list(batch) == [
+        InsertInstruction(1, "import os"),
+        DeleteInstruction(2),
+        DeleteInstruction(3, 4),
+        InsertInstruction(6, "    tail()"),
+        InsertInstruction(2, ""),
+    ]
+    assert batch.content == "import os    tail()"
+    assert list(batch.offsets) == [0, 9, 9, 9, 19, 19]
+
+
+@pytest.mark.parametrize("reply", ["", "NO CHANGES", "ERROR: boom"])
+def test_replies_without_instructions_give_an_empty_batch(reply):
+    assert len(InstructionBatch.parse(reply)) == 0
+
+
+def test_indexing_appending_and_equality():
+    batch = InstructionBatch([InsertInstruction(1, "a")])
+    batch.append_delete(3)
+    batch.append(InsertInstruction(4, "bc"))
+    assert batch[-1] == InsertInstruction(4, "bc") and batch[1] == DeleteInstruction(3)
+    assert batch[1:] == [DeleteInstruction(3), InsertInstruction(4, "bc")]
+    assert batch.content == "abc"
+    with pytest.raises(IndexError):
+        batch[3]
+    assert batch == InstructionBatch(list(batch))
+    assert batch != InstructionBatch.parse("INSERT 1: a")
+
+
+@pytest.mark.parametrize("profile", PROFILES)
+def test_injector_consumes_batches_directly(profile):
+    code, instructions, text = make_case(3000, profile)
+    batch = InstructionBatch.parse(text)
+    assert apply_instructions(code, batch) == apply_instructions(code, instructions)
+    assert map_line_changes(3000, batch) == map_line_changes(3000, instructions)
+
+
+def test_huge_line_numbers_are_clamped_not_rejected():
+    batch = InstructionBatch.parse(f"INSERT {10**30}: x\nDELETE 1-{10**30}")
+    assert apply_instructions("a\nb", batch) == ""
+
+
+def _retained(func, text):
+    tracemalloc.start()
+    result = func(text)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained
+
+
+def test_batch_retains_far_less_memory_than_the_object_list():
+    _, _, text = make_case(20_000, "dense")
+    instructions, list_bytes = _retained(parse_instructions, text)
+    batch, batch_bytes = _retained(InstructionBatch.parse, text)
+    assert batch == instructions
+    assert batch_bytes < 0.6 * list_bytes
@@ -1,8 +1,12 @@
 # tests/unit/test_parser.py
 import pytest
 
+import random
+
 from src.core.parser import (
     parse_instructions,
+    iter_parse_instructions,
+    InstructionStreamParser,
     InsertInstruction,
     DeleteInstruction
 )
@@ -112,4 +116,67 @@ def test_parse_instruction_with_empty_content_for_insert():
     assert len(result) == 1
     assert isinstance(result[0], InsertInstruction)
     assert result[0].line_before == 10
-    assert result[0].content == ""
\ No newline at end of file
+    assert result[0].content == ""
+
+def test_parse_delete_range_with_spaces_and_blank_lines():
+    instructions = "\n   \nDELETE 10 - 12  \n\t\ndelete   7\n"
+    result = parse_instructions(instructions)
+    assert result == [DeleteInstruction(line_start=10, line_end=12), DeleteInstruction(line_start=7)]
+
+
+def _random_chunks(text, rng):
+    cuts = sorted(rng.sample(range(1, len(text)), k=min(len(text) - 1, rng.randint(0, 8)))) if len(text) > 1 else []
+    bounds = [0] + cuts + [len(text)]
+    return [text[a:b] for a, b in zip(bounds, bounds[1:])]
+
+STREAM_SCRIPTS = [
+    "INSERT 1: first line\nDELETE 3\r\nINSERT 5:     indented()\nDELETE 70-92\n",
+    "\n\n  ERROR: model refused\nINSERT 1: x",
+    "NO CHANGES",
+    "NO CHANGES\nDELETE 4",
+    "junk\rDELETE 12\rINSERT 123: tail without newline",
+    "",
+    "   \n",
+    "ERR\nDELETE 2",
+]
+
+@pytest.mark.parametrize("script", STREAM_SCRIPTS)
+def test_stream_parser_matches_parse_instructions_for_any_split(script):
+    rng = random.Random(script)
+    for _ in range(50):
+        chunks = _random_chunks(script, rng)
+        assert list(iter_parse_instructions(chunks)) == parse_instructions(script), chunks
+
+def test_stream_parser_yields_as_soon_as_line_completes():
+    parser = InstructionStreamParser()
+    assert parser.feed("INSERT 1") == []
+    assert parser.feed("2: hel") == []
+    assert parser.feed("lo\nDELETE 4") == [InsertInstruction(line_before=12, content="hello")]
+    assert parser.feed("0-45\n") == [DeleteInstruction(line_start=40, line_end=45)]
+    assert parser.close() == []
+
+def test_stream_parser_holds_back_carriage_return():
+    parser = InstructionStreamParser()
+    assert parser.feed("DELETE 1\r") == []
+    assert parser.feed("\nDELETE 2\n") == [DeleteInstruction(line_start=1), DeleteInstruction(line_start=2)]
+
+def test_stream_parser_error_sentinel_swallows_rest():
+    parser = InstructionStreamParser()
+    assert parser.feed("  \nERR") == []
+    assert parser.feed("OR: upstream failure\nINSERT 1: x\n") == []
+    assert parser.is_error
+    assert parser.close() == []
+
+def test_stream_parser_rejects_feed_after_close():
+    parser = InstructionStreamParser()
+    parser.close()
+    with pytest.raises(ValueError):
+        parser.feed("DELETE 1")
+
+def test_instructions_are_slotted_and_immutable():
+    insert = InsertInstruction(line_before=1, content="x")
+    assert not hasattr(insert, "__dict__")
+    assert InsertInstruction.type == "insert" and DeleteInstruction.type == "delete"
+    with pytest.raises(AttributeError):
+        insert.line_before = 2
+    assert insert == InsertInstruction(1, "x") and hash(insert) == hash(InsertInstruction(1, "x"))
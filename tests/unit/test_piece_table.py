@@ -0,0 +1,81 @@
+# tests/unit/test_piece_table.py
+import random
+
+import pytest
+
+from benchmarks.corpus import PROFILES, make_case
+from src.core.injector import apply_instructions
+from src.core.parser import DeleteInstruction, InsertInstruction
+from src.models.instruction_batch import InstructionBatch
+from src.models.piece_table import PieceTable
+
+
+def _random_step(rng, num_lines, step):
+    instructions = []
+    for n in range(rng.randint(0, 6)):
+        if rng.random() < 0.5:
+            instructions.append(InsertInstruction(rng.randint(0, num_lines + 2), f"step{step}_{n}"))
+        else:
+            start = rng.randint(0, num_lines + 1)
+            instructions.append(DeleteInstruction(start, rng.choice([None, start + rng.randint(-1, 4)])))
+    return instructions
+
+
+def test_random_steps_match_apply_instructions_and_undo_redo_round_trips():
+    rng = random.Random(7)
+    for _ in range(500):
+        text = "\n".join(f"line {i}" for i in range(rng.randint(0, 12)))
+        table = PieceTable(text)
+        states = [table.text]
+        for step in range(rng.randint(1, 4)):
+            instructions = _random_step(rng, table.line_count, step)
+            expected = apply_instructions(states[-1], instructions)
+            depth = len(table._undo)
+            table.apply(instructions)
+            assert table.text == expected
+            assert [table.line(n) for n in range(1, table.line_count + 1)] == expected.splitlines()
+            if len(table._undo) > depth:  # steps without edits are not recorded
+                states.append(expected)
+        for state in reversed(states[:-1]):
+            assert table.undo()
+            assert table.text == state
+        assert not table.undo()
+        while table.redo():
+            pass
+        assert table.text == states[-1]
+
+
+@pytest.mark.parametrize("profile", PROFILES)
+def test_corpus_edits_and_batches(profile):
+    code, instructions, text = make_case(2000, profile)
+    table = PieceTable(code)
+    table.apply(InstructionBatch.parse(text))
+    assert table.text == apply_instructions(code, instructions)
+
+
+def test_apply_clears_redo_and_empty_steps_are_not_recorded():
+    table = PieceTable("a\nb\nc")
+    table.apply([DeleteInstruction(2)])
+    table.apply([InsertInstruction(1, "z")])
+    assert table.text == "z\na\nc"
+    table.undo()
+    assert table.can_redo and table.text == "a\nc"
+    table.apply([])
+    table.apply([DeleteInstruction(9)])  # out of range: nothing to do
+    assert table.can_redo
+    table.apply([InsertInstruction(3, "end")])
+    assert not table.can_redo and table.text == "a\nc\nend"
+    with pytest.raises(IndexError):
+        table.line(4)
+
+
+def test_steps_touch_pieces_not_lines():
+    text = "\n".join(str(i) for i in range(100_000))
+    table = PieceTable(text)
+    for step in range(10):
+        instructions = [InsertInstruction(50_000, f"x{step}"), DeleteInstruction(10 + step)]
+        text = apply_instructions(text, instructions)
+        table.apply(instructions)
+    assert table.piece_count <= 1 + 4 * 10
+    assert table.line(50_000) == text.splitlines()[49_999] and table.line_count == 100_000
+    assert table.text == text
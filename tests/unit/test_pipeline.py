@@ -0,0 +1,44 @@
+# tests/unit/test_pipeline.py
+from unittest.mock import MagicMock
+
+from src.core.parser import DeleteInstruction
+from src.core.pipeline import apply_raw_instructions, process_pair
+
+ORIGINAL = "\n".join(f"value_{i} = {i}" for i in range(20))
+
+
+def test_complete_suggestion_never_builds_agent():
+    factory = MagicMock()
+    suggestion = ORIGINAL.replace("value_3 = 3\n", "")
+    result = process_pair(ORIGINAL, suggestion, agent_factory=factory)
+    assert result.source == "local"
+    assert result.error is None
+    assert result.modified_code == suggestion
+    assert result.instructions == [DeleteInstruction(line_start=4)]
+    assert result.raw_instructions == "DELETE 4"
+    factory.assert_not_called()
+
+def test_snippet_goes_to_agent():
+    agent = MagicMock()
+    agent.get_instructions.return_value = "INSERT 1: # header"
+    result = process_pair(ORIGINAL, "# header", agent_factory=lambda: agent)
+    assert result.source == "ai"
+    assert result.modified_code.startswith("# header\nvalue_0 = 0")
+    agent.get_instructions.assert_called_once_with(ORIGINAL, "# header")
+
+def test_local_diff_can_be_disabled():
+    agent = MagicMock()
+    agent.get_instructions.return_value = "NO CHANGES"
+    result = process_pair(ORIGINAL, ORIGINAL, agent_factory=lambda: agent, use_local_diff=False)
+    assert result.source == "ai"
+    assert result.modified_code == ORIGINAL
+
+def test_snippet_without_agent_reports_error():
+    result = process_pair(ORIGINAL, "x = 1")
+    assert result.modified_code is None
+    assert result.error.startswith("ERROR:")
+
+def test_apply_raw_instructions_errors():
+    assert apply_raw_instructions("a", "ERROR: boom").error == "ERROR: boom"
+    assert apply_raw_instructions("a", "   ").error.startswith("ERROR:")
+    assert apply_raw_instructions("a", "gibberish").error == "ERROR: failed to parse instructions."
@@ -1,13 +1,15 @@
 # tests/unit/test_reasoning_agent.py
+import sqlite3
+
 import pytest
 from unittest.mock import MagicMock, patch
 
-from src.ai.reasoning_agent import ReasoningAgent
+from src.ai.reasoning_agent import AsyncReasoningAgent, ReasoningAgent
 
 
 # ------------------------------------------------------------------------- #
 @pytest.fixture
-def fake_settings(monkeypatch):
+def fake_settings(monkeypatch, tmp_path):
     """Deterministic settings for each test."""
     from src.config.settings import AppSettings
 
@@ -15,6 +17,7 @@ def fake_settings(monkeypatch):
         openai_api_key="test-key",
         openai_model="test-model",
         timeout_seconds=5,
+        data_dir=tmp_path,  # keep the response cache out of the project tree
     )
     monkeypatch.setattr(
         "src.ai.reasoning_agent.get_settings",
@@ -76,3 +79,329 @@ def test_get_instructions_api_error(mock_openai_cls, fake_settings, monkeypatch)
     agent = ReasoningAgent()
     out = agent.get_instructions("a", "b")
     assert out.startswith("ERROR:")
+
+
+# ------------------------------------------------------------------------- #
+# Streaming, against a local fake OpenAI-compatible server (no network)
+# ------------------------------------------------------------------------- #
+from src.core.parser import DeleteInstruction, InsertInstruction, parse_instructions
+from tests.unit.fake_openai_server import FakeOpenAIServer
+
+
+@pytest.fixture
+def local_settings(fake_settings):
+    """Point the agent at whatever FakeOpenAIServer the test starts."""
+    def use(server):
+        fake_settings.openai_base_url = server.base_url
+        return fake_settings
+    return use
+
+
+def test_stream_instructions_yields_chunks_and_records_metrics(local_settings):
+    script = "INSERT 1: import os\nDELETE 4-6\nINSERT 9:     return value\n"
+    with FakeOpenAIServer(content=script, chunk_size=5) as server:
+        local_settings(server)
+        agent = ReasoningAgent()
+        chunks = list(agent.stream_instructions("orig", "sugg"))
+
+    assert "".join(chunks) == script
+    assert len(chunks) > 1
+    assert server.requests[0]["stream"] is True
+    metrics = agent.last_metrics
+    assert metrics.error is None
+    assert metrics.chunks == len(chunks)
+    assert metrics.characters == len(script)
+    assert 0 <= metrics.time_to_first_token <= metrics.total_duration
+
+
+def test_stream_parsed_instructions_yields_objects(local_settings):
+    script = "INSERT 1: import os\nDELETE 4-6\nINSERT 9:     return value"
+    with FakeOpenAIServer(content=script, chunk_size=3) as server:
+        local_settings(server)
+        agent = ReasoningAgent()
+        result = list(agent.stream_parsed_instructions("orig", "sugg"))
+
+    assert result == parse_instructions(script)
+    assert result[1] == DeleteInstruction(line_start=4, line_end=6)
+    metrics = agent.last_metrics
+    assert metrics.time_to_first_token <= metrics.time_to_first_instruction <= metrics.total_duration
+
+
+def test_stream_parsed_instructions_first_instruction_before_completion(local_settings):
+    script = "INSERT 1: a\n" + "".join(f"INSERT {i}: filler\n" for i in range(2, 12))
+    with FakeOpenAIServer(content=script, chunk_size=12, chunk_delay=0.02) as server:
+        local_settings(server)
+        agent = ReasoningAgent()
+        stream = agent.stream_parsed_instructions("orig", "sugg")
+        first = next(stream)
+        assert first == InsertInstruction(line_before=1, content="a")
+        rest = list(stream)
+
+    assert len(rest) == 10
+    metrics = agent.last_metrics
+    assert metrics.time_to_first_instruction < metrics.total_duration - 0.1
+
+
+def test_stream_instructions_surfaces_api_error(local_settings):
+    with FakeOpenAIServer(status=500) as server:
+        local_settings(server)
+        agent = ReasoningAgent()
+        agent._client = agent._client.with_options(max_retries=0)
+        chunks = list(agent.stream_instructions("orig", "sugg"))
+
+    assert len(chunks) == 1 and chunks[0].startswith("ERROR:")
+    assert agent.last_metrics.error == chunks[0]
+    assert list(parse_instructions(chunks[0])) == []
+
+
+def test_get_instructions_against_local_server(local_settings):
+    with FakeOpenAIServer(content="  DELETE 2\n") as server:
+        local_settings(server)
+        assert ReasoningAgent().get_instructions("a\nb", "a") == "DELETE 2"
+        assert "stream" not in server.requests[0] or not server.requests[0]["stream"]
+
+
+# ------------------------------------------------------------------------- #
+# Response cache
+# ------------------------------------------------------------------------- #
+@patch("src.ai.reasoning_agent.openai.OpenAI")
+def test_get_instructions_served_from_cache_on_repeat(mock_openai_cls, fake_settings):
+    mock_choice = MagicMock()
+    mock_choice.message.content = "DELETE 2"
+    mock_client = mock_openai_cls.return_value
+    mock_client.chat.completions.create.return_value = MagicMock(choices=[mock_choice])
+
+    assert ReasoningAgent().get_instructions("a\nb", "a") == "DELETE 2"
+    # A fresh agent (as in a new CLI run) reuses the on-disk entry.
+    agent = ReasoningAgent()
+    assert agent.get_instructions("a\nb", "a") == "DELETE 2"
+    assert mock_client.chat.completions.create.call_count == 1
+    assert agent.cache.hits == 1
+
+    # A different suggestion is a different key.
+    agent.get_instructions("a\nb", "b")
+    assert mock_client.chat.completions.create.call_count == 2
+
+
+@patch("src.ai.reasoning_agent.openai.OpenAI")
+def test_error_replies_are_not_cached(mock_openai_cls, fake_settings):
+    from openai import APIError
+
+    mock_client = mock_openai_cls.return_value
+    mock_client.chat.completions.create.side_effect = APIError(message="boom", request=MagicMock(), body=None)
+    agent = ReasoningAgent()
+    assert agent.get_instructions("a", "b").startswith("ERROR:")
+    assert len(agent.cache) == 0
+
+
+def test_cache_can_be_disabled(fake_settings):
+    fake_settings.response_cache_enabled = False
+    assert ReasoningAgent().cache is None
+
+
+def test_streamed_reply_is_cached(local_settings):
+    with FakeOpenAIServer(content="DELETE 3\n", chunk_size=2) as server:
+        local_settings(server)
+        agent = ReasoningAgent()
+        assert "".join(agent.stream_instructions("x", "y")) == "DELETE 3\n"
+        assert list(agent.stream_instructions("x", "y")) == ["DELETE 3"]
+    assert len(server.requests) == 1
+
+
+class BrokenCache:
+    """A cache whose database is locked: every read and write fails."""
+
+    def get(self, key):
+        raise sqlite3.OperationalError("database is locked")
+
+    def put(self, key, response):
+        raise sqlite3.OperationalError("database is locked")
+
+
+@patch("src.ai.reasoning_agent.openai.OpenAI")
+def test_cache_failures_do_not_change_the_reply(mock_openai_cls, fake_settings):
+    mock_choice = MagicMock()
+    mock_choice.message.content = "DELETE 2"
+    mock_openai_cls.return_value.chat.completions.create.return_value = MagicMock(choices=[mock_choice])
+    assert ReasoningAgent(cache=BrokenCache()).get_instructions("a\nb", "a") == "DELETE 2"
+
+
+def test_unusable_data_dir_disables_the_cache(fake_settings, tmp_path):
+    fake_settings.data_dir = tmp_path / "not-a-directory"
+    fake_settings.data_dir.write_text("", encoding="utf-8")
+    assert ReasoningAgent().cache is None
+    assert AsyncReasoningAgent().cache is None
+
+
+# ------------------------------------------------------------------------- #
+# AsyncReasoningAgent
+# ------------------------------------------------------------------------- #
+import asyncio
+import re
+import time
+
+from src.ai.reasoning_agent import AsyncReasoningAgent
+
+
+def _echo_suggestion(body):
+    """Reply with an instruction naming the pair, taken from the prompt."""
+    return "INSERT 1: " + re.search(r"pair-\d+", body["messages"][1]["content"]).group(0)
+
+
+def test_async_agent_requires_api_key(fake_settings):
+    fake_settings.openai_api_key = ""
+    with pytest.raises(ValueError):
+        AsyncReasoningAgent()
+
+
+def test_get_instructions_many_keeps_input_order(local_settings):
+    pairs = [("orig", f"pair-{i}") for i in range(12)]
+    with FakeOpenAIServer(content=_echo_suggestion) as server:
+        local_settings(server).response_cache_enabled = False
+
+        async def run():
+            async with AsyncReasoningAgent(max_concurrency=4) as agent:
+                return await agent.get_instructions_many(pairs)
+        results = asyncio.run(run())
+
+    assert results == [f"INSERT 1: pair-{i}" for i in range(12)]
+
+
+def test_get_instructions_many_bounds_concurrency(local_settings):
+    pairs = [("orig", f"pair-{i}") for i in range(8)]
+    timings = {}
+    for limit in (1, 8):
+        with FakeOpenAIServer(content=_echo_suggestion, latency=0.1) as server:
+            local_settings(server).response_cache_enabled = False
+
+            async def run():
+                async with AsyncReasoningAgent(max_concurrency=limit) as agent:
+                    return await agent.get_instructions_many(pairs)
+            start = time.perf_counter()
+            asyncio.run(run())
+            timings[limit] = time.perf_counter() - start
+            assert server.max_in_flight <= limit
+
+    assert timings[8] < timings[1] / 2
+
+
+def test_async_agent_uses_cache(local_settings):
+    with FakeOpenAIServer(content="DELETE 1") as server:
+        local_settings(server)
+
+        async def run():
+            async with AsyncReasoningAgent() as agent:
+                first = await agent.get_instructions("a", "b")
+                second = await agent.get_instructions("a", "b")
+                return first, second, agent.cache.hits
+        assert asyncio.run(run()) == ("DELETE 1", "DELETE 1", 1)
+    assert len(server.requests) == 1
+
+
+def test_async_agent_ignores_cache_failures(local_settings):
+    with FakeOpenAIServer(content="DELETE 1") as server:
+        local_settings(server)
+
+        async def run():
+            async with AsyncReasoningAgent(cache=BrokenCache()) as agent:
+                streamed = "".join([text async for text in agent.stream_instructions("a", "b")])
+                return await agent.get_instructions("a", "b"), streamed
+        assert asyncio.run(run()) == ("DELETE 1", "DELETE 1")
+    assert len(server.requests) == 2
+
+
+# ------------------------------------------------------------------------- #
+# Hunk-only prompting
+# ------------------------------------------------------------------------- #
+from src.core.injector import apply_instructions
+
+BIG_ORIGINAL = "\n".join(f"value_{i} = compute({i})" for i in range(1, 3001))
+BIG_SUGGESTION = BIG_ORIGINAL.replace("value_1500 = compute(1500)", "value_1500 = compute(1500) * 2")
+
+
+def test_hunk_prompt_sends_only_changed_region_with_absolute_numbers(local_settings):
+    reply = "INSERT 1500: value_1500 = compute(1500) * 2\nDELETE 1500"
+    with FakeOpenAIServer(content=reply) as server:
+        settings = local_settings(server)
+        settings.prompt_mode = "hunks"
+        settings.hunk_context_lines = 3
+        agent = ReasoningAgent()
+        instructions = agent.get_instructions(BIG_ORIGINAL, BIG_SUGGESTION)
+
+    prompt = server.requests[0]["messages"][1]["content"]
+    assert "1497: value_1497 = compute(1497)" in prompt
+    assert "1500: value_1500 = compute(1500) * 2" in prompt
+    assert "1503: value_1503 = compute(1503)" in prompt
+    assert "1496: " not in prompt and "1504: " not in prompt
+    stats = agent.last_prompt_stats
+    assert stats.mode == "hunks" and stats.hunks == 1
+    assert stats.reduction > 0.95
+    # The reply still applies to the whole original unchanged.
+    assert apply_instructions(BIG_ORIGINAL, parse_instructions(instructions)) == BIG_SUGGESTION
+
+
+def test_full_prompt_mode_reports_no_reduction(local_settings):
+    with FakeOpenAIServer(content="NO CHANGES") as server:
+        local_settings(server)
+        agent = ReasoningAgent()
+        agent.get_instructions(BIG_ORIGINAL, BIG_SUGGESTION)
+    assert agent.last_prompt_stats.mode == "full"
+    assert agent.last_prompt_stats.reduction == 0.0
+    assert "1: value_1 = compute(1)" in server.requests[0]["messages"][1]["content"]
+
+
+@pytest.mark.parametrize("numbered_original", ["", "1: a", "1: a\n2:     b\n3: "])
+@pytest.mark.parametrize("numbered_suggestion", ["", "1: x", "1: x\n2: y"])
+def test_full_prompt_size_is_computed_exactly(numbered_original, numbered_suggestion):
+    from src.ai.reasoning_agent import _build_prompt, _full_prompt_chars
+
+    assert _full_prompt_chars(numbered_original, numbered_suggestion) == \
+        len(_build_prompt(numbered_original, numbered_suggestion))
+
+
+def test_hunk_mode_falls_back_to_full_prompt_when_not_smaller(local_settings):
+    with FakeOpenAIServer(content="NO CHANGES") as server:
+        settings = local_settings(server)
+        settings.prompt_mode = "hunks"
+        agent = ReasoningAgent()
+        agent.get_instructions("a\nb", "c\nd")
+    assert agent.last_prompt_stats.mode == "full"
+
+
+# ------------------------------------------------------------------------- #
+async def _collect(agent, original, suggestion):
+    return [chunk async for chunk in agent.stream_instructions(original, suggestion)]
+
+
+def test_async_stream_instructions_yields_chunks(local_settings):
+    script = "INSERT 1: import os\nDELETE 4-6\n"
+    with FakeOpenAIServer(content=script, chunk_size=5) as server:
+        local_settings(server)
+
+        async def run():
+            async with AsyncReasoningAgent() as agent:
+                first = await _collect(agent, "orig", "sugg")
+                second = await _collect(agent, "orig", "sugg")   # served from the cache
+                return first, second, agent.last_metrics
+        first, second, metrics = asyncio.run(run())
+
+    assert "".join(first) == script and len(first) > 1
+    assert second == [script.strip()]
+    assert len(server.requests) == 1 and server.requests[0]["stream"] is True
+    assert metrics.error is None and metrics.time_to_first_token is not None
+
+
+def test_async_stream_cancel_aborts_request_before_first_token(local_settings):
+    with FakeOpenAIServer(content="DELETE 1", latency=10) as server:
+        local_settings(server).response_cache_enabled = False
+
+        async def run():
+            async with AsyncReasoningAgent() as agent:
+                task = asyncio.ensure_future(_collect(agent, "a", "b"))
+                await asyncio.sleep(0.2)
+                start = time.perf_counter()
+                task.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await task
+                return time.perf_counter() - start
+        assert asyncio.run(run()) < 1.0
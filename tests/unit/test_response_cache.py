@@ -0,0 +1,71 @@
+# tests/unit/test_response_cache.py
+import multiprocessing
+import time
+
+from src.ai.response_cache import ResponseCache
+
+
+def test_make_key_is_stable_and_unambiguous():
+    key = ResponseCache.make_key("m", "sys", "1: a", "1: b")
+    assert key == ResponseCache.make_key("m", "sys", "1: a", "1: b")
+    assert key != ResponseCache.make_key("m", "sys", "1: a1", ": b")
+    assert key != ResponseCache.make_key("other", "sys", "1: a", "1: b")
+
+def test_get_put_and_counters(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite3")
+    assert cache.get("k") is None
+    cache.put("k", "DELETE 1")
+    assert cache.get("k") == "DELETE 1"
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1, "bytes": len("DELETE 1")}
+
+def test_persists_across_instances(tmp_path):
+    ResponseCache(tmp_path / "cache.sqlite3").put("k", "NO CHANGES")
+    assert ResponseCache(tmp_path / "cache.sqlite3").get("k") == "NO CHANGES"
+
+def test_evicts_least_recently_used_beyond_max_entries(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite3", max_entries=2)
+    cache.put("a", "1")
+    time.sleep(0.01)
+    cache.put("b", "2")
+    time.sleep(0.01)
+    cache.get("a")  # "a" is now more recent than "b"
+    time.sleep(0.01)
+    cache.put("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+def test_evicts_beyond_max_bytes(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite3", max_bytes=10)
+    cache.put("a", "x" * 6)
+    time.sleep(0.01)
+    cache.put("b", "y" * 6)
+    assert len(cache) == 1
+    assert cache.get("b") == "y" * 6
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite3", max_age_seconds=0.05)
+    cache.put("a", "1")
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def _writer(path, worker):
+    cache = ResponseCache(path)
+    for i in range(50):
+        cache.put(f"{worker}-{i}", f"INSERT {i}: w{worker}")
+        cache.get(f"{(worker + 1) % 4}-{i}")
+    cache.close()
+
+def test_safe_across_processes(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    ResponseCache(path).close()  # create the schema up front
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=_writer, args=(path, w)) for w in range(4)]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join(60)
+        assert p.exitcode == 0
+    assert len(ResponseCache(path)) == 200
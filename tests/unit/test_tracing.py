@@ -0,0 +1,89 @@
+# tests/unit/test_tracing.py
+import asyncio
+import json
+import sys
+
+import pytest
+
+from src.utils.tracing import NullTracer, Tracer, get_tracer, span, use_tracer
+
+
+def test_tracing_is_off_by_default():
+    assert isinstance(get_tracer(), NullTracer)
+    first, second = span("a", size=1), span("b")
+    assert first is second          # one shared no-op span, nothing allocated per call
+    with first as s:
+        s.set(output_chars=3)
+
+
+def test_tracer_records_nested_spans_with_sizes():
+    tracer = Tracer()
+    with use_tracer(tracer):
+        with span("outer", input_chars=10) as outer:
+            with span("inner"):
+                sum(range(10000))
+            outer.set(output_chars=20)
+    assert isinstance(get_tracer(), NullTracer)
+
+    inner, outer = tracer.spans      # recorded in completion order
+    assert (inner.name, outer.name) == ("inner", "outer")
+    assert outer.attrs == {"input_chars": 10, "output_chars": 20}
+    assert outer.start_ns <= inner.start_ns and inner.end_ns <= outer.end_ns
+    assert outer.wall_ms >= inner.wall_ms >= 0 and inner.cpu_ms >= 0
+
+
+def test_span_marks_exceptions():
+    tracer = Tracer()
+    with use_tracer(tracer), pytest.raises(KeyError):
+        with span("lookup"):
+            raise KeyError("x")
+    assert tracer.spans[0].attrs["error"] == "KeyError"
+
+
+def test_tracer_follows_asyncio_tasks():
+    async def work(i):
+        with span("task", i=i):
+            await asyncio.sleep(0)
+
+    async def main():
+        await asyncio.gather(*(work(i) for i in range(3)))
+
+    tracer = Tracer()
+    with use_tracer(tracer):
+        asyncio.run(main())
+    assert sorted(s.attrs["i"] for s in tracer.spans) == [0, 1, 2]
+
+
+def test_chrome_trace_and_summary(tmp_path):
+    tracer = Tracer()
+    with use_tracer(tracer):
+        for _ in range(2):
+            with span("parse_instructions", input_chars=5):
+                pass
+    path = tmp_path / "trace.json"
+    tracer.write_chrome_trace(path)
+
+    events = json.loads(path.read_text(encoding="utf-8"))["traceEvents"]
+    assert [e["name"] for e in events] == ["parse_instructions"] * 2
+    assert {"ph", "ts", "dur", "pid", "tid"} <= events[0].keys()
+    assert events[0]["ph"] == "X" and events[0]["args"]["input_chars"] == 5
+    assert "cpu_ms" in events[0]["args"]
+    assert "parse_instructions x2" in tracer.summary()
+
+
+def test_cli_trace_flag_writes_stage_spans(tmp_path, monkeypatch, capsys):
+    from src.cli import main as cli_main
+
+    original = tmp_path / "original.py"
+    suggestion = tmp_path / "suggestion.py"
+    original.write_text("a = 1\nb = 2\n", encoding="utf-8")
+    suggestion.write_text("a = 1\nb = 3\n", encoding="utf-8")
+    trace = tmp_path / "trace.json"
+    monkeypatch.setattr(sys, "argv", [
+        "codesling", str(original), str(suggestion), "-o", str(tmp_path / "out.py"), "--trace", str(trace),
+    ])
+    cli_main.main()
+
+    names = [e["name"] for e in json.loads(trace.read_text(encoding="utf-8"))["traceEvents"]]
+    assert names == ["cli", "read_files", "local_diff", "apply_instructions", "write_file"]
+    assert capsys.readouterr().err.startswith("Trace: ")
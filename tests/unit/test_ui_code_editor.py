@@ -0,0 +1,60 @@
+# tests/unit/test_ui_code_editor.py
+from src.core.parser import DeleteInstruction, InsertInstruction
+from src.ui.code_editor import CodeEditor, DiffView
+
+
+def _numbered(count):
+    return "\n".join(f"line {i}" for i in range(1, count + 1))
+
+
+def _highlighted_lines(editor):
+    return [selection.cursor.blockNumber() + 1 for selection in editor.extraSelections()]
+
+
+def test_gutter_grows_with_line_count(qtbot):
+    editor = CodeEditor()
+    qtbot.addWidget(editor)
+    editor.setPlainText(_numbered(9))
+    narrow = editor.line_number_area_width()
+    editor.setPlainText(_numbered(10_000))
+    assert editor.line_number_area_width() > narrow
+    assert editor.viewportMargins().left() == editor.line_number_area_width()
+
+
+def test_highlights_only_visible_blocks_and_follow_scrolling(qtbot):
+    editor = CodeEditor()
+    qtbot.addWidget(editor)
+    editor.resize(400, 300)
+    editor.show()
+    qtbot.waitExposed(editor)
+    editor.setPlainText(_numbered(100_000))
+    editor.set_line_highlights([(1, 100_000)], "inserted")
+
+    first, last = editor.visible_block_range()
+    lines = _highlighted_lines(editor)
+    assert lines == list(range(first + 1, last + 2))
+    assert len(lines) < 100
+
+    editor.verticalScrollBar().setValue(50_000)
+    qtbot.waitUntil(lambda: _highlighted_lines(editor)[:1] == [50_001], timeout=2000)
+    assert len(editor.extraSelections()) < 100
+
+    editor.clear_line_highlights()
+    assert editor.extraSelections() == []
+
+
+def test_diff_view_highlights_changes_and_maps_lines(qtbot):
+    view = DiffView()
+    qtbot.addWidget(view)
+    view.resize(800, 400)
+    view.show()
+    qtbot.waitExposed(view)
+    original = "a\nb\nc\nd"
+    instructions = [InsertInstruction(line_before=2, content="B"), DeleteInstruction(line_start=2, line_end=3)]
+    view.set_diff(original, "a\nB\nd", instructions)
+
+    assert _highlighted_lines(view.original_view) == [2, 3]
+    assert _highlighted_lines(view.result_view) == [2]
+    assert view.result_line_for(4) == 3
+    assert view.result_line_for(2) == 2  # deleted lines map to just after the preceding kept run
+    assert view.original_line_for(3) == 4
@@ -1,12 +1,43 @@
 # tests/unit/test_ui_main_window.py
+import asyncio
+import time
+
 import pytest
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 from unittest.mock import patch
 
+from src.ai.reasoning_agent import CompletionMetrics
+
 # VVVV THIS LINE RIGHT HERE VVVV
 from src.ui.main_window import MainWindow, CodeEditorDialog, PLACEHOLDER_ORIGINAL_CODE, PLACEHOLDER_AI_SUGGESTION
 # ^^^^ MAKE SURE PLACEHOLDER_AI_SUGGESTION IS INCLUDED ^^^^
 
+class FakeStreamingAgent:
+    """Stands in for AsyncReasoningAgent: streams `reply` in small chunks after `delay` seconds."""
+
+    def __init__(self, reply, delay=0.0, chunk_delay=0.0):
+        self.reply = reply
+        self.delay = delay
+        self.chunk_delay = chunk_delay
+        self.calls = []
+        self.cancelled = False
+        self.closed = False
+
+    async def stream_instructions(self, original_code, ai_suggestion):
+        self.calls.append((original_code, ai_suggestion))
+        try:
+            await asyncio.sleep(self.delay)
+            for start in range(0, len(self.reply), 8):
+                yield self.reply[start:start + 8]
+                await asyncio.sleep(self.chunk_delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+    async def aclose(self):
+        self.closed = True
+
+
 # Qt Bot is the main fixture from pytest-qt to interact with Qt widgets
 def test_mainwindow_instantiation(qtbot):
     """Test if the MainWindow can be created."""
@@ -71,6 +102,8 @@ def test_mainwindow_process_code_button_placeholder_logic(qtbot, mocker):
     # or simply check the state of inputs when it's called.
     # For this test, let's spy on the print statements to see if placeholders are used.
     mock_print = mocker.patch('builtins.print')
+    agent = FakeStreamingAgent("NO CHANGES")
+    main_window.agent_factory = lambda: agent
 
     # Ensure text areas are empty (so placeholder text logic should trigger)
     main_window.txt_original_code.clear()
@@ -90,14 +123,12 @@ def test_mainwindow_process_code_button_placeholder_logic(qtbot, mocker):
     # `ai_suggestion = self.txt_ai_suggestion.placeholderText()`
     # Then it prints: `print(f"Original code field was empty, using placeholder: '{original_code[:30]}...'")`
 
-    # Let's check if the output text area received the simulated output
-    # that includes the placeholders
-    output_text = main_window.txt_modified_code.toPlainText()
-    assert PLACEHOLDER_ORIGINAL_CODE[:30] in output_text
-    assert PLACEHOLDER_AI_SUGGESTION[:30] in output_text
-    
-    # More robust: check that the actual backend call (when we integrate it)
-    # would receive these placeholder strings. For now, the print check can be:
+    # The backend (the reasoning agent, on the worker thread) receives the placeholder strings.
+    qtbot.waitUntil(lambda: main_window.btn_process_code.isEnabled(), timeout=5000)
+    assert agent.calls == [(PLACEHOLDER_ORIGINAL_CODE, PLACEHOLDER_AI_SUGGESTION)]
+    assert main_window.txt_modified_code.toPlainText() == PLACEHOLDER_ORIGINAL_CODE  # "NO CHANGES"
+
+    # The log messages still report the placeholder usage:
     found_original_placeholder_log = False
     found_ai_placeholder_log = False
     for call_args in mock_print.call_args_list:
@@ -116,4 +147,202 @@ def test_mainwindow_process_code_button_placeholder_logic(qtbot, mocker):
 # To run these tests:
 # 1. Make sure you have pytest and pytest-qt installed.
 # 2. Navigate to your project root in the terminal.
-# 3. Run the command: pytest
\ No newline at end of file
+# 3. Run the command: pytest
+def test_mainwindow_process_complete_file_uses_local_diff(qtbot):
+    """A complete-file suggestion is diffed locally and the result shown directly."""
+    main_window = MainWindow()
+    qtbot.addWidget(main_window)
+
+    original = "def hello():\n    print('world')\n\nhello()"
+    suggestion = "def hello():\n    print('world!')\n\nhello()"
+    main_window.txt_original_code.setPlainText(original)
+    main_window.txt_ai_suggestion.setPlainText(suggestion)
+
+    main_window.agent_factory = lambda: pytest.fail("complete files must not reach the agent")
+
+    qtbot.mouseClick(main_window.btn_process_code, Qt.MouseButton.LeftButton)
+
+    qtbot.waitUntil(lambda: main_window.txt_modified_code.toPlainText() == suggestion, timeout=5000)
+    qtbot.waitUntil(main_window.btn_show_diff.isEnabled, timeout=5000)
+    assert main_window._last_diff[0] == original
+    assert main_window._last_diff[1] == suggestion
+    assert len(main_window._last_diff[2]) > 0
+
+
+class FakeRecorder:
+    def __init__(self):
+        self.records = []
+        self.closed = False
+
+    def record(self, original, suggestion, raw_instructions, final_code, label=None, source=None):
+        self.records.append((original, suggestion, raw_instructions, final_code, label, source))
+
+    def close(self):
+        self.closed = True
+
+
+def test_mainwindow_feedback_buttons_record_the_result_once(qtbot):
+    main_window = MainWindow()
+    qtbot.addWidget(main_window)
+    recorder = FakeRecorder()
+    main_window.recorder_factory = lambda: recorder
+    assert not main_window.btn_ai_did_good.isEnabled()
+
+    original = "a = 1\nb = 2"
+    main_window.txt_original_code.setPlainText(original)
+    main_window.txt_ai_suggestion.setPlainText("a = 1\nb = 3")
+    qtbot.mouseClick(main_window.btn_process_code, Qt.MouseButton.LeftButton)
+    qtbot.waitUntil(main_window.btn_ai_did_good.isEnabled, timeout=5000)
+
+    main_window.txt_modified_code.setPlainText("a = 1\nb = 4")  # a manual fix is what gets recorded
+    qtbot.mouseClick(main_window.btn_ai_did_bad, Qt.MouseButton.LeftButton)
+    assert recorder.records == [(original, "a = 1\nb = 3", "INSERT 2: b = 3\nDELETE 2", "a = 1\nb = 4", "bad", "local")]
+    assert not main_window.btn_ai_did_good.isEnabled() and not main_window.btn_ai_did_bad.isEnabled()
+
+    main_window.close()
+    assert recorder.closed
+
+
+def test_mainwindow_live_preview_debounces_and_skips_unchanged_inputs(qtbot, mocker):
+    main_window = MainWindow()
+    qtbot.addWidget(main_window)
+    main_window._preview_timer.setInterval(50)
+    try_diff = mocker.spy(main_window._preview_differ, "try_diff")
+
+    original = "\n".join(f"line_{i}" for i in range(20))
+    main_window.txt_original_code.setPlainText(original)
+    main_window.chk_live_preview.setChecked(True)
+    for i in range(5):  # a burst of edits refreshes once
+        main_window.txt_ai_suggestion.setPlainText(original.replace("line_3", f"line_three{i}"))
+    qtbot.waitUntil(lambda: "line_three4" in main_window.txt_modified_code.toPlainText(), timeout=5000)
+    assert try_diff.call_count == 1
+    assert main_window.btn_show_diff.isEnabled()
+
+    # Re-setting identical text restarts the timer but does no work.
+    main_window.txt_original_code.setPlainText(original)
+    qtbot.wait(200)
+    assert try_diff.call_count == 1
+
+    main_window.txt_original_code.setPlainText(original.replace("line_10", "line_ten"))
+    qtbot.waitUntil(lambda: try_diff.call_count == 2, timeout=5000)
+    assert main_window.txt_modified_code.toPlainText() == original.replace("line_3", "line_three4")
+
+
+SNIPPET_ORIGINAL = "\n".join(f"x{i} = {i}" for i in range(10))
+
+
+def test_mainwindow_streams_partial_output_from_agent(qtbot):
+    main_window = MainWindow()
+    qtbot.addWidget(main_window)
+    # Chunks far enough apart for a (throttled) partial to be shown before DELETE 9-10 arrives.
+    agent = FakeStreamingAgent("INSERT 4: x3 = 'three'\nDELETE 4\nDELETE 9-10\n", chunk_delay=0.1)
+    main_window.agent_factory = lambda: agent
+    partials = []
+    main_window.txt_modified_code.textChanged.connect(
+        lambda: partials.append(main_window.txt_modified_code.toPlainText())
+    )
+    main_window.txt_original_code.setPlainText(SNIPPET_ORIGINAL)
+    main_window.txt_ai_suggestion.setPlainText("x3 = 'three'")
+
+    qtbot.mouseClick(main_window.btn_process_code, Qt.MouseButton.LeftButton)
+    assert not main_window.btn_process_code.isEnabled() and main_window.btn_cancel.isEnabled()
+    qtbot.waitUntil(lambda: main_window.btn_process_code.isEnabled(), timeout=5000)
+
+    final = "\n".join(["x0 = 0", "x1 = 1", "x2 = 2", "x3 = 'three'", "x4 = 4", "x5 = 5", "x6 = 6", "x7 = 7"])
+    assert main_window.txt_modified_code.toPlainText() == final
+    assert any("x3 = 'three'" in text and "x9 = 9" in text for text in partials)  # before DELETE 9-10 arrived
+    assert agent.closed
+    assert main_window.statusBar().currentMessage() == "Done (AI)."
+
+
+def test_mainwindow_throttles_partial_output(qtbot):
+    main_window = MainWindow()
+    qtbot.addWidget(main_window)
+    original = "\n".join(f"x{i} = {i}" for i in range(2000))
+    reply = "".join(f"INSERT {line}: y{line} = {line}\n" for line in range(1, 301))
+    main_window.agent_factory = lambda: FakeStreamingAgent(reply, chunk_delay=0.001)
+    redraws = []
+    main_window.txt_modified_code.textChanged.connect(lambda: redraws.append(time.perf_counter()))
+    main_window.txt_original_code.setPlainText(original)
+    main_window.txt_ai_suggestion.setPlainText("y1 = 1")
+
+    start = time.perf_counter()
+    qtbot.mouseClick(main_window.btn_process_code, Qt.MouseButton.LeftButton)
+    qtbot.waitUntil(lambda: main_window.btn_process_code.isEnabled(), timeout=20000)
+    elapsed = time.perf_counter() - start
+
+    # 300 instructions, but at most one redraw per interval plus the final result.
+    assert len(redraws) <= elapsed / 0.1 + 2
+    assert main_window.txt_modified_code.toPlainText().startswith("y1 = 1\nx0 = 0\ny2 = 2\nx1 = 1")
+
+
+def test_mainwindow_stays_responsive_and_cancel_abandons_request(qtbot):
+    main_window = MainWindow()
+    qtbot.addWidget(main_window)
+    agent = FakeStreamingAgent("DELETE 1", delay=10)    # a simulated 10 s request
+    main_window.agent_factory = lambda: agent
+    main_window.txt_original_code.setPlainText(SNIPPET_ORIGINAL)
+    main_window.txt_ai_suggestion.setPlainText("x3 = 'three'")
+
+    ticks = []
+    timer = QTimer()
+    timer.timeout.connect(lambda: ticks.append(time.perf_counter()))
+    timer.start(10)
+    qtbot.mouseClick(main_window.btn_process_code, Qt.MouseButton.LeftButton)
+    qtbot.wait(500)
+    timer.stop()
+
+    # The event loop kept ticking while the request was in flight.
+    gaps = [b - a for a, b in zip(ticks, ticks[1:])]
+    assert len(ticks) > 20 and max(gaps) < 0.1
+
+    start = time.perf_counter()
+    qtbot.mouseClick(main_window.btn_cancel, Qt.MouseButton.LeftButton)
+    assert main_window.btn_process_code.isEnabled() and not main_window.btn_cancel.isEnabled()
+    assert main_window.statusBar().currentMessage() == "Cancelled."
+    qtbot.waitUntil(lambda: agent.cancelled and agent.closed, timeout=2000)
+    assert main_window.thread_pool.waitForDone(2000)
+    assert time.perf_counter() - start < 2
+
+
+class FailingStreamingAgent(FakeStreamingAgent):
+    """Streams `reply`, then fails mid-stream the way AsyncReasoningAgent reports it."""
+
+    async def stream_instructions(self, original_code, ai_suggestion):
+        self.last_metrics = CompletionMetrics()
+        async for text in super().stream_instructions(original_code, ai_suggestion):
+            yield text
+        self.last_metrics.error = "ERROR: failed to connect to OpenAI – connection dropped"
+        yield "\n" + self.last_metrics.error
+
+
+def test_mainwindow_reports_mid_stream_errors_as_failures(qtbot):
+    main_window = MainWindow()
+    qtbot.addWidget(main_window)
+    agent = FailingStreamingAgent("INSERT 4: x3 = 'three'\nDELETE 4\n")
+    main_window.agent_factory = lambda: agent
+    main_window.txt_original_code.setPlainText(SNIPPET_ORIGINAL)
+    main_window.txt_ai_suggestion.setPlainText("x3 = 'three'")
+
+    qtbot.mouseClick(main_window.btn_process_code, Qt.MouseButton.LeftButton)
+    qtbot.waitUntil(lambda: main_window.btn_process_code.isEnabled(), timeout=5000)
+    assert main_window.statusBar().currentMessage() == "ERROR: failed to connect to OpenAI – connection dropped"
+    assert not main_window.btn_show_diff.isEnabled()
+    assert main_window._last_diff is None
+    assert agent.closed
+    assert main_window.thread_pool.waitForDone(2000)
+
+
+def test_mainwindow_reports_agent_errors(qtbot):
+    main_window = MainWindow()
+    qtbot.addWidget(main_window)
+
+    def no_key():
+        raise ValueError("OpenAI API key not configured in settings.")
+    main_window.agent_factory = no_key
+    main_window.txt_original_code.setPlainText(SNIPPET_ORIGINAL)
+    main_window.txt_ai_suggestion.setPlainText("x3 = 'three'")
+
+    qtbot.mouseClick(main_window.btn_process_code, Qt.MouseButton.LeftButton)
+    qtbot.waitUntil(lambda: main_window.btn_process_code.isEnabled(), timeout=5000)
+    assert main_window.statusBar().currentMessage() == "ERROR: OpenAI API key not configured in settings."
@@ -0,0 +1,100 @@
+# tests/unit/test_validator.py
+import time
+
+from src.core.parser import DeleteInstruction, InsertInstruction, parse_instructions
+from src.core.validator import ValidationReport, validate_instructions
+from src.models.instruction_batch import InstructionBatch
+
+
+def _kinds(report):
+    return sorted((issue.kind, issue.index) for issue in report.issues)
+
+
+def test_clean_script_has_no_issues():
+    instructions = parse_instructions("INSERT 2: b = 2\nDELETE 2\nDELETE 4-5\nINSERT 6: end")
+    report = validate_instructions(instructions, 5)
+    assert report.ok
+    assert report.issues == []
+    assert report.summary() == "Validation: 4 instructions, no issues."
+
+
+def test_out_of_bounds_and_invalid_range_are_errors():
+    instructions = [
+        InsertInstruction(0, "too early"),
+        InsertInstruction(7, "too late"),
+        InsertInstruction(6, "appended"),  # num_lines + 1 is a valid insert point
+        DeleteInstruction(4, 6),
+        DeleteInstruction(3, 2),
+    ]
+    report = validate_instructions(instructions, 5)
+    assert _kinds(report) == [
+        ("invalid_range", 4), ("out_of_bounds", 0), ("out_of_bounds", 1), ("out_of_bounds", 3),
+    ]
+    assert not report.ok
+    assert all(issue.severity == "error" for issue in report.issues)
+
+
+def test_overlapping_deletes_point_at_each_other():
+    instructions = [DeleteInstruction(5, 8), DeleteInstruction(1, 2), DeleteInstruction(8), DeleteInstruction(3, 4)]
+    report = validate_instructions(instructions, 10)
+    assert _kinds(report) == [("overlapping_delete", 2)]
+    assert report.issues[0].other == 0
+    assert "#1" in report.issues[0].message
+
+
+def test_duplicate_and_deleted_range_inserts_are_warnings():
+    instructions = parse_instructions(
+        "INSERT 2: x = 1\nINSERT 2: \nINSERT 2: x = 1\nINSERT 2: \nDELETE 3-5\nINSERT 3: ok\nINSERT 4: inside"
+    )
+    report = validate_instructions(instructions, 6)
+    # Blank lines may legitimately repeat; an insert before a range's first line is a replacement.
+    assert _kinds(report) == [("duplicate_insert", 2), ("insert_in_deleted_range", 6)]
+    assert report.ok
+    assert {issue.severity for issue in report.issues} == {"warning"}
+
+
+def test_insert_between_adjacent_deletes_is_a_plain_replacement():
+    instructions = parse_instructions("DELETE 2-4\nINSERT 5: new = 5\nDELETE 5-7\nDELETE 9-10\nINSERT 10: inside")
+    report = validate_instructions(instructions, 10)
+    assert _kinds(report) == [("insert_in_deleted_range", 4)]
+
+
+def test_batch_and_list_give_the_same_report():
+    script = "\n".join([
+        "INSERT 1: a", "INSERT 1: a", "DELETE 2-4", "DELETE 3", "INSERT 3: b",
+        "INSERT 40: far", "DELETE 12",
+    ])
+    from_list = validate_instructions(parse_instructions(script), 10)
+    from_batch = validate_instructions(InstructionBatch.parse(script), 10)
+    assert from_list == from_batch
+    assert from_list.counts() == {
+        "duplicate_insert": 1, "overlapping_delete": 1, "insert_in_deleted_range": 1, "out_of_bounds": 2,
+    }
+
+
+def test_summary_and_to_dict():
+    instructions = [DeleteInstruction(line) for line in range(20, 40)]
+    report = validate_instructions(instructions, 10)
+    summary = report.summary(limit=3)
+    assert summary.splitlines()[0] == "Validation: 20 instructions, 20 errors, 0 warnings (20 out_of_bounds)"
+    assert "  error: #1 DELETE 20 reaches outside lines 1-10" in summary
+    assert summary.endswith("... and 17 more")
+    as_dict = report.to_dict()
+    assert as_dict["ok"] is False
+    assert as_dict["issues"][0] == {
+        "kind": "out_of_bounds", "index": 0, "message": "DELETE 20 reaches outside lines 1-10", "other": None,
+    }
+    assert ValidationReport.from_dict(as_dict) == report
+
+
+def test_large_script_validates_quickly():
+    count = 100_000
+    script = "\n".join(
+        f"DELETE {line}" if line % 2 else f"INSERT {line}: value_{line} = {line}" for line in range(1, count + 1)
+    )
+    instructions = parse_instructions(script)
+    start = time.perf_counter()
+    report = validate_instructions(instructions, count)
+    assert time.perf_counter() - start < 5.0
+    assert report.instructions == count
+    assert report.ok
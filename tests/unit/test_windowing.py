@@ -0,0 +1,150 @@
+# tests/unit/test_windowing.py
+import re
+
+import pytest
+
+from src.ai.windowing import WindowedReasoningAgent, shift_instructions, split_windows
+from src.core.differ import diff_instructions, format_instructions, match_lines
+from src.core.injector import apply_instructions
+from src.core.parser import DeleteInstruction, InsertInstruction
+from tests.unit.fake_openai_server import FakeOpenAIServer
+
+ORIGINAL = [f"value_{i} = compute({i})" for i in range(1, 1001)]
+
+
+def _suggestion():
+    lines = list(ORIGINAL)
+    lines[99] = "value_100 = compute(100) * 2"      # line 100
+    lines[500:503] = ["# middle block replaced"]    # lines 501-503
+    lines.append("print('done')")                   # append at the end
+    return lines
+
+
+def test_split_windows_covers_only_changed_regions():
+    b = _suggestion()
+    windows = split_windows(ORIGINAL, b, match_lines(ORIGINAL, b), max_lines=50, context=2)
+    assert windows == [(97, 102, 97, 102), (498, 505, 498, 503), (998, 1000, 996, 999)]
+    for a0, a1, b0, b1 in windows:
+        assert a1 - a0 + b1 - b0 <= 50
+
+def test_split_windows_splits_dense_changes_by_budget():
+    a = [f"l{i}" for i in range(40)]
+    b = [f"changed{i}" if i % 3 == 0 else line for i, line in enumerate(a)]
+    windows = split_windows(a, b, match_lines(a, b), max_lines=16, context=1)
+    assert len(windows) > 1
+    # Windows are ordered, disjoint and aligned (same offset on both sides).
+    for (a0, a1, b0, b1), (n0, _, m0, _) in zip(windows, windows[1:]):
+        assert a1 <= n0 and b1 <= m0
+    for a0, a1, b0, b1 in windows:
+        assert a0 - b0 == 0 and a1 - b1 == 0
+
+def test_split_windows_never_overlap_when_changes_are_closer_than_context():
+    a = [f"l{i}" for i in range(20)]
+    b = list(a)
+    b[5], b[7] = "X", "Y"
+    windows = split_windows(a, b, match_lines(a, b), max_lines=6, context=3)
+    assert len(windows) == 2
+    for (_, a1, _, b1), (n0, _, m0, _) in zip(windows, windows[1:]):
+        assert a1 <= n0 and b1 <= m0
+    # Solving each window on its own and merging reproduces the suggestion once.
+    merged = []
+    for a0, a1, b0, b1 in windows:
+        local = diff_instructions("\n".join(a[a0:a1]), "\n".join(b[b0:b1]))
+        merged.extend(shift_instructions(local, offset=a0, window_lines=a1 - a0))
+    assert apply_instructions("\n".join(a), merged).splitlines() == b
+
+def test_shift_instructions_offsets_and_drops_out_of_window():
+    local = [
+        InsertInstruction(line_before=1, content="x"),
+        InsertInstruction(line_before=6, content="append"),   # window has 5 lines
+        InsertInstruction(line_before=7, content="outside"),
+        DeleteInstruction(line_start=2, line_end=9),
+        DeleteInstruction(line_start=3),
+    ]
+    assert shift_instructions(local, offset=100, window_lines=5) == [
+        InsertInstruction(line_before=101, content="x"),
+        InsertInstruction(line_before=106, content="append"),
+        DeleteInstruction(line_start=102, line_end=105),
+        DeleteInstruction(line_start=103),
+    ]
+
+
+@pytest.fixture
+def window_settings(monkeypatch, tmp_path):
+    from src.config.settings import AppSettings
+
+    def use(server, **overrides):
+        settings = AppSettings(
+            openai_api_key="test-key",
+            openai_base_url=server.base_url,
+            data_dir=tmp_path,
+            response_cache_enabled=False,
+            **overrides,
+        )
+        monkeypatch.setattr("src.ai.reasoning_agent.get_settings", lambda: settings)
+        monkeypatch.setattr("src.ai.windowing.get_settings", lambda: settings)
+        return settings
+    return use
+
+
+def _local_diff_reply(body):
+    """Stand-in model: diff the numbered window it was sent."""
+    prompt = body["messages"][1]["content"]
+    blocks = re.findall(r"```text\n(.*?)\n?```", prompt, re.DOTALL)
+    original, suggestion = (
+        "\n".join(line.split(": ", 1)[1] for line in block.splitlines() if ": " in line) for block in blocks
+    )
+    return format_instructions(diff_instructions(original, suggestion))
+
+
+def test_windowed_agent_merges_windows_into_global_instructions(window_settings):
+    suggestion = "\n".join(_suggestion())
+    with FakeOpenAIServer(content=_local_diff_reply) as server:
+        window_settings(server, window_max_lines=60, hunk_context_lines=2)
+        agent = WindowedReasoningAgent()
+        reply = agent.get_instructions("\n".join(ORIGINAL), suggestion)
+
+    assert len(server.requests) == 3        # unchanged windows are never sent
+    for request in server.requests:
+        assert len(request["messages"][1]["content"].splitlines()) < 80
+    from src.core.parser import parse_instructions
+    assert apply_instructions("\n".join(ORIGINAL), parse_instructions(reply)) == suggestion
+
+def test_windowed_agent_small_pair_is_one_request(window_settings):
+    with FakeOpenAIServer(content="DELETE 2") as server:
+        window_settings(server, window_max_lines=100)
+        assert WindowedReasoningAgent().get_instructions("a\nb\nc", "a\nc") == "DELETE 2"
+    assert len(server.requests) == 1
+
+def test_windowed_agent_reports_window_errors(window_settings):
+    with FakeOpenAIServer(content="ERROR: model overloaded") as server:
+        window_settings(server, window_max_lines=60)
+        reply = WindowedReasoningAgent().get_instructions("\n".join(ORIGINAL), "\n".join(_suggestion()))
+    assert reply.startswith("ERROR: model overloaded (original lines 9")
+
+def test_windowed_agent_reuses_one_client_and_loop(window_settings):
+    with FakeOpenAIServer(content="DELETE 2") as server:
+        window_settings(server, window_max_lines=100)
+        agent = WindowedReasoningAgent()
+        client = agent._agent._client
+        assert agent.get_instructions("a\nb\nc", "a\nc") == "DELETE 2"
+        loop = agent._loop
+        assert agent.get_instructions("a\nb\nd", "a\nd") == "DELETE 2"
+        assert agent._loop is loop and agent._agent._client is client
+        agent.close()
+    assert agent._loop is None and loop.is_closed()
+    assert len(server.requests) == 2
+
+def test_windowed_agent_inside_an_event_loop(window_settings):
+    import asyncio
+
+    with FakeOpenAIServer(content="DELETE 2") as server:
+        window_settings(server, window_max_lines=100)
+        agent = WindowedReasoningAgent()
+
+        async def run():
+            with pytest.raises(RuntimeError, match="aget_instructions"):
+                agent.get_instructions("a\nb\nc", "a\nc")
+            return await agent.aget_instructions("a\nb\nc", "a\nc")
+        assert asyncio.run(run()) == "DELETE 2"
+        agent.close()